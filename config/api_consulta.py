@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+API de consulta (somente leitura) sobre o dataset mais recente
+Carrega o dataset uma vez em colunas NumPy, pré-calcula os índices de ordenação dos
+rankings e responde filtros/ordenação/top-k em JSON, com ETag/304 e recarga
+automática quando uma nova execução termina de gravar o arquivo
+
+Uso:
+    python config/api_consulta.py [--porta 8765] [--arquivo dados/parquet/dados.parquet]
+
+Exemplos:
+    GET /produtos?ordenar=proteina_por_kcal&limite=10
+    GET /produtos?ordenar=sodio_mg&ordem=asc&min_proteinas_g=20&busca=whey
+    GET /produto?url=https://www.integralmedica.com.br/.../p
+    GET /status
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from exportar_excel import load_dataset
+from log_config import setup_logging
+from modelos import NUTRIENT_ATTRS
+
+dados_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'dados')
+
+# Rankings derivados (nome -> função sobre as colunas por atributo)
+DERIVED_RANKINGS = {
+    'proteina_por_kcal': lambda c: c['proteinas_g'] / c['calorias_kcal'],
+    'proteina_por_porcao': lambda c: c['proteinas_g'] / c['porcao_g'],
+}
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 500
+
+
+def default_source() -> str:
+    """Parquet se existir; senão o CSV"""
+    parquet_file = os.path.join(dados_dir, 'parquet', 'dados.parquet')
+    return parquet_file if os.path.exists(parquet_file) else os.path.join(dados_dir, 'csv', 'dados.csv')
+
+
+class DatasetSnapshot:
+    """
+    Um carregamento do dataset: colunas, rankings e índices de ordenação
+    Não muda depois de criado; a recarga cria outro e troca uma única referência,
+    então uma consulta nunca mistura arrays de versões diferentes
+    """
+
+    def __init__(self, path: str, signature):
+        df = load_dataset(path)
+
+        self.urls = df['URL'].astype(str).to_numpy()
+        self.names = df['NOME_PRODUTO'].astype(object).where(df['NOME_PRODUTO'].notna(), '').astype(str).to_numpy()
+        self.names_lower = np.char.lower(self.names.astype(str))
+        columns = {attr: df[field].astype('float64').to_numpy() if field in df.columns else np.full(len(df), np.nan)
+                   for field, attr in NUTRIENT_ATTRS.items()}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for name, compute in DERIVED_RANKINGS.items():
+                values = compute(columns)
+                values[~np.isfinite(values)] = np.nan
+                columns[name] = values
+        self.columns = columns
+
+        # argsort estável; NaN vai para o fim nas duas ordens
+        self.orders = {}
+        for name, values in columns.items():
+            ascending = np.argsort(values, kind='stable')
+            valid = np.count_nonzero(~np.isnan(values))
+            self.orders[name] = {
+                'asc': ascending,
+                'desc': np.concatenate([ascending[:valid][::-1], ascending[valid:]]),
+            }
+
+        self.positions = {url: i for i, url in enumerate(self.urls)}
+        self.signature = signature
+        self.etag = hashlib.sha1(f"{path}:{signature}".encode()).hexdigest()[:16]
+        self.loaded_at = time.time()
+
+    def _row(self, i: int) -> Dict:
+        row = {'URL': self.urls[i], 'NOME_PRODUTO': self.names[i]}
+        for field, attr in NUTRIENT_ATTRS.items():
+            value = self.columns[attr][i]
+            row[field] = None if np.isnan(value) else float(value)
+        for name in DERIVED_RANKINGS:
+            value = self.columns[name][i]
+            row[name] = None if np.isnan(value) else round(float(value), 4)
+        return row
+
+    def query(self, sort: Optional[str] = None, order: str = 'desc', limit: int = DEFAULT_LIMIT,
+              offset: int = 0, filters: Optional[Dict[str, tuple]] = None,
+              search: Optional[str] = None) -> Dict:
+        """
+        Filtra e ordena usando os índices pré-calculados
+        filters: {coluna: (mínimo ou None, máximo ou None)}
+        """
+        if sort is not None and sort not in self.orders:
+            raise ValueError(f"Ordenação inválida: {sort} (opções: {', '.join(self.orders)})")
+        if order not in ('asc', 'desc'):
+            raise ValueError("ordem deve ser 'asc' ou 'desc'")
+        if limit < 0 or offset < 0:
+            raise ValueError("limite e inicio não podem ser negativos")
+
+        mask = np.ones(len(self.urls), dtype=bool)
+        for column, (minimum, maximum) in (filters or {}).items():
+            if column not in self.columns:
+                raise ValueError(f"Filtro inválido: {column}")
+            values = self.columns[column]
+            with np.errstate(invalid='ignore'):
+                if minimum is not None:
+                    mask &= values >= minimum
+                if maximum is not None:
+                    mask &= values <= maximum
+        if search:
+            mask &= np.char.find(self.names_lower, search.lower()) >= 0
+
+        index = self.orders[sort][order] if sort else np.arange(len(self.urls))
+        selected = index[mask[index]]
+        page = selected[offset:offset + limit]
+        return {'total': int(len(selected)), 'produtos': [self._row(i) for i in page]}
+
+    def get(self, url: str) -> Optional[Dict]:
+        i = self.positions.get(url)
+        return None if i is None else self._row(i)
+
+
+class DatasetIndex:
+    """
+    Dataset em memória colunar com índices de ordenação pré-calculados, recarregado
+    quando o arquivo muda. Cada requisição lê snapshot uma vez e usa só ele
+    """
+
+    def __init__(self, path: str, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self.snapshot: DatasetSnapshot = None
+        self.load()
+
+    def _stat_signature(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def load(self):
+        """Carrega o arquivo em um novo snapshot e troca a referência atual"""
+        snapshot = DatasetSnapshot(self.path, self._stat_signature())
+        self.snapshot = snapshot
+        logging.info(f"📚 Dataset carregado: {len(snapshot.urls)} produtos ({self.path})")
+
+    def refresh_if_changed(self) -> bool:
+        """
+        Recarrega se o arquivo mudou (checado no máximo a cada check_interval segundos)
+        Só uma thread checa/recarrega por vez; as outras seguem com o snapshot atual
+        """
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            now = time.monotonic()
+            if now - self._last_check < self.check_interval:
+                return False
+            self._last_check = now
+            try:
+                changed = self._stat_signature() != self.snapshot.signature
+            except OSError:
+                return False
+            if changed:
+                try:
+                    self.load()
+                except Exception as e:
+                    # Arquivo ainda sendo gravado ou inválido: mantém a versão anterior
+                    logging.warning(f"⚠️ Erro ao recarregar {self.path}: {e}")
+                    return False
+            return changed
+        finally:
+            self._lock.release()
+
+    @property
+    def etag(self) -> str:
+        return self.snapshot.etag
+
+    def query(self, **kwargs) -> Dict:
+        return self.snapshot.query(**kwargs)
+
+    def get(self, url: str) -> Optional[Dict]:
+        return self.snapshot.get(url)
+
+    def status(self, snapshot: Optional[DatasetSnapshot] = None) -> Dict:
+        snapshot = snapshot or self.snapshot
+        return {
+            'arquivo': self.path,
+            'produtos': len(snapshot.urls),
+            'etag': snapshot.etag,
+            'carregado_em': snapshot.loaded_at,
+            'ordenacoes': list(snapshot.orders),
+        }
+
+
+def _parse_filters(params: Dict[str, List[str]]) -> Dict[str, tuple]:
+    """min_<coluna>=x / max_<coluna>=y -> {coluna: (x, y)}"""
+    filters = {}
+    for key, values in params.items():
+        for prefix, slot in (('min_', 0), ('max_', 1)):
+            if key.startswith(prefix):
+                column = key[len(prefix):]
+                bounds = list(filters.get(column, (None, None)))
+                bounds[slot] = float(values[0])
+                filters[column] = tuple(bounds)
+    return filters
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """Handler HTTP: /produtos, /produto e /status"""
+
+    index: DatasetIndex = None
+
+    def _send_json(self, status: int, payload: Dict, etag: Optional[str] = None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        index = self.index
+        index.refresh_if_changed()
+        snapshot = index.snapshot
+
+        parsed = urlparse(self.path)
+        params = parse_qs(parsed.query)
+
+        # Mesmo dataset + mesma consulta = mesma resposta
+        etag = f'"{snapshot.etag}-{hashlib.sha1(self.path.encode()).hexdigest()[:8]}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        try:
+            if parsed.path == '/produtos':
+                result = snapshot.query(
+                    sort=params.get('ordenar', [None])[0],
+                    order=params.get('ordem', ['desc'])[0],
+                    limit=min(int(params.get('limite', [DEFAULT_LIMIT])[0]), MAX_LIMIT),
+                    offset=int(params.get('inicio', [0])[0]),
+                    filters=_parse_filters(params),
+                    search=params.get('busca', [None])[0],
+                )
+            elif parsed.path == '/produto':
+                result = snapshot.get(params.get('url', [''])[0])
+                if result is None:
+                    self._send_json(404, {'erro': 'Produto não encontrado'})
+                    return
+            elif parsed.path == '/status':
+                result = index.status(snapshot)
+            else:
+                self._send_json(404, {'erro': 'Rota não encontrada'})
+                return
+        except ValueError as e:
+            self._send_json(400, {'erro': str(e)})
+            return
+
+        self._send_json(200, result, etag)
+
+    def log_message(self, format, *args):
+        logging.debug(f"🌐 {self.address_string()} {format % args}")
+
+
+def serve(path: Optional[str] = None, host: str = '127.0.0.1', port: int = 8765) -> ThreadingHTTPServer:
+    """Cria o servidor (chame serve_forever() para atender)"""
+    handler = type('DatasetQueryHandler', (QueryHandler,), {'index': DatasetIndex(path or default_source())})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='API de consulta do dataset nutricional')
+    parser.add_argument('--arquivo', help='Parquet ou CSV (padrão: dataset mais recente em dados/)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8765)
+    args = parser.parse_args()
+
+    setup_logging('api_consulta')
+    path = args.arquivo or default_source()
+    if not os.path.exists(path):
+        logging.error(f"❌ Dataset não encontrado: {path} - rode a coleta (python main.py crawl) "
+                      f"ou indique o arquivo com --arquivo")
+        raise SystemExit(1)
+    server = serve(path, args.host, args.porta)
+    logging.info(f"🚀 API de consulta em http://{args.host}:{args.porta}/produtos")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("⏹️ API encerrada")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Banco SQLite com o histórico de coletas
+- produtos: um registro por URL (upsert a cada execução)
+- observacoes_nutricionais: valores de cada produto em cada execução (url, run_id)
+"""
+
+import logging
+import os
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from modelos import NUTRIENT_ATTRS, parse_float
+
+dados_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'dados')
+
+# Campos nutricionais -> colunas da tabela de observações (mesmos nomes do registro)
+FIELD_COLUMNS = NUTRIENT_ATTRS
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS execucoes (
+    run_id TEXT PRIMARY KEY,
+    concluida_em TEXT NOT NULL,
+    total_produtos INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS produtos (
+    url TEXT PRIMARY KEY,
+    nome TEXT,
+    primeira_coleta TEXT NOT NULL,
+    ultima_coleta TEXT NOT NULL,
+    ultimo_run_id TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS observacoes_nutricionais (
+    url TEXT NOT NULL REFERENCES produtos(url),
+    run_id TEXT NOT NULL REFERENCES execucoes(run_id),
+    {', '.join(f'{column} REAL' for column in FIELD_COLUMNS.values())},
+    PRIMARY KEY (url, run_id)
+);
+
+-- A chave primária (url, run_id) já serve de índice por URL
+CREATE INDEX IF NOT EXISTS idx_observacoes_run ON observacoes_nutricionais(run_id);
+CREATE INDEX IF NOT EXISTS idx_produtos_run ON produtos(ultimo_run_id);
+"""
+
+
+class NutritionStore:
+    """
+    Sistema de registro em SQLite: produtos por URL e histórico nutricional por execução
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(dados_dir, 'dados.db')
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def save_run(self, run_id: str, data: Iterable):
+        """
+        Grava uma execução inteira (registros ProductNutrition ou dicionários, em lista
+        ou gerador: os dados são percorridos uma única vez) com upserts em lote dentro
+        de uma única transação
+        """
+        now = datetime.now().isoformat(timespec='seconds')
+        columns = list(FIELD_COLUMNS.values())
+
+        products = []
+        observations = []
+        for row in data:
+            products.append((row['URL'], row.get('NOME_PRODUTO') or None, now, now, run_id))
+            observations.append((row['URL'], run_id, *(parse_float(row.get(field)) for field in FIELD_COLUMNS)))
+
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO execucoes (run_id, concluida_em, total_produtos) VALUES (?, ?, ?)",
+                (run_id, now, len(products))
+            )
+            self.conn.executemany(
+                """
+                INSERT INTO produtos (url, nome, primeira_coleta, ultima_coleta, ultimo_run_id)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    nome = COALESCE(excluded.nome, produtos.nome),
+                    ultima_coleta = excluded.ultima_coleta,
+                    ultimo_run_id = excluded.ultimo_run_id
+                """,
+                products
+            )
+            self.conn.executemany(
+                f"""
+                INSERT OR REPLACE INTO observacoes_nutricionais (url, run_id, {', '.join(columns)})
+                VALUES ({', '.join('?' * (len(columns) + 2))})
+                """,
+                observations
+            )
+
+        logging.info(f"🗄️ {len(products)} produtos gravados no banco ({self.path}, execução {run_id})")
+
+    def get_product(self, url: str) -> Optional[Dict]:
+        """Consulta pontual: cadastro do produto com a observação mais recente"""
+        row = self.conn.execute(
+            """
+            SELECT p.*, o.*
+            FROM produtos p
+            LEFT JOIN observacoes_nutricionais o ON o.url = p.url AND o.run_id = p.ultimo_run_id
+            WHERE p.url = ?
+            """,
+            (url,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def history(self, url: str) -> List[Dict]:
+        """Histórico de um produto em todas as execuções, da mais antiga para a mais nova"""
+        rows = self.conn.execute(
+            "SELECT * FROM observacoes_nutricionais WHERE url = ? ORDER BY run_id",
+            (url,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def run_observations(self, run_id: str) -> List[Dict]:
+        """Todas as observações de uma execução"""
+        rows = self.conn.execute(
+            "SELECT * FROM observacoes_nutricionais WHERE run_id = ? ORDER BY url",
+            (run_id,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def latest_run_id(self) -> Optional[str]:
+        row = self.conn.execute("SELECT MAX(run_id) FROM execucoes").fetchone()
+        return row[0] if row else None
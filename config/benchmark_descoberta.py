@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos backends de descoberta de URLs
+Mede o tempo até a lista completa de URLs para cada backend (Selenium x CDP)
+
+Uso:
+    python config/benchmark_descoberta.py [--backends selenium,cdp] [--repeticoes 3]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from log_config import setup_logging
+from scraper_completo_integrado import IntegratedScraper, dados_dir
+
+
+def medir_backend(backend: str, repeticoes: int, headless: bool = True):
+    """Executa a descoberta várias vezes e retorna tempos e quantidade de URLs"""
+    tempos = []
+    total_urls = []
+
+    for i in range(repeticoes):
+        scraper = IntegratedScraper(headless=headless, discovery_backend=backend)
+        inicio = time.perf_counter()
+        urls = scraper.collect_urls()
+        tempos.append(time.perf_counter() - inicio)
+        total_urls.append(len(urls))
+        print(f"   {backend} #{i + 1}: {tempos[-1]:.1f}s - {len(urls)} URLs")
+
+    return {
+        'backend': backend,
+        'repeticoes': repeticoes,
+        'tempos_s': tempos,
+        'mediana_s': statistics.median(tempos),
+        'urls': total_urls,
+    }
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Benchmark dos backends de descoberta de URLs")
+    parser.add_argument('--backends', default=','.join(IntegratedScraper.DISCOVERY_BACKENDS),
+                        help="Backends separados por vírgula")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    setup_logging('benchmark_descoberta')
+
+    print("⏱️  BENCHMARK - DESCOBERTA DE URLs")
+    print("=" * 60)
+
+    resultados = []
+    for backend in args.backends.split(','):
+        print(f"\n🔧 Backend: {backend}")
+        resultados.append(medir_backend(backend.strip(), args.repeticoes))
+
+    print("\n" + "=" * 60)
+    print(f"{'Backend':<12}{'Mediana (s)':>14}{'URLs':>10}")
+    for r in resultados:
+        print(f"{r['backend']:<12}{r['mediana_s']:>14.1f}{max(r['urls']):>10}")
+
+    # Salvar resultados para comparação entre execuções
+    bench_dir = os.path.join(dados_dir, 'benchmarks')
+    os.makedirs(bench_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    arquivo = os.path.join(bench_dir, f'descoberta_{timestamp}.json')
+    with open(arquivo, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Resultados salvos em: {arquivo}")
+
+
+if __name__ == "__main__":
+    main()
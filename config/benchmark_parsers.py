@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark dos extratores de tabela nutricional sobre um corpus de páginas
+Compara, para cada extrator e cada backend do BeautifulSoup (html.parser, lxml,
+html5lib quando instalados):
+- tempo por página (mediana, média e p95 das repetições)
+- pico de alocação por página (tracemalloc)
+- acurácia por campo contra o gabarito do corpus (total e por layout)
+
+Corpus: config/corpus_paginas/<slug>.html + esperado.json (gabarito por slug)
+- páginas 'loja_local': geradas pelos layouts da loja simulada (--gerar-corpus)
+- páginas 'manual'/'gravado': modelos de páginas reais e páginas gravadas (--gravar URL)
+O mesmo diretório serve de fixtures para a loja local (loja_local.py --fixtures)
+
+Uso:
+    python config/benchmark_parsers.py [--repeticoes 20] [--extratores integrado,completo]
+    python config/benchmark_parsers.py --gerar-corpus
+    python config/benchmark_parsers.py --gravar https://www.integralmedica.com.br/<produto>/p
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bs4 import BeautifulSoup
+
+from instrumentacao import percentile
+from modelos import NUTRIENT_ATTRS, ProductNutrition, parse_float
+
+dados_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'dados')
+corpus_dir = os.path.join(os.path.dirname(__file__), 'corpus_paginas')
+EXPECTED_FILE = 'esperado.json'
+
+# Backends do BeautifulSoup (os que não estiverem instalados são ignorados)
+PARSER_BACKENDS = ('html.parser', 'lxml', 'html5lib')
+
+# Tolerância da comparação com o gabarito (absoluta ou relativa, a maior)
+ABS_TOLERANCE = 0.05
+REL_TOLERANCE = 0.01
+
+
+def available_backends() -> List[str]:
+    backends = []
+    for backend in PARSER_BACKENDS:
+        try:
+            BeautifulSoup('<p></p>', backend)
+            backends.append(backend)
+        except Exception:
+            continue
+    return backends
+
+
+# --------------------------------------------------------------------------- corpus
+
+def load_expected(directory: str = corpus_dir) -> Dict[str, Dict]:
+    path = os.path.join(directory, EXPECTED_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_expected(expected: Dict[str, Dict], directory: str = corpus_dir):
+    with open(os.path.join(directory, EXPECTED_FILE), 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(expected.items())), f, ensure_ascii=False, indent=2)
+        f.write('\n')
+
+
+def load_corpus(directory: str = corpus_dir) -> List[Tuple[str, str, Dict]]:
+    """[(slug, html, gabarito)] das páginas que têm gabarito"""
+    pages = []
+    for slug, entry in load_expected(directory).items():
+        path = os.path.join(directory, f"{slug}.html")
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                pages.append((slug, f.read(), entry))
+    return pages
+
+
+def generate_corpus(per_layout: int = 4, seed: int = 7, directory: str = corpus_dir) -> int:
+    """(Re)gera as páginas 'loja_local' do corpus, mantendo as manuais e gravadas"""
+    from loja_local import LAYOUTS, MockCatalog, product_html
+
+    os.makedirs(directory, exist_ok=True)
+    expected = load_expected(directory)
+    for slug in [slug for slug, entry in expected.items() if entry.get('origem') == 'loja_local']:
+        path = os.path.join(directory, f"{slug}.html")
+        if os.path.exists(path):
+            os.remove(path)
+        del expected[slug]
+
+    catalog = MockCatalog(per_layout * len(LAYOUTS), seed=seed)
+    for product in catalog.products:
+        with open(os.path.join(directory, f"{product['slug']}.html"), 'w', encoding='utf-8') as f:
+            f.write(product_html(product))
+        expected[product['slug']] = {'origem': 'loja_local', 'layout': product['layout'],
+                                     'nome': product['nome'], 'nutricao': product['nutricao']}
+    save_expected(expected, directory)
+    return len(catalog.products)
+
+
+def record_page(url: str, directory: str = corpus_dir) -> str:
+    """
+    Grava uma página real no corpus; o gabarito inicial vem do extrator integrado
+    e fica marcado como não conferido até ser revisado à mão
+    """
+    from scraper_completo_integrado import IntegratedScraper
+
+    scraper = IntegratedScraper(discovery_backend='http', export_xlsx=False)
+    content = scraper.fetch_page(url)
+    if content is None:
+        raise RuntimeError(f"Não foi possível baixar {url}")
+
+    slug = url.rstrip('/').split('/')[-2] if url.rstrip('/').endswith('/p') else url.rstrip('/').split('/')[-1]
+    html = content.decode('utf-8', errors='replace')
+    with open(os.path.join(directory, f"{slug}.html"), 'w', encoding='utf-8') as f:
+        f.write(html)
+
+    soup = BeautifulSoup(html, 'html.parser')
+    raw = scraper.extract_nutritional_data(soup)
+    expected = load_expected(directory)
+    expected[slug] = {'origem': 'gravado', 'layout': 'gravado', 'url': url, 'conferido': False,
+                      'nome': scraper.extract_product_name(soup),
+                      'nutricao': integrated_values(raw) if raw else None}
+    save_expected(expected, directory)
+    return slug
+
+
+# --------------------------------------------------------------------------- extratores
+
+def integrated_values(raw: Dict) -> Dict[str, Optional[float]]:
+    """{campo: (valor, unidade)} -> {campo: valor na unidade da coluna}"""
+    from unidades import normalize_records
+
+    record = ProductNutrition.from_fields('', '', raw)
+    normalize_records([record])
+    return record.nutrients()
+
+
+def complete_values(raw: Dict) -> Dict[str, Optional[float]]:
+    """Dicionário de textos do CompleteNutritionalScraper (None = não encontrado) -> {campo: valor}"""
+    return {field: parse_float(raw.get(field)) for field in NUTRIENT_ATTRS}
+
+
+def legacy_values(raw: Dict) -> Dict[str, Optional[float]]:
+    """
+    Dicionário de textos dos demais scrapers antigos -> {campo: valor}
+    O '0' padrão não distingue "zero" de "não encontrado" e conta como não encontrado
+    """
+    return {field: parse_float(raw[field]) if raw.get(field) not in (None, '', '0') else None
+            for field in NUTRIENT_ATTRS}
+
+
+def build_extractors() -> Dict[str, Tuple[str, Callable, Callable]]:
+    """
+    nome -> (método, extrair(soup, url) -> saída bruta, converter(saída) -> {campo: valor})
+    A conversão fica fora da medição de tempo
+    """
+    from scraper_completo import CompleteNutritionalScraper
+    from scraper_completo_integrado import IntegratedScraper
+    from scraper_nutricional import NutritionalScraper
+    from tabela_nutricional import choose_position
+    from teste_nutricional import NutritionalDataExtractor
+    from unidades import normalize_records
+
+    integrated = IntegratedScraper(discovery_backend='http', export_xlsx=False)
+    complete = CompleteNutritionalScraper()
+    nutritional = NutritionalScraper()
+    extractor = NutritionalDataExtractor()
+
+    def revalidated(soup, url):
+        # Mesmo caminho da coleta com requeue_invalid: valida e tenta as outras colunas candidatas
+        table_rows = integrated.extract_nutrition_table(soup, url)
+        records = [ProductNutrition.from_fields(url, '', integrated.nutrition_from_table(table_rows))]
+        normalize_records(records)
+        integrated.requeue_invalid_records(records, [table_rows], [choose_position(table_rows)])
+        return records[0]
+
+    def section_table(soup, url):
+        section = extractor.find_nutrition_section(soup)
+        table = section.find('table') if section else None
+        return extractor.parse_html_table(table) if table else {}
+
+    def section_text(soup, url):
+        section = extractor.find_nutrition_section(soup)
+        return extractor.parse_nutrition_text(section) if section else {}
+
+    return {
+        'integrado': ('IntegratedScraper.extract_nutritional_data',
+                      lambda soup, url: integrated.extract_nutritional_data(soup), integrated_values),
+        'integrado_revalidado': ('IntegratedScraper.requeue_invalid_records', revalidated,
+                                 lambda record: record.nutrients()),
+        'completo': ('CompleteNutritionalScraper._parse_nutrition_table',
+                     complete.extract_nutritional_data, complete_values),
+        'nutricional': ('NutritionalScraper._parse_nutrition_table',
+                        nutritional.extract_nutritional_data, legacy_values),
+        'teste_tabela': ('NutritionalDataExtractor.parse_html_table', section_table, legacy_values),
+        'teste_texto': ('NutritionalDataExtractor.parse_nutrition_text', section_text, legacy_values),
+    }
+
+
+# --------------------------------------------------------------------------- medição
+
+def field_matches(got: Optional[float], expected: Optional[float]) -> bool:
+    if expected is None or got is None:
+        return expected is None and got is None
+    return abs(got - expected) <= max(ABS_TOLERANCE, REL_TOLERANCE * abs(expected))
+
+
+def score(values: Dict[str, Optional[float]], expected: Optional[Dict]) -> Tuple[int, List[str]]:
+    """(campos corretos, campos errados) contra o gabarito (None = página sem tabela)"""
+    expected = expected or {}
+    wrong = [field for field in NUTRIENT_ATTRS if not field_matches(values.get(field), expected.get(field))]
+    return len(NUTRIENT_ATTRS) - len(wrong), wrong
+
+
+def measure(extract: Callable, convert: Callable, backend: str,
+            pages: List[Tuple[str, str, Dict]], repetitions: int) -> Dict:
+    """Tempo (parse do HTML + extração), pico de alocação e acurácia de um extrator"""
+    timings = []
+    peaks = []
+    correct = 0
+    by_layout: Dict[str, List[int]] = {}
+    errors: Dict[str, List[str]] = {}
+
+    for slug, html, entry in pages:
+        url = entry.get('url', f"/{slug}/p")
+
+        page_times = []
+        for _ in range(repetitions):
+            start = time.perf_counter()
+            extract(BeautifulSoup(html, backend), url)
+            page_times.append(time.perf_counter() - start)
+        timings.append(statistics.median(page_times))
+
+        tracemalloc.start()
+        raw = extract(BeautifulSoup(html, backend), url)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+        hits, wrong = score(convert(raw), entry.get('nutricao'))
+        correct += hits
+        layout_score = by_layout.setdefault(entry.get('layout', '?'), [0, 0])
+        layout_score[0] += hits
+        layout_score[1] += len(NUTRIENT_ATTRS)
+        if wrong:
+            errors[slug] = wrong
+
+    total = len(pages) * len(NUTRIENT_ATTRS)
+    return {
+        'mediana_us': round(statistics.median(timings) * 1e6, 1),
+        'media_us': round(statistics.mean(timings) * 1e6, 1),
+        'p95_us': round(percentile(timings, 95) * 1e6, 1),
+        'pico_alocacao_kb': round(statistics.mean(peaks) / 1024, 1),
+        'acuracia': round(correct / total, 4) if total else None,
+        'acuracia_por_layout': {layout: round(hits / count, 4) for layout, (hits, count) in sorted(by_layout.items())},
+        'campos_errados': errors,
+    }
+
+
+def measure_parse_only(backend: str, pages: List[Tuple[str, str, Dict]], repetitions: int) -> float:
+    """Mediana (µs) só do parse do HTML, para separar o custo do backend do custo do extrator"""
+    timings = []
+    for _, html, _ in pages:
+        page_times = []
+        for _ in range(repetitions):
+            start = time.perf_counter()
+            BeautifulSoup(html, backend)
+            page_times.append(time.perf_counter() - start)
+        timings.append(statistics.median(page_times))
+    return round(statistics.median(timings) * 1e6, 1)
+
+
+def run_benchmark(repetitions: int = 20, names: Optional[List[str]] = None,
+                  backends: Optional[List[str]] = None, directory: str = corpus_dir) -> Dict:
+    """Executa o benchmark e retorna os resultados (usado também pela checagem de regressão)"""
+    pages = load_corpus(directory)
+    if not pages:
+        raise RuntimeError(f"Corpus vazio em {directory} (use --gerar-corpus)")
+
+    # Os extratores antigos imprimem e registram cada campo: silenciados durante a medição
+    extractors = build_extractors()
+    logging.getLogger().setLevel(logging.ERROR)
+    names = names or list(extractors)
+    backends = backends or available_backends()
+
+    results = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        parse_only = {backend: measure_parse_only(backend, pages, repetitions) for backend in backends}
+        for name in names:
+            method, extract, convert = extractors[name]
+            for backend in backends:
+                result = {'extrator': name, 'metodo': method, 'backend': backend}
+                result.update(measure(extract, convert, backend, pages, repetitions))
+                results.append(result)
+
+    return {'paginas': len(pages), 'repeticoes': repetitions, 'parse_html_us': parse_only, 'resultados': results}
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Micro-benchmark dos extratores de tabela nutricional")
+    parser.add_argument('--repeticoes', type=int, default=20, help="Repetições por página")
+    parser.add_argument('--extratores', help="Extratores separados por vírgula (padrão: todos)")
+    parser.add_argument('--backends', help=f"Backends separados por vírgula ({', '.join(PARSER_BACKENDS)})")
+    parser.add_argument('--corpus', default=corpus_dir, help="Diretório do corpus")
+    parser.add_argument('--gerar-corpus', action='store_true', help="Regera as páginas da loja local no corpus")
+    parser.add_argument('--gravar', nargs='+', metavar='URL', help="Grava páginas reais no corpus")
+    parser.add_argument('--saida', help="Arquivo JSON (padrão: dados/benchmarks/parsers_<data>.json)")
+    args = parser.parse_args()
+
+    if args.gerar_corpus:
+        print(f"📄 {generate_corpus(directory=args.corpus)} páginas geradas em {args.corpus}")
+        return
+    if args.gravar:
+        for url in args.gravar:
+            slug = record_page(url, args.corpus)
+            print(f"💾 {slug}: gravado (confira o gabarito em {EXPECTED_FILE})")
+        return
+
+    print("⏱️  BENCHMARK - EXTRATORES DA TABELA NUTRICIONAL")
+    print("=" * 60)
+
+    results = run_benchmark(
+        args.repeticoes,
+        args.extratores.split(',') if args.extratores else None,
+        args.backends.split(',') if args.backends else None,
+        args.corpus,
+    )
+
+    print(f"📄 {results['paginas']} páginas, {results['repeticoes']} repetições")
+    print("🧩 Parse do HTML (mediana): " +
+          ', '.join(f"{backend} {us:.0f} µs" for backend, us in results['parse_html_us'].items()))
+    print(f"\n{'Extrator':<22}{'Backend':<13}{'Mediana µs':>12}{'p95 µs':>10}{'Pico KB':>10}{'Acurácia':>10}")
+    for r in sorted(results['resultados'], key=lambda r: (-r['acuracia'], r['mediana_us'])):
+        print(f"{r['extrator']:<22}{r['backend']:<13}{r['mediana_us']:>12.0f}{r['p95_us']:>10.0f}"
+              f"{r['pico_alocacao_kb']:>10.0f}{r['acuracia']:>10.1%}")
+
+    print("\n📐 Acurácia por layout (html.parser):")
+    for r in results['resultados']:
+        if r['backend'] == 'html.parser':
+            print(f"   {r['extrator']:<22}" +
+                  ' '.join(f"{layout}={accuracy:.0%}" for layout, accuracy in r['acuracia_por_layout'].items()))
+
+    # Salvar resultados para comparação entre execuções
+    if args.saida:
+        arquivo = args.saida
+    else:
+        bench_dir = os.path.join(dados_dir, 'benchmarks')
+        os.makedirs(bench_dir, exist_ok=True)
+        arquivo = os.path.join(bench_dir, f"parsers_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    results['gerado_em'] = datetime.now().isoformat(timespec='seconds')
+    with open(arquivo, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Resultados salvos em: {arquivo}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Benchmark de vazão ponta a ponta do IntegratedScraper contra a loja local
+Para cada combinação de tamanho do catálogo, concorrência, intervalo entre
+requisições e perfil de falhas do servidor, executa run() completo (descoberta,
+download, parse e gravação) e mede:
+- produtos/s e latência por produto (p50/p95/p99)
+- tempo de relógio e de CPU por etapa (descoberta, download, parse, gravacao)
+- pico de memória (RSS) e erros
+Cada caso roda em um processo separado (o pico de RSS não se mistura entre casos e
+a loja fica no processo principal), gravando em um diretório de dados temporário
+
+Uso:
+    python config/benchmark_throughput.py [--produtos 100,1000,10000] [--workers 1,4,16]
+        [--intervalos 0] [--perfis nenhum,wan,instavel] [--repeticoes 1] [--saida arquivo.json]
+"""
+
+import argparse
+import importlib
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from loja_local import FAULT_PROFILES, FaultInjector, MockCatalog, start_store
+from memoria import peak_rss_mb
+
+dados_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'dados')
+
+# Páginas da listagem simulada: o tamanho da página cresce com o catálogo, então a
+# descoberta HTTP (limite de 100 páginas, HTTPListingCollector.max_pages) nunca é cortada
+MAX_LISTING_PAGES = 50
+
+# Módulos com dados_dir que o scraper só importa durante a execução
+LAZY_OUTPUT_MODULES = ('historico', 'descoberta_categorias', 'diff_execucoes', 'exportar_excel', 'validacao')
+
+
+def isolate_output(directory: str):
+    """
+    Aponta o dados_dir dos módulos do projeto para directory (os importados sob demanda
+    pelo scraper são carregados antes, senão gravariam no dados/ real)
+    """
+    for name in LAZY_OUTPUT_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass  # ex.: historico sem pyarrow, que o scraper também não usa
+    config_dir = os.path.dirname(os.path.abspath(__file__))
+    for module in list(sys.modules.values()):
+        module_file = getattr(module, '__file__', None) or ''
+        if hasattr(module, 'dados_dir') and os.path.dirname(os.path.abspath(module_file)) == config_dir:
+            module.dados_dir = directory
+    os.makedirs(os.path.join(directory, 'csv'), exist_ok=True)
+
+
+def run_case(base_url: str, workers: int, interval: float) -> Dict:
+    """Executa um caso no processo atual (chamado pelo subprocesso de cada caso)"""
+    import metricas
+    from instrumentacao import STAGE_PRODUCT, instrumentation, percentile
+    from modelos import FONTE_ERRO, with_nutrition
+    from scraper_completo_integrado import IntegratedScraper
+
+    # O log por produto mediria o terminal, não o scraper
+    logging.getLogger().setLevel(logging.WARNING)
+
+    output_dir = tempfile.mkdtemp(prefix='benchmark_throughput_')
+    try:
+        isolate_output(output_dir)
+        scraper = IntegratedScraper(discovery_backend='http', base_url=base_url, inventory_ttl=0,
+                                    export_xlsx=False, max_workers=workers, request_delay=interval)
+        instrumentation.reset()
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        dataset = scraper.run()
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    collected = 0 if dataset is None else len(dataset)
+    summary = instrumentation.summary()
+    latencies = instrumentation.samples.get(STAGE_PRODUCT, [])
+    return {
+        'tempo_total_s': round(wall, 3),
+        'produtos_por_s': round(collected / wall, 2) if wall else None,
+        'latencia_produto_ms': {f'p{q}': round(percentile(latencies, q) * 1000, 2) for q in (50, 95, 99)},
+        'etapas': {stage: {'contagem': values['contagem'],
+                           'relogio_s': round(values['relogio_s'], 3),
+                           'cpu_s': round(values['cpu_s'], 3)}
+                   for stage, values in summary.items()},
+        'cpu_total_s': round(cpu, 3),
+        'rss_pico_mb': peak_rss_mb(),
+        'coletados': collected,
+        'erros': int(metricas.PRODUCTS.value(fonte=FONTE_ERRO)),
+        'com_nutricao': int(with_nutrition(dataset).sum()) if collected else 0,
+    }
+
+
+def run_case_subprocess(base_url: str, workers: int, interval: float) -> Dict:
+    """Executa um caso em um processo novo e lê o JSON da última linha da saída"""
+    command = [sys.executable, os.path.abspath(__file__), '--caso', base_url,
+               '--workers', str(workers), '--intervalos', str(interval)]
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Caso falhou (código {completed.returncode}):\n{completed.stderr[-2000:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def git_commit() -> Optional[str]:
+    """Commit atual (para identificar os resultados), se for um repositório git"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def parse_list(text: str, cast) -> List:
+    return [cast(item.strip()) for item in text.split(',') if item.strip()]
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Benchmark de vazão ponta a ponta contra a loja local")
+    parser.add_argument('--produtos', default='100,1000,10000', help="Tamanhos do catálogo")
+    parser.add_argument('--workers', default='1,4,16', help="Requisições simultâneas")
+    parser.add_argument('--intervalos', default='0', help="Intervalo mínimo entre requisições (s)")
+    parser.add_argument('--perfis', default='nenhum', help=f"Perfis da loja ({', '.join(FAULT_PROFILES)})")
+    parser.add_argument('--repeticoes', type=int, default=1)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--saida', help="Arquivo JSON (padrão: dados/benchmarks/throughput_<data>.json)")
+    parser.add_argument('--caso', metavar='BASE_URL', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Subprocesso: executa um único caso e imprime o resultado em JSON
+    if args.caso:
+        print(json.dumps(run_case(args.caso, int(args.workers), float(args.intervalos))))
+        return
+
+    sizes = parse_list(args.produtos, int)
+    workers_list = parse_list(args.workers, int)
+    intervals = parse_list(args.intervalos, float)
+    profiles = parse_list(args.perfis, str)
+    for profile in profiles:
+        if profile not in FAULT_PROFILES:
+            parser.error(f"Perfil inválido: {profile} (opções: {', '.join(FAULT_PROFILES)})")
+
+    print("⏱️  BENCHMARK - VAZÃO PONTA A PONTA (loja local)")
+    print("=" * 60)
+
+    cases = []
+    for size in sizes:
+        catalog = MockCatalog(size, seed=args.semente, page_size=max(12, -(-size // MAX_LISTING_PAGES)))
+        for profile in profiles:
+            server, base_url = start_store(catalog, faults=FaultInjector.from_profile(profile, args.semente))
+            try:
+                for workers in workers_list:
+                    for interval in intervals:
+                        for repetition in range(1, args.repeticoes + 1):
+                            print(f"\n🔧 {size} produtos | {workers} workers | intervalo {interval}s | "
+                                  f"perfil {profile} | #{repetition}")
+                            result = {'produtos': size, 'workers': workers, 'intervalo_s': interval,
+                                      'perfil': profile, 'repeticao': repetition}
+                            result.update(run_case_subprocess(base_url, workers, interval))
+                            cases.append(result)
+                            latency = result['latencia_produto_ms']
+                            print(f"   {result['produtos_por_s']} produtos/s | p50 {latency['p50']} ms | "
+                                  f"p95 {latency['p95']} ms | p99 {latency['p99']} ms | "
+                                  f"RSS {result['rss_pico_mb']} MB | erros {result['erros']}")
+            finally:
+                server.shutdown()
+                server.server_close()
+
+    print("\n" + "=" * 60)
+    print(f"{'Produtos':>9}{'Workers':>9}{'Interv.':>9}{'Perfil':>10}{'prod/s':>9}{'p95 ms':>9}"
+          f"{'CPU parse':>11}{'CPU grav.':>11}{'RSS MB':>9}")
+    for r in cases:
+        stages = r['etapas']
+        print(f"{r['produtos']:>9}{r['workers']:>9}{r['intervalo_s']:>9}{r['perfil']:>10}"
+              f"{str(r['produtos_por_s']):>9}{r['latencia_produto_ms']['p95']:>9}"
+              f"{stages.get('parse', {}).get('cpu_s', 0):>11}{stages.get('gravacao', {}).get('cpu_s', 0):>11}"
+              f"{str(r['rss_pico_mb']):>9}")
+
+    # Salvar resultados para comparação entre execuções
+    results = {
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'casos': cases,
+    }
+    if args.saida:
+        arquivo = args.saida
+    else:
+        bench_dir = os.path.join(dados_dir, 'benchmarks')
+        os.makedirs(bench_dir, exist_ok=True)
+        arquivo = os.path.join(bench_dir, f"throughput_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(arquivo, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Resultados salvos em: {arquivo}")
+
+
+if __name__ == "__main__":
+    main()
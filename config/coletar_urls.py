@@ -5,50 +5,34 @@ Focado apenas na coleta de URLs com feedback visual
 """
 
 import time
+import importlib.util
 import logging
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, ElementClickInterceptedException
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 import re
 import os
 from datetime import datetime
 import platform
+from typing import Optional
 
-# Importar webdriver-manager
-try:
-    from webdriver_manager.chrome import ChromeDriverManager
-    WEBDRIVER_MANAGER_AVAILABLE = True
-except ImportError:
-    WEBDRIVER_MANAGER_AVAILABLE = False
-    logging.warning("⚠️ webdriver-manager não encontrado. Usando ChromeDriver padrão.")
+from inventario_urls import URLInventory
+from log_config import setup_logging
 
-# Configuração do logging
+# Selenium e webdriver-manager só são importados quando o navegador é usado (setup_driver)
+WEBDRIVER_MANAGER_AVAILABLE = importlib.util.find_spec('webdriver_manager') is not None
+
+# Pasta de dados (o logging é configurado no main: logs/coleta_urls.log)
 dados_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'dados')
-logs_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs')
 os.makedirs(dados_dir, exist_ok=True)
-os.makedirs(logs_dir, exist_ok=True)
-log_file = os.path.join(logs_dir, 'coleta_urls.log')
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler()
-    ]
-)
 
 class URLCollector:
     """
     Coletor de URLs focado apenas na coleta de URLs dos produtos
     """
     
-    def __init__(self, headless: bool = False):
-        self.base_url = "https://www.integralmedica.com.br"
+    def __init__(self, headless: bool = False, base_url: Optional[str] = None):
+        # URL base da loja (SCRAPER_BASE_URL ou base_url apontam para outra loja, ex.: loja_local.py)
+        self.base_url = (base_url or os.environ.get('SCRAPER_BASE_URL') or "https://www.integralmedica.com.br").rstrip('/')
         self.products_url = f"{self.base_url}/todos-os-produtos"
         self.headless = headless
         self.driver = None
@@ -91,6 +75,10 @@ class URLCollector:
     
     def setup_driver(self):
         """Configura o WebDriver Chrome com compatibilidade multiplataforma"""
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
+        
         chrome_options = Options()
         chrome_options.add_argument('--no-sandbox')
         chrome_options.add_argument('--disable-dev-shm-usage')
@@ -112,12 +100,14 @@ class URLCollector:
             
             # Segunda tentativa: WebDriver Manager
             if WEBDRIVER_MANAGER_AVAILABLE:
+                from webdriver_manager.chrome import ChromeDriverManager
                 service = Service(ChromeDriverManager().install())
                 self.driver = webdriver.Chrome(service=service, options=chrome_options)
                 logging.info("✅ WebDriver configurado com WebDriver Manager")
                 return True
             
             # Terceira tentativa: ChromeDriver padrão
+            logging.warning("⚠️ webdriver-manager não encontrado. Usando ChromeDriver padrão.")
             self.driver = webdriver.Chrome(options=chrome_options)
             logging.info("✅ WebDriver configurado com ChromeDriver padrão")
             return True
@@ -156,6 +146,8 @@ class URLCollector:
         """
         Encontra o botão/link "Ver mais produtos +" com múltiplas estratégias
         """
+        from selenium.webdriver.common.by import By
+        
         # Estratégias para encontrar o botão "Mostrar mais" com as classes CSS exatas
         selectors = [
             # Botão com classes específicas do VTEX (informadas pelo usuário)
@@ -224,6 +216,8 @@ class URLCollector:
         """
         Coleta todas as URLs dos produtos clicando no botão "Ver mais produtos"
         """
+        from selenium.common.exceptions import ElementClickInterceptedException
+        
         if not self.driver:
             self.setup_driver()
         
@@ -383,6 +377,9 @@ class URLCollector:
         print(f"💾 URLs salvas em: {filepath}")
         logging.info(f"URLs salvas em: {filepath}")
         
+        # Atualizar inventário para que a coleta completa possa reaproveitar estas URLs
+        URLInventory().save(urls, source='coletar_urls')
+        
         return filepath
     
     def run(self):
@@ -430,6 +427,7 @@ def main():
     """
     Função principal
     """
+    setup_logging('coleta_urls')
     print("=" * 60)
     print("🔍 COLETOR DE URLs - INTEGRAL MÉDICA")
     print("=" * 60)
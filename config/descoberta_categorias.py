@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Descoberta de URLs em paralelo pelas páginas de categoria da loja
+Cada categoria é coletada por um worker com o backend configurado e os
+resultados são unidos em uma lista única, sem duplicatas e em ordem estável.
+A listagem /todos-os-produtos entra junto na união: as categorias são uma lista
+fixa e um produto fora delas não pode se perder
+"""
+
+import csv
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List
+from urllib.parse import urljoin
+
+# Categorias da loja (caminhos relativos ao domínio)
+DEFAULT_CATEGORIES = [
+    'whey-protein',
+    'creatina',
+    'barras-de-proteina',
+    'aminoacidos',
+    'pre-treino',
+    'hipercaloricos',
+    'termogenicos',
+    'vitaminas',
+]
+
+# Listagem completa da loja, coletada junto com as categorias
+ALL_PRODUCTS = 'todos-os-produtos'
+
+dados_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'dados')
+
+
+class CategoryDiscovery:
+    """
+    Executa a descoberta de URLs em várias listagens de categoria em paralelo
+    """
+
+    def __init__(self, base_url: str, scraper_factory: Callable, categories: List[str] = None,
+                 max_workers: int = 4, include_all_products: bool = True):
+        """
+        scraper_factory recebe a URL da listagem e devolve um scraper com collect_urls()
+        e discovery_stats (por exemplo IntegratedScraper.clone_for_listing)
+        """
+        self.base_url = base_url
+        self.scraper_factory = scraper_factory
+        self.categories = list(categories or DEFAULT_CATEGORIES)
+        if include_all_products and ALL_PRODUCTS not in self.categories:
+            # Por último: na cobertura, as URLs novas dela são os produtos fora das categorias
+            self.categories.append(ALL_PRODUCTS)
+        self.max_workers = max_workers
+        self.coverage: List[Dict] = []
+
+    def collect_category(self, category: str) -> Dict:
+        """Coleta as URLs de uma categoria e retorna o resultado com estatísticas"""
+        listing_url = urljoin(self.base_url + '/', category)
+        scraper = self.scraper_factory(listing_url)
+
+        logging.info(f"🗂️ Coletando categoria: {category}")
+        try:
+            urls = scraper.collect_urls()
+        except Exception as e:
+            logging.error(f"❌ Erro na categoria {category}: {e}")
+            urls = []
+
+        return {
+            'categoria': category,
+            'url': listing_url,
+            'urls': urls,
+            'stats': scraper.discovery_stats
+        }
+
+    def collect_urls(self) -> List[str]:
+        """Coleta todas as categorias em paralelo e une as URLs sem duplicatas"""
+        logging.info(f"🔀 Descoberta paralela em {len(self.categories)} categorias "
+                     f"({self.max_workers} workers)")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(self.collect_category, self.categories))
+
+        # União em ordem estável: ordem das categorias, depois ordem de cada listagem
+        merged = []
+        seen = set()
+        self.coverage = []
+
+        for result in results:
+            new_urls = [url for url in result['urls'] if url not in seen]
+            seen.update(new_urls)
+            merged.extend(new_urls)
+
+            self.coverage.append({
+                'categoria': result['categoria'],
+                'url': result['url'],
+                'urls_encontradas': len(result['urls']),
+                'urls_novas': len(new_urls),
+                'paginas': result['stats'].get('paginas', 0),
+                'paginas_com_erro': len(result['stats'].get('paginas_com_erro', [])),
+                'limite_atingido': result['stats'].get('limite_atingido', False)
+            })
+
+        self.log_coverage_report()
+        logging.info(f"🔗 Total de URLs únicas coletadas: {len(merged)}")
+        return merged
+
+    def log_coverage_report(self):
+        """Mostra no log a cobertura por categoria"""
+        logging.info("📊 Cobertura por categoria:")
+        for row in self.coverage:
+            aviso = " ⚠️ LIMITE DE PAGINAÇÃO ATINGIDO" if row['limite_atingido'] else ""
+            logging.info(f"   {row['categoria']}: {row['urls_encontradas']} URLs "
+                         f"({row['urls_novas']} novas, {row['paginas']} páginas){aviso}")
+
+        # Categoria inexistente (404), com erro ou renomeada na loja não pode passar como vazia
+        for row in self.coverage:
+            if row['paginas_com_erro']:
+                logging.error(f"❌ Categoria {row['categoria']}: {row['paginas_com_erro']} página(s) com erro "
+                              f"({row['url']}) - cobertura incompleta")
+            elif not row['urls_encontradas']:
+                logging.warning(f"⚠️ Categoria {row['categoria']} sem produtos ({row['url']}): "
+                                f"a página existe na loja?")
+        if self.coverage and all(row['categoria'] == ALL_PRODUCTS or not row['urls_encontradas']
+                                 for row in self.coverage):
+            logging.error("❌ Nenhuma categoria retornou produtos - verifique a lista de categorias")
+        extra = next((row['urls_novas'] for row in self.coverage if row['categoria'] == ALL_PRODUCTS), 0)
+        if extra and len(self.coverage) > 1:
+            logging.warning(f"⚠️ {extra} produtos só aparecem em /{ALL_PRODUCTS} (fora das categorias)")
+
+    def save_coverage_report(self, filename: str = None) -> str:
+        """Salva o relatório de cobertura por categoria em CSV na pasta dados/"""
+        if not filename:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"cobertura_categorias_{timestamp}.csv"
+
+        os.makedirs(dados_dir, exist_ok=True)
+        filepath = os.path.join(dados_dir, filename)
+
+        fieldnames = ['categoria', 'url', 'urls_encontradas', 'urls_novas', 'paginas', 'paginas_com_erro',
+                      'limite_atingido']
+        with open(filepath, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(self.coverage)
+
+        logging.info(f"💾 Relatório de cobertura salvo em: {filepath}")
+        return filepath
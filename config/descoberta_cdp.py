@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Backend de descoberta de URLs via Chrome DevTools Protocol (CDP)
+Controla o Chromium headless diretamente por websocket, sem chromedriver/Selenium
+"""
+
+import json
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+# Importar websocket-client (opcional: só é necessário para este backend)
+try:
+    import websocket
+    WEBSOCKET_AVAILABLE = True
+except ImportError:
+    WEBSOCKET_AVAILABLE = False
+
+# Script que procura e clica no botão "Mostrar mais" (mesmas estratégias do Selenium)
+CLICK_LOAD_MORE_JS = """
+(() => {
+    const textos = ['Mostrar mais', 'Ver mais produtos', 'Carregar mais'];
+    const visivel = el => el.offsetParent !== null && !el.disabled;
+    const candidatos = [
+        ...document.querySelectorAll('button.vtex-button.bg-action-primary'),
+        ...document.querySelectorAll('button.vtex-button'),
+        ...Array.from(document.querySelectorAll('button, a, div, span'))
+            .filter(el => el.children.length === 0 && textos.some(t => el.textContent.includes(t))),
+        ...document.querySelectorAll('.load-more, .ver-mais, .show-more'),
+    ];
+    for (const el of candidatos) {
+        if (visivel(el)) {
+            el.scrollIntoView({block: 'center'});
+            el.click();
+            return true;
+        }
+    }
+    return false;
+})()
+"""
+
+COLLECT_HREFS_JS = "Array.from(document.querySelectorAll('a[href]'), a => a.getAttribute('href'))"
+
+
+class CDPURLCollector:
+    """
+    Coletor de URLs que fala CDP direto com o navegador (sem chromedriver)
+    O executável vem de quem cria o coletor (IntegratedScraper.detect_browser_path)
+    """
+
+    def __init__(self, products_url: str, url_filter: Callable[[List[str]], List[str]],
+                 browser_path: Optional[str], headless: bool = True, max_clicks: int = 10):
+        self.products_url = products_url
+        self.url_filter = url_filter
+        self.headless = headless
+        self.max_clicks = max_clicks
+        self.browser_path = browser_path
+        self.clicks_realizados = 0
+        self.limit_reached = False
+
+        self.process = None
+        self.ws = None
+        self.user_data_dir = None
+        self._message_id = 0
+        self._inflight = set()
+
+    def start(self) -> bool:
+        """Inicia o navegador com a porta de depuração e conecta o websocket"""
+        if not WEBSOCKET_AVAILABLE:
+            logging.error("❌ websocket-client não instalado. Execute: pip install websocket-client")
+            return False
+
+        if not self.browser_path:
+            logging.error("❌ Chrome/Chromium não encontrado para o backend CDP")
+            return False
+
+        self.user_data_dir = tempfile.mkdtemp(prefix='cdp_integral_')
+        args = [
+            self.browser_path,
+            '--remote-debugging-port=0',
+            f'--user-data-dir={self.user_data_dir}',
+            '--no-sandbox',
+            '--disable-dev-shm-usage',
+            '--disable-gpu',
+            '--no-first-run',
+            '--window-size=1920,1080',
+            '--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+        ]
+        if self.headless:
+            args.append('--headless=new')
+        args.append('about:blank')
+
+        try:
+            self.process = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+            # Com porta 0 o Chromium escolhe uma porta livre e grava em DevToolsActivePort
+            port_file = os.path.join(self.user_data_dir, 'DevToolsActivePort')
+            deadline = time.time() + 15
+            while not os.path.exists(port_file):
+                if time.time() > deadline or self.process.poll() is not None:
+                    logging.error("❌ Navegador não abriu a porta de depuração")
+                    return False
+                time.sleep(0.05)
+            with open(port_file, encoding='utf-8') as f:
+                port = f.readline().strip()
+
+            # Conectar na aba aberta (target do tipo "page")
+            targets = requests.get(f"http://127.0.0.1:{port}/json/list", timeout=5).json()
+            page = next(t for t in targets if t.get('type') == 'page')
+            self.ws = websocket.create_connection(page['webSocketDebuggerUrl'], timeout=30,
+                                                  suppress_origin=True)
+
+            self.send('Page.enable')
+            self.send('Network.enable')
+            logging.info(f"✅ Backend CDP conectado na porta {port}")
+            return True
+
+        except Exception as e:
+            logging.error(f"❌ Erro ao iniciar backend CDP: {e}")
+            return False
+
+    def close(self):
+        """Encerra websocket, navegador e perfil temporário"""
+        if self.ws:
+            try:
+                self.ws.close()
+            except Exception:
+                pass
+            self.ws = None
+        if self.process:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+            self.process = None
+        if self.user_data_dir:
+            shutil.rmtree(self.user_data_dir, ignore_errors=True)
+            self.user_data_dir = None
+
+    def _handle_event(self, message: Dict):
+        """Acompanha requisições de rede em andamento (para detectar ociosidade)"""
+        method = message.get('method')
+        params = message.get('params', {})
+        if method == 'Network.requestWillBeSent':
+            self._inflight.add(params.get('requestId'))
+        elif method in ('Network.loadingFinished', 'Network.loadingFailed'):
+            self._inflight.discard(params.get('requestId'))
+
+    def _receive(self) -> Dict:
+        message = json.loads(self.ws.recv())
+        if 'method' in message:
+            self._handle_event(message)
+        return message
+
+    def send(self, method: str, params: Optional[Dict] = None) -> Dict:
+        """Envia um comando CDP e aguarda a resposta correspondente"""
+        self._message_id += 1
+        message_id = self._message_id
+        self.ws.send(json.dumps({'id': message_id, 'method': method, 'params': params or {}}))
+
+        while True:
+            message = self._receive()
+            if message.get('id') == message_id:
+                if 'error' in message:
+                    raise RuntimeError(f"{method}: {message['error'].get('message')}")
+                return message.get('result', {})
+
+    def evaluate(self, expression: str):
+        """Avalia uma expressão JavaScript na página e retorna o valor"""
+        result = self.send('Runtime.evaluate', {
+            'expression': expression,
+            'returnByValue': True,
+            'awaitPromise': True
+        })
+        return result.get('result', {}).get('value')
+
+    def wait_for_event(self, method: str, timeout: float = 30):
+        """Aguarda um evento CDP específico"""
+        deadline = time.time() + timeout
+        self.ws.settimeout(0.5)
+        try:
+            while time.time() < deadline:
+                try:
+                    if self._receive().get('method') == method:
+                        return True
+                except websocket.WebSocketTimeoutException:
+                    continue
+            return False
+        finally:
+            self.ws.settimeout(30)
+
+    def wait_network_idle(self, idle_time: float = 0.5, timeout: float = 10):
+        """Aguarda até não haver requisições em andamento por idle_time segundos"""
+        deadline = time.time() + timeout
+        idle_since = time.time()
+        self.ws.settimeout(0.1)
+        try:
+            while time.time() < deadline:
+                try:
+                    self._receive()
+                except websocket.WebSocketTimeoutException:
+                    pass
+                if self._inflight:
+                    idle_since = time.time()
+                elif time.time() - idle_since >= idle_time:
+                    return True
+            return False
+        finally:
+            self.ws.settimeout(30)
+
+    def current_urls(self) -> List[str]:
+        """Extrai os links da página atual e aplica o filtro de URLs de produto"""
+        hrefs = self.evaluate(COLLECT_HREFS_JS) or []
+        return self.url_filter(hrefs)
+
+    def collect_urls(self) -> List[str]:
+        """Coleta todas as URLs dos produtos clicando em 'Mostrar mais' via CDP"""
+        logging.info("🔍 Iniciando coleta de URLs (backend CDP)...")
+        self.clicks_realizados = 0
+        self.limit_reached = False
+
+        if not self.start():
+            self.close()
+            return []
+
+        try:
+            logging.info("📱 Acessando página principal...")
+            self.send('Page.navigate', {'url': self.products_url})
+            self.wait_for_event('Page.loadEventFired')
+            self.wait_network_idle()
+
+            urls = self.current_urls()
+            logging.info(f"📦 URLs iniciais coletadas: {len(urls)}")
+
+            for tentativa in range(self.max_clicks):
+                self.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+                self.wait_network_idle()
+
+                if not self.evaluate(CLICK_LOAD_MORE_JS):
+                    logging.info("❌ Botão 'Mostrar mais' não encontrado")
+                    break
+
+                self.clicks_realizados += 1
+                logging.info(f"✅ Clique {tentativa + 1} realizado com sucesso")
+
+                # Em vez de dormir 5s, aguardar a rede ficar ociosa
+                self.wait_network_idle()
+
+                current_urls = self.current_urls()
+                logging.info(f"📦 Total de URLs após clique: {len(current_urls)}")
+
+                if len(current_urls) == len(urls):
+                    logging.info("⚠️ Nenhuma nova URL foi carregada - pode ter chegado ao fim")
+                    break
+
+                urls = current_urls
+            else:
+                # Todos os cliques foram usados e ainda havia produtos novos
+                self.limit_reached = self.max_clicks > 0
+                logging.warning(f"⚠️ Limite de {self.max_clicks} cliques atingido - a listagem pode estar incompleta")
+
+            logging.info(f"📊 Cliques realizados: {self.clicks_realizados}")
+            logging.info(f"🔗 Total de URLs coletadas: {len(urls)}")
+            return urls
+
+        except Exception as e:
+            logging.error(f"❌ Erro na coleta de URLs via CDP: {e}")
+            return []
+        finally:
+            self.close()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Backend de descoberta de URLs apenas com HTTP (sem navegador)
+Busca as páginas da listagem (?page=N) ou a API de busca do VTEX em paralelo
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+from urllib.parse import urljoin
+
+import requests
+from bs4 import BeautifulSoup
+
+# Limite de itens por requisição da API de busca do VTEX
+VTEX_SEARCH_PAGE_SIZE = 50
+
+
+class HTTPListingCollector:
+    """
+    Coletor de URLs que pagina a listagem via HTTP, sem Selenium/Chrome
+    """
+
+    MODES = ('listing', 'api')
+
+    def __init__(self, products_url: str, session: requests.Session,
+                 extract_urls: Callable[[BeautifulSoup], List[str]],
+                 url_filter: Callable[[List[str]], List[str]],
+                 mode: str = 'listing', max_pages: int = 100, max_workers: int = 4,
+                 retries: int = 2, backoff: float = 1.0):
+        if mode not in self.MODES:
+            raise ValueError(f"Modo inválido: {mode} (opções: {', '.join(self.MODES)})")
+
+        self.products_url = products_url
+        self.session = session
+        self.extract_urls = extract_urls
+        self.url_filter = url_filter
+        self.mode = mode
+        self.max_pages = max_pages
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.pages_fetched = 0
+        self.limit_reached = False
+        # Páginas que falharam mesmo após as novas tentativas (listagem possivelmente incompleta)
+        self.failed_pages: List[int] = []
+
+    def page_url(self, page: int) -> str:
+        """Monta a URL da página N da listagem (ou da janela N da API)"""
+        if self.mode == 'api':
+            start = (page - 1) * VTEX_SEARCH_PAGE_SIZE
+            end = start + VTEX_SEARCH_PAGE_SIZE - 1
+            return urljoin(self.products_url, f"/api/catalog_system/pub/products/search?_from={start}&_to={end}")
+        separator = '&' if '?' in self.products_url else '?'
+        return f"{self.products_url}{separator}page={page}"
+
+    def fetch_page(self, page: int) -> Optional[List[str]]:
+        """
+        Busca uma página e retorna as URLs de produto encontradas nela
+        Erros de rede ou resposta inválida são tentados de novo com espera crescente;
+        None = a página falhou (diferente de [] = página vazia, fim da listagem)
+        """
+        url = self.page_url(page)
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.session.get(url, timeout=15)
+                response.raise_for_status()
+                if self.mode == 'api':
+                    return self.url_filter([product.get('link') for product in response.json()])
+                return self.extract_urls(BeautifulSoup(response.content, 'html.parser'))
+            except (requests.RequestException, ValueError) as e:
+                # ValueError: JSON inválido na API; 4xx (exceto 429) não melhora com nova tentativa
+                status = getattr(getattr(e, 'response', None), 'status_code', None)
+                permanent = status is not None and 400 <= status < 500 and status != 429
+                if attempt < self.retries and not permanent:
+                    delay = self.backoff * 2 ** attempt
+                    logging.warning(f"⚠️ Erro ao acessar {url}: {e} - nova tentativa em {delay:.0f}s")
+                    time.sleep(delay)
+                else:
+                    logging.error(f"❌ Erro ao acessar {url} após {attempt + 1} tentativa(s): {e}")
+                    break
+        return None
+
+    def collect_urls(self) -> List[str]:
+        """Busca as páginas 1..N em lotes paralelos até uma página sem URLs novas"""
+        logging.info(f"🔍 Iniciando coleta de URLs (backend HTTP, modo {self.mode})...")
+
+        urls = []
+        seen = set()
+        self.pages_fetched = 0
+        self.limit_reached = False
+        self.failed_pages = []
+        next_page = 1
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while next_page <= self.max_pages:
+                pages = range(next_page, min(next_page + self.max_workers, self.max_pages + 1))
+                next_page = pages[-1] + 1
+
+                # Os resultados são processados na ordem das páginas para manter a ordem das URLs
+                results = list(executor.map(self.fetch_page, pages))
+                if all(page_urls is None for page_urls in results):
+                    self.failed_pages.extend(pages)
+                    logging.error(f"❌ Páginas {pages[0]}-{pages[-1]} falharam - descoberta interrompida")
+                    self.log_incomplete(urls)
+                    return urls
+
+                for page, page_urls in zip(pages, results):
+                    if page_urls is None:
+                        # Falha não é fim da listagem: segue para as próximas páginas
+                        self.failed_pages.append(page)
+                        continue
+                    self.pages_fetched += 1
+                    new_urls = [url for url in page_urls if url not in seen]
+
+                    if not new_urls:
+                        logging.info(f"🏁 Página {page} sem URLs novas - fim da listagem")
+                        logging.info(f"🔗 Total de URLs coletadas: {len(urls)} ({page - 1} páginas)")
+                        self.log_incomplete(urls)
+                        return urls
+
+                    seen.update(new_urls)
+                    urls.extend(new_urls)
+                    logging.info(f"📦 Página {page}: {len(new_urls)} URLs novas (total {len(urls)})")
+
+        self.limit_reached = True
+        logging.warning(f"⚠️ Limite de {self.max_pages} páginas atingido - a listagem pode estar incompleta")
+        logging.info(f"🔗 Total de URLs coletadas: {len(urls)}")
+        self.log_incomplete(urls)
+        return urls
+
+    def log_incomplete(self, urls: List[str]):
+        if self.failed_pages:
+            logging.error(f"❌ Listagem incompleta: {len(self.failed_pages)} página(s) com erro "
+                          f"({', '.join(map(str, self.failed_pages))}); {len(urls)} URLs coletadas")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Diferença entre execuções (change data capture)
+Compara o snapshot anterior com o atual via merge vetorizado do pandas por URL e
+gera um delta pequeno com produtos adicionados, removidos e campos alterados
+
+Uso:
+    python config/diff_execucoes.py anterior.csv atual.csv [delta.csv]
+"""
+
+import os
+import sys
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from gravadores import TEXT_FIELDS
+from log_config import setup_logging
+
+dados_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'dados')
+
+DELTA_COLUMNS = ['URL', 'TIPO', 'CAMPO', 'ANTES', 'DEPOIS']
+
+
+def _normalize(df: pd.DataFrame, key: str, fields: List[str]) -> pd.DataFrame:
+    """Alinha os tipos dos dois snapshots: nutrientes numéricos, texto vazio = ausente"""
+    df = df[[key] + fields].copy()
+    for field in fields:
+        if field in TEXT_FIELDS:
+            df[field] = df[field].astype(object).replace('', np.nan)
+        else:
+            df[field] = pd.to_numeric(df[field], errors='coerce')
+    return df.drop_duplicates(subset=key, keep='last')
+
+
+def diff_snapshots(previous: pd.DataFrame, current: pd.DataFrame, key: str = 'URL',
+                   fields: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Retorna o delta em formato longo (URL, TIPO, CAMPO, ANTES, DEPOIS)
+    TIPO: 'adicionado', 'removido' (uma linha por produto) ou 'alterado' (uma linha por campo)
+    """
+    if fields is None:
+        fields = [column for column in current.columns if column != key and column in previous.columns]
+
+    previous = _normalize(previous, key, fields)
+    current = _normalize(current, key, fields)
+
+    merged = previous.merge(current, on=key, how='outer', suffixes=('_antes', '_depois'), indicator=True)
+
+    # Produtos que entraram ou saíram: uma linha por produto (CAMPO vazio)
+    parts = []
+    for kind, side in (('adicionado', 'right_only'), ('removido', 'left_only')):
+        mask = merged['_merge'] == side
+        if mask.any():
+            parts.append(pd.DataFrame({'URL': merged.loc[mask, key].values, 'TIPO': kind}))
+
+    # Produtos presentes nos dois: uma linha por campo alterado
+    both = merged[merged['_merge'] == 'both']
+    for field in fields:
+        before = both[f"{field}_antes"]
+        after = both[f"{field}_depois"]
+
+        # Diferente = valores diferentes, sem contar ausente/ausente como mudança
+        if pd.api.types.is_numeric_dtype(before) and pd.api.types.is_numeric_dtype(after):
+            changed = ~np.isclose(before, after, rtol=0, atol=1e-6, equal_nan=True)
+        else:
+            changed = ((before != after) & ~(before.isna() & after.isna())).values
+
+        if changed.any():
+            parts.append(pd.DataFrame({
+                'URL': both[key].values[changed],
+                'TIPO': 'alterado',
+                'CAMPO': field,
+                'ANTES': before.values[changed],
+                'DEPOIS': after.values[changed],
+            }))
+
+    if not parts:
+        return pd.DataFrame(columns=DELTA_COLUMNS)
+
+    delta = pd.concat(parts, ignore_index=True).reindex(columns=DELTA_COLUMNS)
+    return delta.sort_values(['TIPO', 'URL', 'CAMPO'], kind='stable').reset_index(drop=True)
+
+
+def summarize(delta: pd.DataFrame) -> dict:
+    """Quantidade de produtos por tipo de mudança"""
+    return delta.groupby('TIPO')['URL'].nunique().to_dict()
+
+
+def save_delta(delta: pd.DataFrame, run_id: str) -> str:
+    """Salva o delta em dados/delta/delta_<run_id>.csv"""
+    delta_dir = os.path.join(dados_dir, 'delta')
+    os.makedirs(delta_dir, exist_ok=True)
+    filepath = os.path.join(delta_dir, f"delta_{run_id}.csv")
+    delta.to_csv(filepath, index=False, encoding='utf-8')
+    return filepath
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Uso: python config/diff_execucoes.py anterior.csv atual.csv [delta.csv]")
+        sys.exit(1)
+
+    setup_logging('diff_execucoes')
+    result = diff_snapshots(pd.read_csv(sys.argv[1]), pd.read_csv(sys.argv[2]))
+    print(f"📊 Mudanças: {summarize(result) or 'nenhuma'}")
+    if len(sys.argv) > 3:
+        result.to_csv(sys.argv[3], index=False, encoding='utf-8')
+        print(f"💾 Delta salvo em: {sys.argv[3]}")
+    else:
+        print(result.to_string(index=False))
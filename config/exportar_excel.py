@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Exportação para Excel com memória constante (openpyxl em modo write_only)
+Larguras das colunas calculadas de forma vetorizada a partir do DataFrame
+
+Uso (exportação separada a partir do dataset colunar):
+    python config/exportar_excel.py [dados/parquet/dados.parquet] [dados/excel/dados.xlsx]
+"""
+
+import logging
+import os
+import sys
+from typing import List
+
+import pandas as pd
+
+from log_config import setup_logging
+
+dados_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'dados')
+
+
+def column_widths(df: pd.DataFrame, max_width: int = 50) -> List[int]:
+    """Largura de cada coluna: maior texto entre cabeçalho e valores (+2), limitada a max_width"""
+    widths = []
+    for column in df.columns:
+        values = df[column].dropna().astype(str).str.len()
+        longest = max(len(str(column)), int(values.max()) if len(values) else 0)
+        widths.append(min(longest + 2, max_width))
+    return widths
+
+
+def export_excel(df: pd.DataFrame, filepath: str, sheet_name: str = 'Dados Nutricionais',
+                 header_style: bool = False) -> str:
+    """
+    Salva o DataFrame em XLSX linha a linha, sem montar a planilha inteira em memória
+    (openpyxl importado só aqui: execuções sem XLSX não pagam o import)
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill
+    from openpyxl.utils import get_column_letter
+
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(sheet_name)
+
+    # No modo write_only as larguras precisam ser definidas antes das linhas
+    for i, width in enumerate(column_widths(df), 1):
+        worksheet.column_dimensions[get_column_letter(i)].width = width
+
+    # Cabeçalho
+    header = []
+    for column in df.columns:
+        cell = WriteOnlyCell(worksheet, value=str(column))
+        if header_style:
+            cell.font = Font(bold=True)
+            cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
+        header.append(cell)
+    worksheet.append(header)
+
+    # Valores ausentes viram células vazias (NaN não é válido no Excel)
+    values = df.astype(object).where(df.notna(), None)
+    for row in values.itertuples(index=False, name=None):
+        worksheet.append(row)
+
+    workbook.save(filepath)
+    return filepath
+
+
+def load_dataset(source: str) -> pd.DataFrame:
+    """Carrega o dataset colunar (Parquet) ou, na falta dele, o CSV"""
+    if source.endswith('.parquet'):
+        df = pd.read_parquet(source)
+        # O timestamp com fuso não é suportado pelo Excel
+        for column in df.select_dtypes(include=['datetimetz']).columns:
+            df[column] = df[column].dt.tz_localize(None)
+        # float32 -> float64 sem carregar o ruído de precisão (5.1 e não 5.0999999)
+        for column in df.select_dtypes(include=['float32']).columns:
+            df[column] = df[column].astype('float64').round(4)
+        return df
+    return pd.read_csv(source, encoding='utf-8')
+
+
+def export_dataset(source: str = None, target: str = None) -> str:
+    """Exportação opcional: gera o XLSX a partir do dataset já salvo"""
+    if not source:
+        parquet_file = os.path.join(dados_dir, 'parquet', 'dados.parquet')
+        source = parquet_file if os.path.exists(parquet_file) else os.path.join(dados_dir, 'csv', 'dados.csv')
+    target = target or os.path.join(dados_dir, 'excel', 'dados.xlsx')
+
+    df = load_dataset(source)
+    export_excel(df, target)
+    logging.info(f"📊 XLSX salvo em: {target} ({len(df)} linhas, origem: {source})")
+    return target
+
+
+if __name__ == "__main__":
+    setup_logging('exportar_excel')
+    export_dataset(*sys.argv[1:3])
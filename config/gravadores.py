@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Gravadores incrementais (CSV, NDJSON e Parquet) alimentados produto a produto
+As linhas vão para um arquivo temporário .part (que pode ser acompanhado com tail)
+e, ao final, o arquivo é renomeado de forma atômica para o destino
+"""
+
+import csv
+import importlib.util
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from modelos import parse_float
+
+# pyarrow é opcional (só a saída Parquet precisa dele) e só é importado por ela
+PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+# Campos de texto do dataset; todos os demais campos alvo são nutrientes numéricos
+TEXT_FIELDS = ('URL', 'NOME_PRODUTO')
+
+
+class StreamingWriter:
+    """
+    Base dos gravadores incrementais: buffer em memória, flush periódico e
+    finalização atômica (arquivo .part -> arquivo final)
+    """
+
+    def __init__(self, final_path: str, fieldnames: List[str], buffer_size: int = 50,
+                 flush_interval: float = 5.0):
+        self.final_path = final_path
+        self.fieldnames = fieldnames
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+
+        directory, filename = os.path.split(final_path)
+        os.makedirs(directory, exist_ok=True)
+        self.tmp_path = os.path.join(directory, f".{filename}.part")
+
+        self.rows_written = 0
+        self._buffer: List[Dict] = []
+        self._last_flush = time.monotonic()
+        self._open()
+
+    def _open(self):
+        """Abre o arquivo temporário"""
+        self._file = open(self.tmp_path, 'w', newline='', encoding='utf-8')
+        self._write_header()
+
+    def _flush_file(self):
+        self._file.flush()
+
+    def _is_closed(self) -> bool:
+        return self._file.closed
+
+    def _sync_and_close(self):
+        """Sincroniza com o disco e fecha o arquivo temporário"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+    def _write_header(self):
+        """Escreve o cabeçalho do arquivo (se o formato tiver um)"""
+
+    def _write_rows(self, rows: List[Dict]):
+        raise NotImplementedError
+
+    def write_row(self, row: Dict):
+        """Adiciona uma linha; grava no disco quando o buffer enche ou o intervalo passa"""
+        self._buffer.append(row)
+        if (len(self._buffer) >= self.buffer_size or
+                time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """Grava as linhas pendentes no arquivo temporário"""
+        if self._buffer:
+            self._write_rows(self._buffer)
+            self.rows_written += len(self._buffer)
+            self._buffer = []
+        self._flush_file()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        """Fecha o arquivo temporário sem publicá-lo (o .part fica para inspeção)"""
+        if not self._is_closed():
+            self.flush()
+            self._sync_and_close()
+
+    def finalize(self) -> str:
+        """Grava o restante, sincroniza e renomeia o .part para o arquivo final"""
+        self.flush()
+        self._sync_and_close()
+        os.replace(self.tmp_path, self.final_path)
+        logging.info(f"💾 {self.rows_written} linhas salvas em: {self.final_path}")
+        return self.final_path
+
+    def discard(self):
+        """Descarta o arquivo temporário mantendo o arquivo final anterior"""
+        if not self._is_closed():
+            self._sync_and_close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+class CSVStreamWriter(StreamingWriter):
+    """
+    Gravador incremental de CSV
+    """
+
+    def _write_header(self):
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, extrasaction='ignore')
+        self._writer.writeheader()
+
+    def _write_rows(self, rows: List[Dict]):
+        self._writer.writerows(rows)
+
+
+class NDJSONStreamWriter(StreamingWriter):
+    """
+    Gravador incremental de JSON delimitado por linhas (um produto por linha)
+    """
+
+    def _write_rows(self, rows: List[Dict]):
+        self._file.writelines(
+            json.dumps({field: row.get(field) for field in self.fieldnames}, ensure_ascii=False) + '\n'
+            for row in rows
+        )
+
+
+def build_arrow_schema(fieldnames: List[str]):
+    """
+    Schema explícito do dataset: nutrientes float32 anuláveis, nome do produto
+    com dictionary encoding e o timestamp da coleta
+    """
+    import pyarrow as pa
+
+    fields = []
+    for name in fieldnames:
+        if name == 'URL':
+            fields.append(pa.field(name, pa.string(), nullable=False))
+        elif name == 'NOME_PRODUTO':
+            fields.append(pa.field(name, pa.dictionary(pa.int32(), pa.string())))
+        else:
+            fields.append(pa.field(name, pa.float32()))
+    fields.append(pa.field('DATA_COLETA', pa.timestamp('ms', tz='UTC'), nullable=False))
+    return pa.schema(fields)
+
+
+class ParquetStreamWriter(StreamingWriter):
+    """
+    Gravador incremental de Parquet (colunar, tipado e comprimido)
+    Cada flush do buffer vira um row group do arquivo
+    """
+
+    def __init__(self, final_path: str, fieldnames: List[str], buffer_size: int = 500,
+                 flush_interval: float = 60.0, compression: str = 'zstd'):
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow não instalado. Execute: pip install pyarrow")
+        self.schema = build_arrow_schema(fieldnames)
+        self.compression = compression
+        super().__init__(final_path, fieldnames, buffer_size, flush_interval)
+
+    def _open(self):
+        import pyarrow.parquet as pq
+        self._file = pq.ParquetWriter(self.tmp_path, self.schema, compression=self.compression)
+        self._closed = False
+
+    def _flush_file(self):
+        # O ParquetWriter grava cada row group por inteiro em write_table
+        pass
+
+    def _is_closed(self) -> bool:
+        return self._closed
+
+    def _sync_and_close(self):
+        self._file.close()
+        self._closed = True
+
+    def write_row(self, row: Dict):
+        """Adiciona uma linha carimbando o momento da coleta (se ainda não tiver)"""
+        if row.get('DATA_COLETA') is None:
+            row = dict(row)
+            row['DATA_COLETA'] = datetime.now(timezone.utc)
+        super().write_row(row)
+
+    def _write_rows(self, rows: List[Dict]):
+        import pyarrow as pa
+        columns = {}
+        for name in self.schema.names:
+            values = [row.get(name) for row in rows]
+            if name not in TEXT_FIELDS and name != 'DATA_COLETA':
+                values = [parse_float(value) for value in values]
+            columns[name] = values
+        self._file.write_table(pa.Table.from_pydict(columns, schema=self.schema))
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Histórico de longo prazo das coletas em Parquet particionado por mês
+    dados/historico/mes=2025-01/run_20250101_020000.parquet   (uma execução)
+    dados/historico/mes=2024-12/compactado.parquet            (mês compactado)
+- Cada execução vira um arquivo no mês correspondente
+- A compactação junta os arquivos de um mês em um só, ordenado por URL e data
+  (as estatísticas dos row groups permitem pular dados nas consultas por produto)
+- A retenção remove meses antigos
+Consultas via DuckDB (opcional) ou, na falta dele, via pyarrow.dataset com filtro
+
+Uso:
+    python config/historico.py compactar
+    python config/historico.py reter 24
+    python config/historico.py importar
+    python config/historico.py consultar <url> [campo]
+"""
+
+import glob
+import logging
+import os
+import re
+import shutil
+import sys
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Importar DuckDB (opcional: camada de consulta SQL)
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    DUCKDB_AVAILABLE = False
+
+from log_config import setup_logging
+from modelos import NUTRIENT_ATTRS
+
+dados_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'dados')
+
+HISTORY_SCHEMA = pa.schema(
+    [pa.field('RUN_ID', pa.string(), nullable=False),
+     pa.field('URL', pa.string(), nullable=False),
+     pa.field('NOME_PRODUTO', pa.string())] +
+    [pa.field(field, pa.float32()) for field in NUTRIENT_ATTRS] +
+    [pa.field('DATA_COLETA', pa.timestamp('ms', tz='UTC'), nullable=False)]
+)
+
+COMPACTED_FILE = 'compactado.parquet'
+ROW_GROUP_SIZE = 64 * 1024
+
+
+def run_datetime(run_id: str) -> datetime:
+    """'20250101_020000' (hora local, como gerado pelos scrapers) -> datetime em UTC"""
+    return datetime.strptime(run_id, "%Y%m%d_%H%M%S").astimezone(timezone.utc)
+
+
+class HistoryStore:
+    """
+    Histórico particionado por mês com compactação e retenção
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or os.path.join(dados_dir, 'historico')
+        os.makedirs(self.root, exist_ok=True)
+
+    def partition_dir(self, when: datetime) -> str:
+        return os.path.join(self.root, f"mes={when:%Y-%m}")
+
+    def partitions(self) -> List[str]:
+        """Meses existentes (YYYY-MM), do mais antigo para o mais novo"""
+        return sorted(name[4:] for name in os.listdir(self.root) if name.startswith('mes='))
+
+    def _to_table(self, df: pd.DataFrame, run_id: str) -> pa.Table:
+        collected = df['DATA_COLETA'] if 'DATA_COLETA' in df.columns else pd.Series(
+            run_datetime(run_id), index=df.index)
+        columns = {
+            'RUN_ID': [run_id] * len(df),
+            'URL': df['URL'].astype(str).tolist(),
+            'NOME_PRODUTO': (df['NOME_PRODUTO'].astype(object).where(df['NOME_PRODUTO'].notna(), None).tolist()
+                             if 'NOME_PRODUTO' in df.columns else [None] * len(df)),
+            'DATA_COLETA': pd.to_datetime(collected, utc=True).tolist(),
+        }
+        for field in NUTRIENT_ATTRS:
+            values = pd.to_numeric(df[field], errors='coerce') if field in df.columns else pd.Series(float('nan'), index=df.index)
+            columns[field] = values.astype(object).where(values.notna(), None).tolist()
+        return pa.Table.from_pydict(columns, schema=HISTORY_SCHEMA)
+
+    def append_run(self, df: pd.DataFrame, run_id: str) -> str:
+        """Grava uma execução na partição do mês (arquivo temporário + rename)"""
+        partition = self.partition_dir(run_datetime(run_id))
+        os.makedirs(partition, exist_ok=True)
+        filepath = os.path.join(partition, f"run_{run_id}.parquet")
+
+        tmp_path = f"{filepath}.tmp"
+        pq.write_table(self._to_table(df, run_id), tmp_path, compression='zstd')
+        os.replace(tmp_path, filepath)
+
+        logging.info(f"🗂️ Execução {run_id} adicionada ao histórico ({len(df)} produtos): {filepath}")
+        return filepath
+
+    def compact(self, include_current: bool = False) -> List[str]:
+        """
+        Junta os arquivos de cada mês em compactado.parquet, ordenado por URL e data.
+        O mês corrente fica de fora (ainda recebe execuções), salvo include_current.
+        Linhas repetidas (URL, RUN_ID) são descartadas, ficando a gravação mais nova
+        (o compactado entra primeiro, depois as execuções em ordem), então uma
+        compactação interrompida ou uma execução regravada é corrigida na próxima
+        """
+        current = datetime.now(timezone.utc).strftime('%Y-%m')
+        compacted = []
+        for month in self.partitions():
+            if month == current and not include_current:
+                continue
+            partition = os.path.join(self.root, f"mes={month}")
+            runs = sorted(glob.glob(os.path.join(partition, 'run_*.parquet')))
+            if not runs:
+                continue
+
+            sources = [path for path in [os.path.join(partition, COMPACTED_FILE)] if os.path.exists(path)] + runs
+            table = pa.concat_tables(pq.read_table(path, schema=HISTORY_SCHEMA) for path in sources)
+            df = (table.to_pandas()
+                  .drop_duplicates(['URL', 'RUN_ID'], keep='last')
+                  .sort_values(['URL', 'DATA_COLETA'], kind='stable'))
+            table = pa.Table.from_pandas(df, schema=HISTORY_SCHEMA, preserve_index=False)
+
+            target = os.path.join(partition, COMPACTED_FILE)
+            pq.write_table(table, f"{target}.tmp", compression='zstd', row_group_size=ROW_GROUP_SIZE)
+            os.replace(f"{target}.tmp", target)
+            for path in runs:
+                os.remove(path)
+
+            logging.info(f"🗜️ Mês {month} compactado: {len(runs)} execuções, {table.num_rows} linhas")
+            compacted.append(month)
+        return compacted
+
+    def apply_retention(self, keep_months: int) -> List[str]:
+        """
+        Remove os meses anteriores aos keep_months meses de calendário mais recentes
+        (contando o corrente): meses sem coleta também contam
+        """
+        now = datetime.now(timezone.utc)
+        first = now.year * 12 + now.month - keep_months
+        oldest_kept = f"{first // 12:04d}-{first % 12 + 1:02d}"
+        removed = [month for month in self.partitions() if keep_months <= 0 or month < oldest_kept]
+        for month in removed:
+            shutil.rmtree(os.path.join(self.root, f"mes={month}"))
+            logging.info(f"🧹 Mês {month} removido do histórico (retenção: {keep_months} meses)")
+        return removed
+
+    def import_snapshots(self, pattern: str = None) -> int:
+        """Importa os CSVs antigos com timestamp no nome (<nome>_YYYYmmdd_HHMMSS.csv)"""
+        pattern = pattern or os.path.join(dados_dir, 'csv', '*_[0-9]*_[0-9]*.csv')
+        imported = 0
+        for path in sorted(glob.glob(pattern)):
+            match = re.search(r'(\d{8}_\d{6})\.csv$', path)
+            if not match:
+                continue
+            run_id = match.group(1)
+            if glob.glob(os.path.join(self.root, '*', f"run_{run_id}.parquet")):
+                continue
+            self.append_run(pd.read_csv(path, encoding='utf-8'), run_id)
+            imported += 1
+        return imported
+
+    def product_history(self, url: str, fields: Optional[List[str]] = None) -> pd.DataFrame:
+        """Valores de um produto ao longo do tempo (DATA_COLETA, RUN_ID e os campos pedidos)"""
+        fields = fields or list(NUTRIENT_ATTRS)
+        columns = ['DATA_COLETA', 'RUN_ID'] + fields
+
+        if DUCKDB_AVAILABLE:
+            select = ', '.join(f'"{column}"' for column in columns)
+            return duckdb.connect().execute(
+                f"SELECT {select} FROM read_parquet(?, hive_partitioning = true) "
+                f"WHERE URL = ? ORDER BY DATA_COLETA",
+                [os.path.join(self.root, '*', '*.parquet'), url]
+            ).df()
+
+        # Filtro empurrado para a leitura: row groups fora do intervalo de URL são pulados
+        dataset = ds.dataset(self.root, format='parquet', partitioning='hive', schema=HISTORY_SCHEMA)
+        table = dataset.to_table(columns=columns, filter=ds.field('URL') == url)
+        return table.to_pandas().sort_values('DATA_COLETA').reset_index(drop=True)
+
+    def sql(self, query: str) -> pd.DataFrame:
+        """Consulta SQL livre sobre a view 'historico' (requer DuckDB)"""
+        if not DUCKDB_AVAILABLE:
+            raise ImportError("duckdb não instalado. Execute: pip install duckdb")
+        conn = duckdb.connect()
+        conn.execute(
+            "CREATE VIEW historico AS SELECT * FROM read_parquet(?, hive_partitioning = true)",
+            [os.path.join(self.root, '*', '*.parquet')]
+        )
+        return conn.execute(query).df()
+
+
+def prune_snapshots(pattern: str, keep: int) -> List[str]:
+    """Remove os arquivos com timestamp mais antigos, mantendo os keep mais recentes"""
+    files = sorted(glob.glob(pattern))
+    removed = files[:-keep] if keep > 0 else files
+    for path in removed:
+        os.remove(path)
+    if removed:
+        logging.info(f"🧹 {len(removed)} arquivos antigos removidos ({os.path.basename(pattern)})")
+    return removed
+
+
+if __name__ == "__main__":
+    setup_logging('historico')
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    store = HistoryStore()
+
+    if command == 'compactar':
+        store.compact()
+    elif command == 'reter' and len(sys.argv) > 2:
+        store.apply_retention(int(sys.argv[2]))
+    elif command == 'importar':
+        print(f"📥 {store.import_snapshots()} execuções importadas")
+    elif command == 'consultar' and len(sys.argv) > 2:
+        print(store.product_history(sys.argv[2], sys.argv[3:] or None).to_string(index=False))
+    else:
+        print(__doc__)
+        sys.exit(1)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Instrumentação das etapas do scraper (descoberta, download, parse, gravação)
+Cada etapa registra tempo de relógio e tempo de CPU da thread que a executou.
+Outros módulos (métricas, perfilador, memória) podem se inscrever para receber
+cada medição via add_listener
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+
+# Etapas instrumentadas no IntegratedScraper
+STAGE_DISCOVERY = 'descoberta'
+STAGE_FETCH = 'download'
+STAGE_PARSE = 'parse'
+STAGE_SAVE = 'gravacao'
+STAGE_PRODUCT = 'produto'  # download + parse de um produto (latência por produto)
+STAGE_SELENIUM_WAIT = 'espera_selenium'  # esperas fixas do Selenium (dentro da descoberta)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentil q (0-100) com interpolação linear"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class Instrumentation:
+    """
+    Acumula, por etapa, contagem, tempo de relógio, tempo de CPU e as amostras de duração
+    """
+
+    def __init__(self, keep_samples: bool = True):
+        self.keep_samples = keep_samples
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[str, float, float], None]] = []
+        # Etapas em andamento por thread (só mantidas enquanto track_active, ex.: perfilador ligado)
+        self.track_active = False
+        self._active: Dict[int, List[str]] = {}
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.totals: Dict[str, Dict[str, float]] = {}
+            self.samples: Dict[str, List[float]] = {}
+
+    def add_listener(self, listener: Callable[[str, float, float], None]):
+        """listener(etapa, segundos de relógio, segundos de CPU) é chamado a cada medição"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[str, float, float], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def record(self, stage: str, wall: float, cpu: float):
+        with self._lock:
+            total = self.totals.setdefault(stage, {'contagem': 0, 'relogio_s': 0.0, 'cpu_s': 0.0})
+            total['contagem'] += 1
+            total['relogio_s'] += wall
+            total['cpu_s'] += cpu
+            if self.keep_samples:
+                self.samples.setdefault(stage, []).append(wall)
+        for listener in list(self._listeners):
+            listener(stage, wall, cpu)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Mede o bloco como uma execução da etapa name"""
+        tracked = self.track_active
+        if tracked:
+            active = self._active.setdefault(threading.get_ident(), [])
+            active.append(name)
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - wall_start, time.thread_time() - cpu_start)
+            if tracked:
+                active.pop()
+
+    def active_stages(self, thread_id: int) -> List[str]:
+        """Etapas em andamento na thread (da mais externa para a mais interna)"""
+        return list(self._active.get(thread_id, ()))
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Totais por etapa com p50/p95/p99 das durações (em segundos)"""
+        with self._lock:
+            result = {}
+            for stage, total in self.totals.items():
+                samples = self.samples.get(stage, [])
+                result[stage] = dict(total)
+                if samples:
+                    result[stage].update({
+                        'p50_s': percentile(samples, 50),
+                        'p95_s': percentile(samples, 95),
+                        'p99_s': percentile(samples, 99),
+                    })
+            return result
+
+
+# Instância compartilhada usada pelos scrapers
+instrumentation = Instrumentation()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Inventário de URLs dos produtos com data da coleta e origem
+Permite reaproveitar a última descoberta enquanto ela estiver dentro do TTL
+"""
+
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+dados_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'dados')
+
+# Validade padrão do inventário: 24 horas
+DEFAULT_TTL = 24 * 60 * 60
+
+
+class URLInventory:
+    """
+    Guarda o último conjunto de URLs descoberto com timestamp e origem
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(dados_dir, 'inventario_urls.json')
+        self._lock = threading.Lock()
+
+    def load(self) -> Optional[Dict]:
+        """
+        Carrega o inventário. Se ainda não existir, usa o arquivo
+        urls_produtos_<timestamp>.txt mais recente salvo pelo coletor de URLs
+        """
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                logging.warning(f"⚠️ Inventário de URLs inválido ({e}), ignorando")
+
+        arquivos = glob.glob(os.path.join(os.path.dirname(self.path), 'urls_produtos_*.txt'))
+        if not arquivos:
+            return None
+
+        mais_recente = max(arquivos, key=os.path.getmtime)
+        with open(mais_recente, encoding='utf-8') as f:
+            urls = [line.strip() for line in f if line.strip()]
+
+        return {
+            'timestamp': os.path.getmtime(mais_recente),
+            'fonte': f"arquivo:{os.path.basename(mais_recente)}",
+            'urls': urls
+        }
+
+    def save(self, urls: List[str], source: str) -> str:
+        """Grava o inventário de forma atômica (arquivo temporário + rename)"""
+        inventory = {
+            'timestamp': time.time(),
+            'coletado_em': datetime.now().isoformat(timespec='seconds'),
+            'fonte': source,
+            'total': len(urls),
+            'urls': urls
+        }
+
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(inventory, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+
+        logging.info(f"🗃️ Inventário de URLs atualizado: {len(urls)} URLs ({source})")
+        return self.path
+
+    @staticmethod
+    def age(inventory: Dict) -> float:
+        """Idade do inventário em segundos"""
+        return time.time() - inventory.get('timestamp', 0)
+
+    def is_fresh(self, inventory: Optional[Dict], ttl: float) -> bool:
+        """Indica se o inventário existe, tem URLs e é mais novo que o TTL"""
+        return bool(inventory and inventory.get('urls')) and self.age(inventory) < ttl
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Configuração central do logging, feita uma vez pelo ponto de entrada (main)
+Os módulos só chamam logging.info/warning...: nada é configurado no import.
+- A escrita em arquivo e no terminal roda em segundo plano (QueueHandler + QueueListener):
+  a thread da coleta só enfileira o registro
+- Linhas por produto marcadas com extra=SAMPLED podem ser amostradas (1 a cada N)
+- Com json_logs, também grava logs/<nome>.jsonl (um objeto por linha) com as
+  mensagens e os eventos estruturados de log_event (url, stage, duration_ms, status...)
+  para envio a um coletor de logs
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+logs_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs')
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# extra das linhas por produto que podem ser amostradas
+SAMPLED = {'amostrado': True}
+
+events_logger = logging.getLogger('eventos')
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+_events_enabled = False
+
+
+class SamplingFilter(logging.Filter):
+    """Deixa passar 1 de cada every linhas INFO marcadas com SAMPLED (avisos e erros sempre passam)"""
+
+    def __init__(self, every: int = 1):
+        super().__init__()
+        self.every = max(1, every)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.every == 1 or not getattr(record, 'amostrado', False) or record.levelno > logging.INFO:
+            return True
+        with self._lock:
+            self._count += 1
+            return self._count % self.every == 1
+
+
+class TextOnlyFilter(logging.Filter):
+    """Eventos estruturados só vão para o arquivo JSON"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return not hasattr(record, 'evento')
+
+
+class JSONFormatter(logging.Formatter):
+    """Um objeto JSON por linha: ts, level, logger, message (+ event e campos do evento)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        if hasattr(record, 'evento'):
+            entry['event'] = record.evento
+            entry.update(record.campos)
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def log_event(event: str, level: int = logging.INFO, **fields):
+    """
+    Evento estruturado (ex.: log_event('http', url=..., stage='download', duration_ms=12.3, status=200))
+    Sem json_logs não faz nada: custo desprezível no laço quente
+    """
+    if _events_enabled:
+        events_logger.log(level, event, extra={'evento': event, 'campos': fields})
+
+
+def setup_logging(name: str, level: int = logging.INFO, json_logs: bool = False, sample_every: int = 1,
+                  console: bool = True, directory: Optional[str] = None) -> QueueListener:
+    """
+    Configura o logger raiz: logs/<nome>.log (texto), terminal e, com json_logs,
+    logs/<nome>.jsonl. Chamar de novo substitui a configuração anterior
+    """
+    global _listener, _queue_handler, _events_enabled
+    shutdown_logging()
+
+    directory = directory or logs_dir
+    os.makedirs(directory, exist_ok=True)
+
+    text_formatter = logging.Formatter(TEXT_FORMAT)
+    handlers = [logging.FileHandler(os.path.join(directory, f"{name}.log"), encoding='utf-8')]
+    if console:
+        handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(text_formatter)
+        handler.addFilter(TextOnlyFilter())
+
+    if json_logs:
+        json_handler = logging.FileHandler(os.path.join(directory, f"{name}.jsonl"), encoding='utf-8')
+        json_handler.setFormatter(JSONFormatter())
+        handlers.append(json_handler)
+
+    log_queue = queue.Queue(-1)
+    _queue_handler = QueueHandler(log_queue)
+    _queue_handler.addFilter(SamplingFilter(sample_every))
+
+    # Substitui qualquer handler anterior (ex.: basicConfig implícito de um logging.warning no import)
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(_queue_handler)
+    root.setLevel(level)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    _events_enabled = json_logs
+    return _listener
+
+
+def shutdown_logging():
+    """Esvazia a fila e fecha os arquivos (chamado também na saída do processo)"""
+    global _listener, _queue_handler, _events_enabled
+    if _listener is None:
+        return
+    logging.getLogger().removeHandler(_queue_handler)
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+    _queue_handler = None
+    _events_enabled = False
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+Loja VTEX simulada (offline) para execuções herméticas e reproduzíveis
+Serve, a partir de um catálogo sintético (ou de páginas gravadas):
+- /todos-os-produtos e /<categoria>: listagem com botão "Mostrar mais" funcional
+  (JavaScript) e paginação ?page=N
+- /<produto>/p: página do produto com a tabela nutricional em vários layouts
+- /sitemap.xml: sitemap com todas as páginas de produto
+- /api/catalog_system/pub/products/search?_from=0&_to=49: API de busca do VTEX
+- /catalogo.json: catálogo completo com os valores esperados (gabarito)
+As páginas de produto podem simular latência e erros do servidor (--perfil)
+
+Uso:
+    python config/loja_local.py --produtos 500 --porta 8800
+    python config/loja_local.py --produtos 500 --perfil instavel
+    SCRAPER_BASE_URL=http://127.0.0.1:8800 python main.py
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import random
+import threading
+import time
+import unicodedata
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from html import escape
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from descoberta_categorias import DEFAULT_CATEGORIES
+from log_config import setup_logging
+
+# Layouts de página de produto vistos no site
+LAYOUTS = ('padrao', 'por_100g', 'sem_cabecalho', 'div', 'sem_tabela')
+
+# Perfil por categoria: porção (g) e fração de proteína, carboidrato e gordura na porção
+CATEGORY_PROFILES = {
+    'whey-protein': (30, 0.72, 0.12, 0.06),
+    'creatina': (3, 0.0, 0.0, 0.0),
+    'barras-de-proteina': (60, 0.30, 0.35, 0.15),
+    'aminoacidos': (5, 0.90, 0.0, 0.0),
+    'pre-treino': (10, 0.0, 0.60, 0.0),
+    'hipercaloricos': (100, 0.20, 0.70, 0.03),
+    'termogenicos': (2, 0.0, 0.20, 0.0),
+    'vitaminas': (1, 0.0, 0.10, 0.0),
+}
+
+PRODUCT_NAMES = {
+    'whey-protein': ['Whey Protein Concentrado', 'Whey Protein Isolado', 'Whey 100% Pure', 'Nutri Whey'],
+    'creatina': ['Creatina Monohidratada', 'Creatina Creapure', 'Creatina Hardcore'],
+    'barras-de-proteina': ['Protein Crisp Bar', 'Barra Proteica Nutri', 'Protein Bar Zero'],
+    'aminoacidos': ['BCAA 2:1:1', 'Glutamina', 'Beta Alanina', 'Arginina'],
+    'pre-treino': ['Pré-Treino Insane', 'Pré-Treino Evolution', 'Cafeína Power'],
+    'hipercaloricos': ['Massa Nitro', 'Hipercalórico Mass', 'Gainers Power'],
+    'termogenicos': ['Termogênico Lipo', 'Thermo Flame', 'Black Burn'],
+    'vitaminas': ['Multivitamínico', 'Vitamina D3', 'Ômega 3', 'Vitamina C'],
+}
+FLAVORS = ['Baunilha', 'Chocolate', 'Morango', 'Cookies', 'Natural', 'Limão']
+SIZES = ['60g', '300g', '450g', '900g', '1,8kg', '120 cápsulas']
+
+PAGE_SIZE = 12
+
+# Perfis de falha das páginas de produto: (latência média s, variação s, taxa de erro 503)
+FAULT_PROFILES = {
+    'nenhum': (0.0, 0.0, 0.0),
+    'lan': (0.005, 0.002, 0.0),
+    'wan': (0.08, 0.04, 0.0),
+    'instavel': (0.05, 0.1, 0.05),
+}
+
+
+def format_br(value: float) -> str:
+    """5.1 -> '5,1'; 21.0 -> '21'"""
+    text = f"{value:.1f}".rstrip('0').rstrip('.')
+    return text.replace('.', ',')
+
+
+def slugify(text: str) -> str:
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii').lower()
+    return '-'.join(''.join(c if c.isalnum() else ' ' for c in text).split())
+
+
+class MockCatalog:
+    """
+    Catálogo da loja simulada: produtos sintéticos (determinísticos pela semente)
+    ou páginas HTML gravadas
+    """
+
+    def __init__(self, num_products: int = 60, seed: int = 42, page_size: int = PAGE_SIZE,
+                 layouts: Tuple[str, ...] = LAYOUTS):
+        self.page_size = page_size
+        self.products: List[Dict] = []
+        self.fixtures: Dict[str, str] = {}
+        # Índices por slug e por categoria (refeitos quando products muda de tamanho)
+        self._by_slug: Dict[str, Dict] = {}
+        self._by_category: Dict[str, List[Dict]] = {}
+        self._indexed = -1
+
+        rng = random.Random(seed)
+        for i in range(num_products):
+            category = DEFAULT_CATEGORIES[i % len(DEFAULT_CATEGORIES)]
+            name = f"{rng.choice(PRODUCT_NAMES[category])} {rng.choice(SIZES)} {rng.choice(FLAVORS)}"
+            slug = f"{slugify(name)}-{i}"
+            layout = layouts[i % len(layouts)]
+            nutrition = self._nutrition(category, rng)
+            self.products.append({
+                'id': str(1000 + i),
+                'nome': name,
+                'slug': slug,
+                'categoria': category,
+                'layout': layout,
+                # Gabarito: None quando a página não mostra informação nutricional
+                'nutricao': None if layout == 'sem_tabela' else nutrition,
+            })
+
+    @classmethod
+    def from_fixtures(cls, directory: str, page_size: int = PAGE_SIZE) -> 'MockCatalog':
+        """Catálogo com páginas gravadas: <diretorio>/<slug>.html vira /<slug>/p"""
+        catalog = cls(num_products=0, page_size=page_size)
+        for path in sorted(glob.glob(os.path.join(directory, '*.html'))):
+            slug = os.path.splitext(os.path.basename(path))[0]
+            with open(path, encoding='utf-8') as f:
+                catalog.fixtures[slug] = f.read()
+            catalog.products.append({'id': str(1000 + len(catalog.products)), 'nome': slug, 'slug': slug,
+                                     'categoria': 'gravado', 'layout': 'gravado', 'nutricao': None})
+        return catalog
+
+    @staticmethod
+    def _nutrition(category: str, rng: random.Random) -> Dict[str, Optional[float]]:
+        """Valores por porção coerentes com Atwater (kcal = 4P + 4C + 9G)"""
+        portion, protein_share, carb_share, fat_share = CATEGORY_PROFILES[category]
+        jitter = lambda share: round(portion * share * rng.uniform(0.9, 1.1), 1)
+        protein, carbs, fat = jitter(protein_share), jitter(carb_share), jitter(fat_share)
+        return {
+            'PORÇÃO (g)': float(portion),
+            'CALORIAS (kcal)': float(round(4 * protein + 4 * carbs + 9 * fat)),
+            'CARBOIDRATOS (g)': carbs,
+            'PROTEÍNAS (g)': protein,
+            'GORDURAS_TOTAIS (g)': fat,
+            'GORDURAS_SATURADAS (g)': round(fat * 0.5, 1),
+            'FIBRAS (g)': round(carbs * 0.1, 1) if carbs else None,
+            'AÇÚCARES (g)': round(carbs * 0.2, 1) if carbs else None,
+            'SÓDIO (mg)': float(rng.randint(0, 150)),
+        }
+
+    def _index(self):
+        """Indexa os produtos: cada requisição é uma consulta O(1), e não uma varredura da lista"""
+        if self._indexed == len(self.products):
+            return
+        by_slug, by_category = {}, {}
+        for product in self.products:
+            by_slug.setdefault(product['slug'], product)
+            by_category.setdefault(product['categoria'], []).append(product)
+        self._by_slug, self._by_category = by_slug, by_category
+        self._indexed = len(self.products)
+
+    def by_category(self, category: Optional[str]) -> List[Dict]:
+        if not category or category == 'todos-os-produtos':
+            return self.products
+        self._index()
+        return self._by_category.get(category, [])
+
+    def find(self, slug: str) -> Optional[Dict]:
+        self._index()
+        return self._by_slug.get(slug)
+
+
+# --------------------------------------------------------------------------- páginas
+
+LISTING_TEMPLATE = """<!DOCTYPE html>
+<html lang="pt-BR"><head><meta charset="utf-8"><title>{title} | Loja Local</title></head>
+<body>
+<h1>{title}</h1>
+<div id="gallery" class="vtex-search-result-3-x-gallery">
+{items}
+</div>
+{button}
+<script>
+var pagina = 1;
+document.addEventListener('click', function (event) {{
+  var botao = event.target.closest('.vtex-search-result-3-x-buttonShowMore button');
+  if (!botao) return;
+  pagina += 1;
+  fetch(window.location.pathname + '?page=' + pagina + '&fragmento=1')
+    .then(function (resposta) {{ return resposta.text(); }})
+    .then(function (html) {{
+      document.getElementById('gallery').insertAdjacentHTML('beforeend', html);
+      if (pagina >= {pages}) {{ botao.parentElement.remove(); }}
+    }});
+}});
+</script>
+</body></html>"""
+
+SHOW_MORE_BUTTON = ('<div class="vtex-search-result-3-x-buttonShowMore">'
+                    '<button class="vtex-button">Mostrar mais</button></div>')
+
+
+def listing_items(products: List[Dict]) -> str:
+    return '\n'.join(
+        f'<section class="vtex-product-summary"><a href="/{p["slug"]}/p">'
+        f'<span class="vtex-product-summary-2-x-productBrand">{escape(p["nome"])}</span></a></section>'
+        for p in products
+    )
+
+
+def energy_text(kcal: float) -> str:
+    return f"{format_br(kcal)} kcal = {format_br(round(kcal * 4.184))} kJ"
+
+
+def value_text(field: str, value: float) -> str:
+    if field == 'CALORIAS (kcal)':
+        return energy_text(round(value))
+    return f"{format_br(value)} {'mg' if field == 'SÓDIO (mg)' else 'g'}"
+
+
+def nutrition_rows(nutrition: Dict) -> List[Tuple[str, str, str, str]]:
+    """(rótulo, campo, valor por porção, %VD) de cada linha da tabela"""
+    labels = [
+        ('Valor energético', 'CALORIAS (kcal)', 2000),
+        ('Carboidratos', 'CARBOIDRATOS (g)', 300),
+        ('Açúcares totais', 'AÇÚCARES (g)', None),
+        ('Proteínas', 'PROTEÍNAS (g)', 75),
+        ('Gorduras totais', 'GORDURAS_TOTAIS (g)', 55),
+        ('Gorduras saturadas', 'GORDURAS_SATURADAS (g)', 22),
+        ('Fibras alimentares', 'FIBRAS (g)', 25),
+        ('Sódio', 'SÓDIO (mg)', 2400),
+    ]
+    rows = []
+    for label, field, daily in labels:
+        value = nutrition.get(field)
+        if value is None:
+            continue
+        vd = f"{round(value / daily * 100)}%" if daily else '**'
+        rows.append((label, field, value_text(field, value), vd))
+    return rows
+
+
+def nutrition_html(layout: str, nutrition: Dict) -> str:
+    """Tabela nutricional no layout pedido"""
+    if not nutrition:
+        return '<p>Produto sem informação nutricional.</p>'
+
+    portion = nutrition['PORÇÃO (g)']
+    rows = nutrition_rows(nutrition)
+
+    if layout == 'padrao':
+        body = ''.join(f"<tr><td>{label}</td><td>{value}</td><td>{vd}</td></tr>" for label, _, value, vd in rows)
+        return (f'<table class="tabela-nutricional"><tr><th>Porção de {format_br(portion)} g</th>'
+                f'<th>Quantidade por porção</th><th>%VD(*)</th></tr>{body}</table>')
+
+    if layout == 'por_100g':
+        # Coluna "100 g" antes da coluna da porção (a primeira coluna não é a da porção)
+        scale = 100 / portion
+        body = ''.join(f"<tr><td>{label}</td><td>{value_text(field, nutrition[field] * scale)}</td>"
+                       f"<td>{value}</td><td>{vd}</td></tr>" for label, field, value, vd in rows)
+        return (f'<table><tr><th>Porção de {format_br(portion)} g</th><th>100 g</th>'
+                f'<th>{format_br(portion)} g</th><th>%VD*</th></tr>{body}</table>')
+
+    if layout == 'sem_cabecalho':
+        body = f"<tr><td>Porção</td><td>{format_br(portion)} g</td></tr>"
+        body += ''.join(f"<tr><td>{label}</td><td>{value}</td></tr>" for label, _, value, _ in rows)
+        return f'<table>{body}</table>'
+
+    if layout == 'div':
+        body = ''.join(f'<div class="nutri-row"><span>{label}</span><span>{value}</span></div>'
+                       for label, _, value, _ in rows)
+        return (f'<div class="informacao-nutricional"><p>Porção de {format_br(portion)} g</p>{body}</div>')
+
+    raise ValueError(f"Layout desconhecido: {layout}")
+
+
+def product_html(product: Dict) -> str:
+    return (f'<!DOCTYPE html><html lang="pt-BR"><head><meta charset="utf-8">'
+            f'<title>{escape(product["nome"])} | Loja Local</title></head><body>'
+            f'<h1 class="vtex-store-components-3-x-productNameContainer">{escape(product["nome"])}</h1>'
+            f'<div class="descricao"><p>Suplemento da categoria {product["categoria"]}.</p></div>'
+            f'{nutrition_html(product["layout"], product["nutricao"])}</body></html>')
+
+
+# --------------------------------------------------------------------------- servidor
+
+class FaultInjector:
+    """
+    Latência (média ± variação uniforme) e erros 503 aleatórios, reproduzíveis pela semente
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, seed: int = 42):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_profile(cls, name: str, seed: int = 42) -> 'FaultInjector':
+        if name not in FAULT_PROFILES:
+            raise ValueError(f"Perfil inválido: {name} (opções: {', '.join(FAULT_PROFILES)})")
+        return cls(*FAULT_PROFILES[name], seed=seed)
+
+    def apply(self) -> bool:
+        """Espera a latência sorteada; retorna True se a requisição deve falhar"""
+        with self._lock:
+            delay = max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter)) if self.latency else 0.0
+            fail = self._rng.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+        return fail
+
+
+class StoreHandler(BaseHTTPRequestHandler):
+    """Rotas da loja simulada"""
+
+    catalog: MockCatalog = None
+    faults: Optional[FaultInjector] = None
+
+    def _send(self, status: int, body: str, content_type: str = 'text/html; charset=utf-8'):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = parse_qs(parsed.query)
+        path = parsed.path.rstrip('/') or '/'
+        catalog = self.catalog
+
+        if path.endswith('/p'):
+            if self.faults is not None and self.faults.apply():
+                return self._send(503, '<h1>Serviço indisponível</h1>')
+            slug = path[1:-2]
+            if slug in catalog.fixtures:
+                return self._send(200, catalog.fixtures[slug])
+            product = catalog.find(slug)
+            if product is None:
+                return self._send(404, '<h1>Produto não encontrado</h1>')
+            return self._send(200, product_html(product))
+
+        if path == '/sitemap.xml':
+            host = f"http://{self.headers.get('Host')}"
+            urls = ''.join(f"<url><loc>{host}/{p['slug']}/p</loc></url>" for p in catalog.products)
+            return self._send(200, '<?xml version="1.0" encoding="UTF-8"?>'
+                                   f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>',
+                              'application/xml; charset=utf-8')
+
+        if path == '/api/catalog_system/pub/products/search':
+            start = int(params.get('_from', [0])[0])
+            end = int(params.get('_to', [start + 9])[0])
+            host = f"http://{self.headers.get('Host')}"
+            products = [{'productId': p['id'], 'productName': p['nome'], 'linkText': p['slug'],
+                         'link': f"{host}/{p['slug']}/p", 'categories': [f"/{p['categoria']}/"]}
+                        for p in catalog.products[start:end + 1]]
+            return self._send(200, json.dumps(products, ensure_ascii=False), 'application/json; charset=utf-8')
+
+        if path == '/catalogo.json':
+            return self._send(200, json.dumps(catalog.products, ensure_ascii=False), 'application/json; charset=utf-8')
+
+        category = path.strip('/')
+        if category in ('', 'todos-os-produtos') or category in CATEGORY_PROFILES:
+            products = catalog.by_category(category)
+            pages = max(1, -(-len(products) // catalog.page_size))
+            page = int(params.get('page', [1])[0])
+            items = listing_items(products[(page - 1) * catalog.page_size:page * catalog.page_size])
+            if 'fragmento' in params:
+                return self._send(200, items)
+            title = 'Todos os produtos' if category in ('', 'todos-os-produtos') else category
+            return self._send(200, LISTING_TEMPLATE.format(
+                title=title, items=items, pages=pages, button=SHOW_MORE_BUTTON if page < pages else ''))
+
+        return self._send(404, '<h1>Página não encontrada</h1>')
+
+    def log_message(self, format, *args):
+        logging.debug(f"🏪 {self.address_string()} {format % args}")
+
+
+def start_store(catalog: Optional[MockCatalog] = None, host: str = '127.0.0.1',
+                port: int = 0, faults: Optional[FaultInjector] = None) -> Tuple[ThreadingHTTPServer, str]:
+    """Sobe a loja em uma thread e retorna (servidor, URL base)"""
+    handler = type('MockStoreHandler', (StoreHandler,), {'catalog': catalog or MockCatalog(), 'faults': faults})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Loja VTEX simulada para testes offline')
+    parser.add_argument('--produtos', type=int, default=60, help='Quantidade de produtos sintéticos')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--por-pagina', type=int, default=PAGE_SIZE)
+    parser.add_argument('--fixtures', help='Diretório com páginas gravadas (<slug>.html)')
+    parser.add_argument('--perfil', default='nenhum', choices=list(FAULT_PROFILES),
+                        help='Latência/erros simulados nas páginas de produto')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8800)
+    args = parser.parse_args()
+
+    setup_logging('loja_local')
+    catalog = (MockCatalog.from_fixtures(args.fixtures, args.por_pagina) if args.fixtures
+               else MockCatalog(args.produtos, args.semente, args.por_pagina))
+
+    handler = type('MockStoreHandler', (StoreHandler,), {
+        'catalog': catalog, 'faults': FaultInjector.from_profile(args.perfil, args.semente)})
+    server = ThreadingHTTPServer((args.host, args.porta), handler)
+    base_url = f"http://{args.host}:{args.porta}"
+    logging.info(f"🏪 Loja local com {len(catalog.products)} produtos em {base_url}/todos-os-produtos")
+    logging.info(f"   Use: SCRAPER_BASE_URL={base_url} python main.py")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("⏹️ Loja local encerrada")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
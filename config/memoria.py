@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Contabilidade de memória do scraper (opcional, desligada por padrão)
+- MemoryTracker: picos do tracemalloc e do RSS por etapa (via instrumentação) e os
+  maiores pontos de alocação no momento do maior pico, em um relatório JSON
+- MemoryBudget: orçamento de RSS; acima dele a extração segura novas requisições
+  e grava os lotes antes da hora (contrapressão)
+O tracemalloc deixa a coleta bem mais lenta: use só para investigar
+"""
+
+import gc
+import json
+import logging
+import os
+import sys
+import threading
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from instrumentacao import Instrumentation, instrumentation
+
+# resource só existe em sistemas Unix (pico de RSS)
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+
+# psutil é opcional: RSS atual fora do Linux
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+dados_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'dados')
+
+MB = 1024 * 1024
+
+
+def rss_mb() -> Optional[float]:
+    """RSS atual do processo em MB (None se não houver como medir)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / MB
+    except (OSError, ValueError, AttributeError):
+        pass
+    if PSUTIL_AVAILABLE:
+        return psutil.Process().memory_info().rss / MB
+    return None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Pico de RSS do processo atual em MB (ru_maxrss é KB no Linux e bytes no macOS)"""
+    if not RESOURCE_AVAILABLE:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (MB if sys.platform == 'darwin' else 1024), 1)
+
+
+class MemoryTracker:
+    """
+    Picos de memória por etapa: a cada fim de etapa registra o pico do tracemalloc
+    desde o evento anterior (a janela que terminou com a etapa) e o RSS atual.
+    Com várias threads as janelas se misturam: os valores indicam onde a memória
+    sobe, não a conta exata de cada etapa. Quando o pico geral cresce mais de 10%,
+    guarda os maiores pontos de alocação daquele momento
+    """
+
+    def __init__(self, top: int = 15, frames: int = 1, source: Instrumentation = instrumentation):
+        self.top = top
+        self.frames = frames
+        self.source = source
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.peak_mb = 0.0
+        self.top_sites: List[Dict] = []
+        self._snapshot_peak_mb = 0.0
+        self._lock = threading.Lock()
+        self._started_tracing = False
+
+    def _on_stage(self, stage: str, wall: float, cpu: float):
+        if not tracemalloc.is_tracing():
+            return
+        with self._lock:
+            _, peak = tracemalloc.get_traced_memory()
+            if hasattr(tracemalloc, 'reset_peak'):  # Python 3.9+
+                tracemalloc.reset_peak()
+            peak_mb = peak / MB
+            rss = rss_mb()
+
+            entry = self.stages.setdefault(stage, {'execucoes': 0, 'pico_tracemalloc_mb': 0.0, 'rss_pico_mb': 0.0})
+            entry['execucoes'] += 1
+            entry['pico_tracemalloc_mb'] = max(entry['pico_tracemalloc_mb'], peak_mb)
+            if rss is not None:
+                entry['rss_pico_mb'] = max(entry['rss_pico_mb'], rss)
+
+            self.peak_mb = max(self.peak_mb, peak_mb)
+            if peak_mb > self._snapshot_peak_mb * 1.1:
+                self._snapshot_peak_mb = peak_mb
+                self.top_sites = self.allocation_sites(stage)
+
+    def allocation_sites(self, stage: str = '') -> List[Dict]:
+        """Maiores pontos de alocação ainda vivos (arquivo:linha)"""
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+        ))
+        return [{
+            'local': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            'mb': round(stat.size / MB, 3),
+            'blocos': stat.count,
+            'etapa': stage,
+        } for stat in snapshot.statistics('lineno')[:self.top]]
+
+    def start(self) -> 'MemoryTracker':
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracing = True
+        self.source.add_listener(self._on_stage)
+        return self
+
+    def stop(self):
+        self.source.remove_listener(self._on_stage)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def summary(self) -> Dict:
+        return {
+            'pico_tracemalloc_mb': round(self.peak_mb, 2),
+            'rss_pico_mb': peak_rss_mb(),
+            'etapas': {stage: {key: round(value, 2) for key, value in entry.items()}
+                       for stage, entry in sorted(self.stages.items())},
+            'maiores_alocacoes': self.top_sites,
+        }
+
+    def save_report(self, run_id: str, directory: Optional[str] = None) -> str:
+        """Grava dados/memoria/memoria_<run_id>.json e registra o resumo no log"""
+        directory = directory or os.path.join(dados_dir, 'memoria')
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"memoria_{run_id}.json")
+        summary = self.summary()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(dict(summary, gerado_em=datetime.now().isoformat(timespec='seconds')),
+                      f, ensure_ascii=False, indent=2)
+
+        logging.info(f"🧠 Memória: pico tracemalloc {summary['pico_tracemalloc_mb']} MB, "
+                     f"pico RSS {summary['rss_pico_mb']} MB")
+        for stage, entry in summary['etapas'].items():
+            logging.info(f"   {stage}: tracemalloc {entry['pico_tracemalloc_mb']} MB, RSS {entry['rss_pico_mb']} MB")
+        for site in summary['maiores_alocacoes'][:5]:
+            logging.info(f"   📍 {site['local']}: {site['mb']} MB")
+        logging.info(f"   Relatório: {path}")
+        return path
+
+
+class MemoryBudget:
+    """Orçamento de RSS em MB: exceeded() diz se o processo passou do limite"""
+
+    def __init__(self, limit_mb: float):
+        self.limit_mb = limit_mb
+        self.events = 0
+        self._over = False
+
+    def exceeded(self) -> bool:
+        rss = rss_mb()
+        over = rss is not None and rss > self.limit_mb
+        if over and not self._over:
+            # Uma coleta completa antes de segurar a extração: ciclos de objetos (sopas) liberados
+            gc.collect()
+            rss = rss_mb()
+            over = rss > self.limit_mb
+            if over:
+                self.events += 1
+                logging.warning(f"⚠️ Memória acima do orçamento ({rss:.0f} MB > {self.limit_mb:.0f} MB): "
+                                f"segurando novas requisições e gravando os lotes")
+        elif not over and self._over:
+            logging.info(f"✅ Memória de volta ao orçamento ({rss:.0f} MB)")
+        self._over = over
+        return over
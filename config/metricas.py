@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Métricas do scraper (contadores, gauges e histogramas) no formato do Prometheus
+Gravadas em um arquivo .prom para o textfile collector do node_exporter, ao final
+de cada execução e periodicamente durante execuções longas (TextfileExporter).
+Implementação só com a biblioteca padrão: não exige prometheus_client no crawler
+
+Arquivo padrão: dados/metricas/scraper.prom (ou SCRAPER_METRICS_TEXTFILE), ex.:
+    SCRAPER_METRICS_TEXTFILE=/var/lib/node_exporter/textfile_collector/scraper.prom
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from instrumentacao import instrumentation
+
+dados_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'dados')
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """Base: nome, ajuda, nomes dos rótulos e valores por combinação de rótulos"""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: rótulos esperados {self.labelnames}, recebidos {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        with self._lock:
+            return [(self.name, dict(zip(self.labelnames, key)), value) for key, value in self._values.items()]
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for name, labels, value in self._samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        key = self._key(labels)
+        with self._lock:
+            return self._values.get(key, 0.0)
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observa a duração do bloco (segundos)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        samples = []
+        for _, labels, (counts, total) in super()._samples():
+            for bound, count in zip(self.buckets, counts):
+                samples.append((f"{self.name}_bucket", dict(labels, le=_format_value(bound)), count))
+            samples.append((f"{self.name}_sum", labels, total))
+            samples.append((f"{self.name}_count", labels, counts[-1]))
+        return samples
+
+
+class MetricsRegistry:
+    """Conjunto de métricas renderizado em um único arquivo"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self) -> str:
+        return '\n'.join(metric.render() for metric in self._metrics.values()) + '\n'
+
+
+registry = MetricsRegistry()
+
+# Etapas (alimentadas pela instrumentação: descoberta, download, parse, gravacao, produto...)
+STAGE_DURATION = registry.histogram('scraper_stage_duration_seconds', 'Duração de cada execução da etapa',
+                                    ['stage'])
+STAGE_CPU = registry.counter('scraper_stage_cpu_seconds_total', 'Tempo de CPU gasto na etapa', ['stage'])
+
+# HTTP
+HTTP_REQUESTS = registry.counter('scraper_http_requests_total', 'Requisições HTTP por status', ['status'])
+HTTP_BYTES = registry.counter('scraper_http_response_bytes_total', 'Bytes recebidos nas respostas HTTP')
+HTTP_LATENCY = registry.histogram('scraper_http_request_duration_seconds', 'Latência das requisições HTTP')
+
+# Selenium
+SELENIUM_WAIT = registry.counter('scraper_selenium_wait_seconds_total',
+                                 'Tempo parado em esperas do Selenium', ['action'])
+
+# Extração
+PARSE_DURATION = registry.histogram('scraper_parse_duration_seconds', 'Tempo de parse por extrator',
+                                    ['extractor'])
+FIELDS_FOUND = registry.histogram('scraper_product_fields_found', 'Campos nutricionais encontrados por produto',
+                                  buckets=tuple(range(10)))
+PRODUCTS = registry.counter('scraper_products_total', 'Produtos processados por origem dos dados', ['fonte'])
+
+# Memória
+MEMORY_OVER_BUDGET = registry.counter('scraper_memory_over_budget_total',
+                                      'Verificações com o RSS acima do orçamento (contrapressão aplicada)')
+
+# Execução
+RUN_IN_PROGRESS = registry.gauge('scraper_run_in_progress', '1 enquanto uma execução está em andamento')
+RUN_PRODUCTS = registry.gauge('scraper_run_products', 'Produtos da última execução')
+RUN_LAST_SUCCESS = registry.gauge('scraper_run_last_success_timestamp_seconds',
+                                  'Horário (epoch) do fim da última execução bem-sucedida')
+RUN_DURATION = registry.gauge('scraper_run_duration_seconds', 'Duração da última execução')
+
+
+def _record_stage(stage: str, wall: float, cpu: float):
+    STAGE_DURATION.observe(wall, stage=stage)
+    STAGE_CPU.inc(cpu, stage=stage)
+
+
+instrumentation.add_listener(_record_stage)
+
+
+def record_http(response, seconds: float):
+    """Registra uma requisição (response None = falha sem resposta: conexão, timeout...)"""
+    HTTP_LATENCY.observe(seconds)
+    if response is None:
+        HTTP_REQUESTS.inc(status='erro')
+        return
+    HTTP_REQUESTS.inc(status=str(response.status_code))
+    HTTP_BYTES.inc(len(response.content))
+
+
+def default_textfile() -> str:
+    return os.environ.get('SCRAPER_METRICS_TEXTFILE') or os.path.join(dados_dir, 'metricas', 'scraper.prom')
+
+
+def write_textfile(path: str, source: MetricsRegistry = registry):
+    """Grava o arquivo de uma vez (temporário + rename): o collector nunca lê um arquivo pela metade"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(source.render())
+    os.replace(tmp_path, path)
+
+
+class TextfileExporter:
+    """
+    Regrava o arquivo de métricas a cada interval segundos em segundo plano e
+    uma última vez no stop()
+    """
+
+    def __init__(self, path: Optional[str] = None, interval: float = 15.0, source: MetricsRegistry = registry):
+        self.path = path or default_textfile()
+        self.interval = interval
+        self.source = source
+        self._stop = threading.Event()
+        self._thread = None
+
+    def write(self):
+        try:
+            write_textfile(self.path, self.source)
+        except OSError as e:
+            logging.warning(f"⚠️ Não foi possível gravar as métricas em {self.path}: {e}")
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def start(self) -> 'TextfileExporter':
+        if self.interval > 0:
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.write()
+        logging.info(f"📈 Métricas gravadas em: {self.path}")
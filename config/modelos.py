@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Registro tipado de um produto (ProductNutrition) com __slots__
+Nutrientes como float/None (None = não encontrado, e não 0) e a origem do dado.
+Para pandas e Arrow as colunas são montadas percorrendo os atributos dos registros
+(uma lista por campo, sem um dicionário por linha; os valores são copiados)
+"""
+
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional
+
+# pandas só é importado pelas conversões de DataFrame: gravadores e banco usam o módulo sem ele
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Campos nutricionais (rótulo das colunas de saída) -> atributo do registro
+NUTRIENT_ATTRS = {
+    'PORÇÃO (g)': 'porcao_g',
+    'CALORIAS (kcal)': 'calorias_kcal',
+    'CARBOIDRATOS (g)': 'carboidratos_g',
+    'PROTEÍNAS (g)': 'proteinas_g',
+    'GORDURAS_TOTAIS (g)': 'gorduras_totais_g',
+    'GORDURAS_SATURADAS (g)': 'gorduras_saturadas_g',
+    'FIBRAS (g)': 'fibras_g',
+    'AÇÚCARES (g)': 'acucares_g',
+    'SÓDIO (mg)': 'sodio_mg',
+}
+
+# Rótulo de todas as colunas -> atributo (inclui texto e o momento da coleta)
+FIELD_ATTRS = {'URL': 'url', 'NOME_PRODUTO': 'nome', **NUTRIENT_ATTRS, 'DATA_COLETA': 'coletado_em'}
+
+# Origem do registro
+FONTE_TABELA = 'tabela_html'
+FONTE_SEM_TABELA = 'sem_tabela'
+FONTE_ERRO = 'erro_pagina'
+FONTE_FALLBACK = 'tabela_html_coluna_alternativa'
+
+
+def parse_float(value) -> Optional[float]:
+    """
+    Converte o valor extraído ('5,1', '21', 21.0) em float; ausente ('' ou None) ou
+    inválido vira None, e não 0 (usado também pelos gravadores e pelo banco)
+    """
+    if value is None or value == '':
+        return None
+    try:
+        return float(str(value).replace(',', '.')) if isinstance(value, str) else float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ProductNutrition:
+    """
+    Dados nutricionais de um produto. Aceita acesso pelo rótulo da coluna
+    (record['PROTEÍNAS (g)'] / record.get(...)) para os gravadores e o banco
+    """
+
+    # unidades: {atributo: unidade extraída} até a normalização (depois, None)
+    __slots__ = ('url', 'nome', *NUTRIENT_ATTRS.values(), 'fonte', 'coletado_em', 'unidades')
+
+    def __init__(self, url: str, nome: str = '', fonte: str = FONTE_TABELA,
+                 coletado_em: Optional[datetime] = None, unidades: Optional[Dict[str, str]] = None,
+                 **nutrients: Optional[float]):
+        self.url = url
+        self.nome = nome
+        self.fonte = fonte
+        self.coletado_em = coletado_em or datetime.now(timezone.utc)
+        self.unidades = unidades
+        for attr in NUTRIENT_ATTRS.values():
+            setattr(self, attr, nutrients.pop(attr, None))
+        if nutrients:
+            raise TypeError(f"Campos desconhecidos: {', '.join(nutrients)}")
+
+    @classmethod
+    def from_fields(cls, url: str, nome: str, values: Dict,
+                    fonte: str = FONTE_TABELA) -> 'ProductNutrition':
+        """
+        Cria o registro a partir de {rótulo da coluna: texto extraído} ou
+        {rótulo da coluna: (valor, unidade)}; as unidades ficam para a normalização
+        """
+        nutrients = {}
+        units = {}
+        for field, value in values.items():
+            if field not in NUTRIENT_ATTRS:
+                continue
+            attr = NUTRIENT_ATTRS[field]
+            if isinstance(value, tuple):
+                value, unit = value
+                if unit:
+                    units[attr] = unit
+            nutrients[attr] = parse_float(value)
+        return cls(url, nome, fonte=fonte, unidades=units or None, **nutrients)
+
+    def __getitem__(self, field: str):
+        try:
+            return getattr(self, FIELD_ATTRS[field])
+        except KeyError:
+            raise KeyError(field) from None
+
+    def get(self, field: str, default=None):
+        attr = FIELD_ATTRS.get(field)
+        return getattr(self, attr) if attr else default
+
+    def nutrients(self) -> Dict[str, Optional[float]]:
+        return {field: getattr(self, attr) for field, attr in NUTRIENT_ATTRS.items()}
+
+    @property
+    def found_fields(self) -> int:
+        """Quantidade de nutrientes encontrados"""
+        return sum(getattr(self, attr) is not None for attr in NUTRIENT_ATTRS.values())
+
+    @property
+    def has_nutrition(self) -> bool:
+        return any(getattr(self, attr) is not None for attr in NUTRIENT_ATTRS.values())
+
+    def to_dict(self) -> Dict:
+        """Registro como {rótulo da coluna: valor}"""
+        return {field: getattr(self, attr) for field, attr in FIELD_ATTRS.items()}
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ProductNutrition):
+            return NotImplemented
+        return all(getattr(self, attr) == getattr(other, attr) for attr in self.__slots__)
+
+    # Igualdade por valor em um registro mutável (normalização e reextração alteram
+    # os campos): não hashable, para não ir parar em set/dict com um hash que muda
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"ProductNutrition(url={self.url!r}, nome={self.nome!r}, fonte={self.fonte!r}, campos={self.found_fields})"
+
+
+def to_columns(records: Iterable[ProductNutrition], fields: List[str]) -> Dict[str, list]:
+    """Monta as colunas (rótulo -> lista de valores) percorrendo os atributos"""
+    records = list(records)
+    return {field: [getattr(record, FIELD_ATTRS[field]) for record in records] for field in fields}
+
+
+def to_dataframe(records: Iterable[ProductNutrition], fields: Optional[List[str]] = None) -> 'pd.DataFrame':
+    """DataFrame com nutrientes float64 (NaN = ausente) na ordem de fields"""
+    import pandas as pd
+    fields = fields or list(FIELD_ATTRS)
+    df = pd.DataFrame(to_columns(records, fields), columns=fields)
+    for field in fields:
+        if field in NUTRIENT_ATTRS:
+            df[field] = df[field].astype('float64')
+    return df
+
+
+def iter_records(df: 'pd.DataFrame') -> Iterator[ProductNutrition]:
+    """Registros a partir de um DataFrame do dataset (NaN = ausente), um de cada vez"""
+    import pandas as pd
+    columns = [field for field in df.columns if field in FIELD_ATTRS]
+    for values in df[columns].itertuples(index=False, name=None):
+        row = {FIELD_ATTRS[field]: None if pd.isna(value) else value for field, value in zip(columns, values)}
+        yield ProductNutrition(row.pop('url'), row.pop('nome', None) or '', **row)
+
+
+def with_nutrition(df: 'pd.DataFrame') -> 'pd.Series':
+    """Máscara dos produtos com algum nutriente (equivale a ProductNutrition.has_nutrition)"""
+    return df[[field for field in NUTRIENT_ATTRS if field in df.columns]].notna().any(axis=1)
+
+
+def to_arrow_table(records: Iterable[ProductNutrition], schema):
+    """Tabela Arrow com o schema informado (ex.: gravadores.build_arrow_schema)"""
+    import pyarrow as pa
+    return pa.Table.from_pydict(to_columns(records, schema.names), schema=schema)
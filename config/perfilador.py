@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Perfilador por amostragem, separado por etapa (descoberta, download, parse, gravacao...)
+Uma thread lê as pilhas de todas as threads a cada intervalo e atribui cada amostra
+à etapa mais interna (entre as escolhidas) em andamento naquela thread. Por medir
+tempo de relógio, as esperas (time.sleep do Selenium, pacer, rede) aparecem como
+frames próprios, separadas do trabalho de CPU.
+
+Saída: logs/perfil_<data>_<etapa>.collapsed (pilhas colapsadas, uma por linha),
+aberta direto no https://www.speedscope.app ou no flamegraph.pl.
+Desligado, o custo é zero: nada é amostrado e as etapas não são rastreadas
+"""
+
+import logging
+import os
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from instrumentacao import (STAGE_DISCOVERY, STAGE_FETCH, STAGE_PARSE, STAGE_PRODUCT, STAGE_SAVE,
+                             STAGE_SELENIUM_WAIT, Instrumentation, instrumentation)
+
+logs_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs')
+
+# Etapas que podem ser escolhidas no --profile
+PROFILE_STAGES = (STAGE_DISCOVERY, STAGE_SELENIUM_WAIT, STAGE_FETCH, STAGE_PARSE, STAGE_SAVE, STAGE_PRODUCT)
+
+# Esperas ociosas (threads paradas em fila/lock, workers do pool sem tarefa): amostras descartadas
+IDLE_FILES = ('threading.py', 'queue.py', 'selectors.py')
+IDLE_FRAMES = ('thread._worker',)
+
+
+def parse_stages(text: Optional[str]) -> List[str]:
+    """'descoberta,parse' -> ['descoberta', 'parse']; vazio ou 'todas' -> todas as etapas"""
+    if not text or text in ('todas', 'all'):
+        return list(PROFILE_STAGES)
+    stages = [stage.strip() for stage in text.split(',') if stage.strip()]
+    invalid = [stage for stage in stages if stage not in PROFILE_STAGES]
+    if invalid:
+        raise ValueError(f"Etapas inválidas para o perfil: {', '.join(invalid)} "
+                         f"(opções: {', '.join(PROFILE_STAGES)})")
+    return stages
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}.{getattr(code, 'co_qualname', code.co_name)}"
+
+
+class StageProfiler:
+    """
+    Amostrador de pilhas por etapa (use como context manager em volta da execução)
+    Threads sem etapa própria (ex.: workers da descoberta HTTP) herdam a etapa da
+    thread que iniciou o perfilador
+    """
+
+    def __init__(self, stages: Iterable[str] = PROFILE_STAGES, interval: float = 0.005,
+                 output_dir: Optional[str] = None, source: Instrumentation = instrumentation):
+        self.stages = set(stages)
+        self.interval = interval
+        self.output_dir = output_dir or logs_dir
+        self.source = source
+        self.samples: Dict[str, Counter] = {stage: Counter() for stage in self.stages}
+        self.files: List[str] = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._owner = None
+
+    def _stage_for(self, thread_id: int) -> Optional[str]:
+        for stage in reversed(self.source.active_stages(thread_id)):
+            if stage in self.stages:
+                return stage
+        return None
+
+    def _sample(self):
+        own = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            stage = self._stage_for(thread_id) or (self._stage_for(self._owner) if thread_id != self._owner else None)
+            if (stage is None or os.path.basename(frame.f_code.co_filename) in IDLE_FILES
+                    or _frame_label(frame) in IDLE_FRAMES):
+                continue
+
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            self.samples[stage][';'.join(reversed(stack))] += 1
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self) -> 'StageProfiler':
+        self._owner = threading.get_ident()
+        self.source.track_active = True
+        self._thread = threading.Thread(target=self._loop, name='perfilador', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> List[str]:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.source.track_active = False
+        return self.write()
+
+    def write(self) -> List[str]:
+        """Grava um arquivo .collapsed por etapa com amostras"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.files = []
+        for stage, stacks in sorted(self.samples.items()):
+            if not stacks:
+                continue
+            path = os.path.join(self.output_dir, f"perfil_{timestamp}_{stage}.collapsed")
+            with open(path, 'w', encoding='utf-8') as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            total = sum(stacks.values())
+            logging.info(f"🔬 Perfil da etapa {stage}: {total} amostras (~{total * self.interval:.1f}s) em {path}")
+            self.files.append(path)
+        return self.files
+
+    def __enter__(self) -> 'StageProfiler':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+def profiled(stages: Optional[str], interval_ms: float = 5.0):
+    """Context manager do perfil escolhido na linha de comando (None = desligado, sem custo)"""
+    if stages is None:
+        from contextlib import nullcontext
+        return nullcontext()
+    return StageProfiler(parse_stages(stages), interval=interval_ms / 1000)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Progresso da extração: produtos/s, bytes/s e taxa de erro na janela recente,
+requisições em andamento e ETA
+Os eventos (started/finished/add_bytes) só atualizam contadores e baldes de 1 s
+(O(1), seguros entre threads); a exibição roda em uma thread própria:
+barra na mesma linha quando o stderr é um terminal, linhas periódicas no log caso contrário
+"""
+
+import logging
+import sys
+import threading
+import time
+from typing import Optional
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return '--:--'
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+
+def format_bytes(value: float) -> str:
+    for unit in ('B', 'KB', 'MB'):
+        if value < 1024:
+            return f"{value:.0f} {unit}" if unit == 'B' else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GB"
+
+
+class ProgressReporter:
+    """
+    Progresso de total produtos, com taxas medidas nos últimos window segundos
+    (anel de baldes de 1 s: cada evento atualiza um balde, a exibição soma a janela)
+    """
+
+    def __init__(self, total: int, window: int = 30, interval: Optional[float] = None,
+                 tty: Optional[bool] = None, stream=None):
+        self.total = total
+        self.window = window
+        self.stream = stream or sys.stderr
+        self.tty = self.stream.isatty() if tty is None else tty
+        # Terminal: redesenha a barra a cada 0,5 s; log: uma linha a cada 30 s
+        self.interval = interval or (0.5 if self.tty else 30.0)
+
+        self.done = 0
+        self.errors = 0
+        self.bytes = 0
+        self.in_flight = 0
+        self._seconds = [-1] * window
+        self._done = [0] * window
+        self._errors = [0] * window
+        self._bytes = [0] * window
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._start = None
+
+    def _slot(self) -> int:
+        """Balde do segundo atual (zerado quando o anel dá a volta); chamar com o lock"""
+        second = int(time.monotonic())
+        i = second % self.window
+        if self._seconds[i] != second:
+            self._seconds[i] = second
+            self._done[i] = self._errors[i] = self._bytes[i] = 0
+        return i
+
+    def started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def finished(self, error: bool = False):
+        with self._lock:
+            i = self._slot()
+            self.in_flight -= 1
+            self.done += 1
+            self._done[i] += 1
+            if error:
+                self.errors += 1
+                self._errors[i] += 1
+
+    def add_bytes(self, amount: int):
+        with self._lock:
+            self._bytes[self._slot()] += amount
+            self.bytes += amount
+
+    def snapshot(self) -> dict:
+        """Estado atual com as taxas da janela recente"""
+        with self._lock:
+            now = int(time.monotonic())
+            recent = [i for i, second in enumerate(self._seconds) if now - self.window < second <= now]
+            done = sum(self._done[i] for i in recent)
+            errors = sum(self._errors[i] for i in recent)
+            nbytes = sum(self._bytes[i] for i in recent)
+            state = {'feitos': self.done, 'total': self.total, 'erros': self.errors, 'em_andamento': self.in_flight}
+
+        elapsed = time.monotonic() - self._start if self._start else 0.0
+        span = max(min(float(self.window), elapsed), 1e-9)
+        rate = done / span
+        remaining = max(self.total - state['feitos'], 0)
+        state.update({
+            'produtos_por_s': rate,
+            'bytes_por_s': nbytes / span,
+            'taxa_erro': errors / done if done else 0.0,
+            'eta_s': remaining / rate if rate > 0 else (0.0 if not remaining else None),
+            'decorrido_s': elapsed,
+        })
+        return state
+
+    def render(self) -> str:
+        s = self.snapshot()
+        percent = s['feitos'] / s['total'] if s['total'] else 1.0
+        return (f"{s['feitos']}/{s['total']} ({percent:.1%}) | {s['produtos_por_s']:.1f} prod/s | "
+                f"{format_bytes(s['bytes_por_s'])}/s | erros {s['taxa_erro']:.1%} | "
+                f"em andamento {s['em_andamento']} | ETA {format_duration(s['eta_s'])}")
+
+    def _draw(self, final: bool = False):
+        if self.tty:
+            done = self.done / self.total if self.total else 1.0
+            filled = int(done * 25)
+            bar = '█' * filled + '░' * (25 - filled)
+            self.stream.write(f"\r\033[K📦 [{bar}] {self.render()}" + ('\n' if final else ''))
+            self.stream.flush()
+        elif not final:
+            logging.info(f"⏱️ Progresso: {self.render()}")
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self._draw()
+
+    def start(self) -> 'ProgressReporter':
+        self._start = time.monotonic()
+        self._thread = threading.Thread(target=self._loop, name='progresso', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self._draw(final=True)
+        elapsed = time.monotonic() - self._start if self._start else 0.0
+        average = self.done / elapsed if elapsed > 0 else 0.0
+        logging.info(f"⏱️ {self.done}/{self.total} produtos em {format_duration(elapsed)} "
+                     f"({average:.1f} prod/s, {self.errors} erros, {format_bytes(self.bytes)} baixados)")
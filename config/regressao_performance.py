@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Checagem de regressão de desempenho contra uma baseline versionada
+Executa as suítes offline várias vezes, resume cada métrica por mediana e IQR e
+compara com config/baseline_performance.json:
+- parsers: tempo por página, pico de alocação e acurácia (geral e por layout do corpus) de
+  cada extrator (benchmark_parsers)
+- vazao: produtos/s, latência p95, CPU por produto em cada etapa e pico de RSS
+  de uma execução completa contra a loja local (benchmark_throughput)
+Uma métrica regride quando piora além de max(tolerância relativa, k × IQR); o
+comando imprime a diferença por suíte/etapa e sai com código 1 se algo regrediu.
+A baseline só vale para a máquina onde foi gerada: atualize-a no ambiente da CI
+
+Uso:
+    python config/regressao_performance.py [--suites parsers,vazao] [--repeticoes 5]
+    python config/regressao_performance.py --atualizar-baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from instrumentacao import STAGE_DISCOVERY, percentile
+
+baseline_file = os.path.join(os.path.dirname(__file__), 'baseline_performance.json')
+
+SUITES = ('parsers', 'vazao')
+
+# Tolerâncias relativas por tipo de métrica e multiplicador do IQR
+TOLERANCES = {'tempo': 0.25, 'memoria': 0.15, 'acuracia': 0.0}
+IQR_FACTOR = 1.5
+
+# Parâmetros da suíte de vazão (pequena o bastante para rodar a cada mudança)
+THROUGHPUT_PRODUCTS = 300
+THROUGHPUT_WORKERS = 1
+
+
+def metric(value: float, kind: str, higher_is_better: bool = False) -> Dict:
+    return {'valor': value, 'tipo': kind, 'maior_melhor': higher_is_better}
+
+
+def run_parsers_suite(backends: List[str]) -> Dict[str, Dict]:
+    """Uma rodada do benchmark dos extratores -> {métrica: valor}"""
+    from benchmark_parsers import run_benchmark
+
+    results = run_benchmark(repetitions=5, backends=backends)
+    metrics = {}
+    for r in results['resultados']:
+        prefix = f"parsers/{r['extrator']}/{r['backend']}"
+        metrics[f"{prefix}/tempo_pagina_us"] = metric(r['mediana_us'], 'tempo')
+        metrics[f"{prefix}/pico_alocacao_kb"] = metric(r['pico_alocacao_kb'], 'memoria')
+        metrics[f"{prefix}/acuracia"] = metric(r['acuracia'], 'acuracia', higher_is_better=True)
+        # Por layout do corpus: uma queda localizada (ex.: coluna por 100 g no lugar da porção) não se dilui na média
+        for layout, accuracy in r['acuracia_por_layout'].items():
+            metrics[f"{prefix}/acuracia_{layout}"] = metric(accuracy, 'acuracia', higher_is_better=True)
+    return metrics
+
+
+def run_throughput_suite(base_url: str) -> Dict[str, Dict]:
+    """Uma execução completa do scraper contra a loja local -> {métrica: valor}"""
+    from benchmark_throughput import run_case_subprocess
+
+    result = run_case_subprocess(base_url, THROUGHPUT_WORKERS, 0.0)
+    collected = max(result['coletados'], 1)
+    metrics = {
+        'vazao/total/produtos_por_s': metric(result['produtos_por_s'], 'tempo', higher_is_better=True),
+        'vazao/total/latencia_p95_ms': metric(result['latencia_produto_ms']['p95'], 'tempo'),
+    }
+    if result['rss_pico_mb'] is not None:
+        metrics['vazao/total/rss_pico_mb'] = metric(result['rss_pico_mb'], 'memoria')
+    for stage, values in result['etapas'].items():
+        if stage == STAGE_DISCOVERY:
+            # A descoberta roda nas threads do coletor: o tempo de CPU da thread principal não a representa
+            metrics[f"vazao/{stage}/relogio_ms"] = metric(values['relogio_s'] * 1000, 'tempo')
+        else:
+            metrics[f"vazao/{stage}/cpu_ms_por_produto"] = metric(values['cpu_s'] * 1000 / collected, 'tempo')
+    return metrics
+
+
+def collect(suites: List[str], repetitions: int, backends: List[str]) -> Dict[str, Dict]:
+    """Executa as suítes repetidas vezes e resume cada métrica (mediana e IQR)"""
+    samples: Dict[str, Dict] = {}
+
+    def add(metrics: Dict[str, Dict]):
+        for name, entry in metrics.items():
+            summary = samples.setdefault(name, {'tipo': entry['tipo'], 'maior_melhor': entry['maior_melhor'],
+                                                'amostras': []})
+            summary['amostras'].append(entry['valor'])
+
+    if 'parsers' in suites:
+        for i in range(repetitions):
+            print(f"   🧩 parsers #{i + 1}/{repetitions}")
+            add(run_parsers_suite(backends))
+
+    if 'vazao' in suites:
+        from loja_local import MockCatalog, start_store
+
+        server, base_url = start_store(MockCatalog(THROUGHPUT_PRODUCTS, page_size=50))
+        try:
+            for i in range(repetitions):
+                print(f"   🚚 vazao #{i + 1}/{repetitions}")
+                add(run_throughput_suite(base_url))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    for summary in samples.values():
+        values = summary['amostras']
+        summary['mediana'] = round(statistics.median(values), 4)
+        summary['iqr'] = round(percentile(values, 75) - percentile(values, 25), 4)
+    return samples
+
+
+def compare(baseline: Dict[str, Dict], current: Dict[str, Dict],
+            tolerances: Dict[str, float] = TOLERANCES) -> List[Dict]:
+    """
+    Compara as medianas: a diferença só conta quando passa de
+    max(tolerância × mediana da baseline, IQR_FACTOR × maior IQR)
+    """
+    rows = []
+    for name in sorted(set(baseline) | set(current)):
+        base, cur = baseline.get(name), current.get(name)
+        if base is None or cur is None:
+            rows.append({'metrica': name, 'status': 'nova' if base is None else 'ausente',
+                         'baseline': base, 'atual': cur, 'variacao': None})
+            continue
+
+        delta = cur['mediana'] - base['mediana']
+        threshold = max(tolerances.get(base['tipo'], 0.0) * abs(base['mediana']),
+                        IQR_FACTOR * max(base['iqr'], cur['iqr']))
+        worse = -delta if base['maior_melhor'] else delta
+        if worse > threshold:
+            status = 'regressao'
+        elif -worse > threshold:
+            status = 'melhora'
+        else:
+            status = 'ok'
+        rows.append({'metrica': name, 'status': status, 'baseline': base, 'atual': cur,
+                     'variacao': delta / base['mediana'] if base['mediana'] else None})
+    return rows
+
+
+STATUS_ICONS = {'ok': '✅', 'melhora': '🚀', 'regressao': '❌', 'nova': '🆕', 'ausente': '➖'}
+
+
+def print_report(rows: List[Dict]):
+    """Tabela agrupada por suíte/etapa: baseline, atual (mediana ± IQR) e variação"""
+    group = None
+    for row in rows:
+        suite, stage, name = row['metrica'].split('/', 2) if row['metrica'].count('/') >= 2 else (
+            row['metrica'], '', '')
+        if (suite, stage) != group:
+            group = (suite, stage)
+            print(f"\n📂 {suite} / {stage}")
+
+        def fmt(summary: Optional[Dict]) -> str:
+            return '-' if summary is None else f"{summary['mediana']:g} ± {summary['iqr']:g}"
+
+        change = '' if row['variacao'] is None else f"{row['variacao']:+.1%}"
+        print(f"   {STATUS_ICONS[row['status']]} {name:<32}{fmt(row['baseline']):>22}{fmt(row['atual']):>22}{change:>9}")
+
+
+def load_baseline(path: str) -> Optional[Dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main() -> int:
+    """Função principal (retorna o código de saída)"""
+    parser = argparse.ArgumentParser(description="Checagem de regressão de desempenho")
+    parser.add_argument('--suites', default=','.join(SUITES), help="Suítes separadas por vírgula")
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--backends', default='html.parser', help="Backends do BeautifulSoup (suíte parsers)")
+    parser.add_argument('--baseline', default=baseline_file)
+    parser.add_argument('--atualizar-baseline', action='store_true', help="Grava as medições como nova baseline")
+    parser.add_argument('--tolerancia-tempo', type=float, default=TOLERANCES['tempo'])
+    parser.add_argument('--tolerancia-memoria', type=float, default=TOLERANCES['memoria'])
+    parser.add_argument('--saida', help="Grava o relatório da comparação em JSON")
+    args = parser.parse_args()
+
+    suites = [suite.strip() for suite in args.suites.split(',') if suite.strip()]
+    for suite in suites:
+        if suite not in SUITES:
+            parser.error(f"Suíte inválida: {suite} (opções: {', '.join(SUITES)})")
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None and not args.atualizar_baseline:
+        print(f"❌ Baseline não encontrada: {args.baseline} (gere com --atualizar-baseline)")
+        return 2
+
+    print("⏱️  REGRESSÃO DE DESEMPENHO")
+    print("=" * 60)
+    current = collect(suites, args.repeticoes, args.backends.split(','))
+
+    if args.atualizar_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({
+                'gerado_em': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'plataforma': platform.platform(),
+                'repeticoes': args.repeticoes,
+                'metricas': current,
+            }, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f"\n💾 Baseline atualizada: {args.baseline} ({len(current)} métricas)")
+        return 0
+
+    # Só compara as suítes executadas
+    reference = {name: summary for name, summary in baseline['metricas'].items() if name.split('/')[0] in suites}
+    tolerances = dict(TOLERANCES, tempo=args.tolerancia_tempo, memoria=args.tolerancia_memoria)
+    rows = compare(reference, current, tolerances)
+
+    print(f"\n📏 Baseline de {baseline['gerado_em']} ({baseline['plataforma']}, Python {baseline['python']})")
+    print_report(rows)
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+
+    regressions = [row['metrica'] for row in rows if row['status'] == 'regressao']
+    print("\n" + "=" * 60)
+    if regressions:
+        print(f"❌ {len(regressions)} métricas regrediram além da tolerância:")
+        for name in regressions:
+            print(f"   - {name}")
+        return 1
+    print("✅ Nenhuma regressão além da tolerância")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
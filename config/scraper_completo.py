@@ -5,6 +5,8 @@ Inclui Selenium para carregar todos os produtos clicando em 'Ver mais produtos'
 Configurado para 8 cliques máximos com 5 segundos entre cliques
 """
 
+import argparse
+import importlib.util
 import requests
 from bs4 import BeautifulSoup
 import csv
@@ -15,45 +17,31 @@ from typing import List, Dict, Optional
 import logging
 import pandas as pd
 from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, ElementClickInterceptedException
 import os
 import platform
 
-# Configuração do logging (arquivo salvo na pasta logs/)
+from banco_dados import NutritionStore
+from exportar_excel import export_excel
+from gravadores import CSVStreamWriter, NDJSONStreamWriter, PYARROW_AVAILABLE
+from log_config import setup_logging
+from modelos import iter_records, with_nutrition
+
+# Pasta de dados (o logging é configurado no main: logs/scraper_completo.log)
 dados_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'dados')
-logs_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs')
 os.makedirs(dados_dir, exist_ok=True)
-os.makedirs(logs_dir, exist_ok=True)
-log_file = os.path.join(logs_dir, 'scraper_completo.log')
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler()
-    ]
-)
 
-# Importar webdriver-manager
-try:
-    from webdriver_manager.chrome import ChromeDriverManager
-    WEBDRIVER_MANAGER_AVAILABLE = True
-except ImportError:
-    WEBDRIVER_MANAGER_AVAILABLE = False
-    logging.warning("⚠️ webdriver-manager não encontrado. Usando ChromeDriver padrão.")
+# Selenium e webdriver-manager só são importados quando o navegador é usado (setup_driver)
+WEBDRIVER_MANAGER_AVAILABLE = importlib.util.find_spec('webdriver_manager') is not None
 
 class CompleteNutritionalScraper:
     """
     Scraper completo para dados nutricionais da Integralmedica
     """
     
-    def __init__(self, headless: bool = True):
-        self.base_url = "https://www.integralmedica.com.br"
+    def __init__(self, headless: bool = True, base_url: Optional[str] = None,
+                 keep_snapshots: Optional[int] = None):
+        # URL base da loja (SCRAPER_BASE_URL ou base_url apontam para outra loja, ex.: loja_local.py)
+        self.base_url = (base_url or os.environ.get('SCRAPER_BASE_URL') or "https://www.integralmedica.com.br").rstrip('/')
         self.products_url = f"{self.base_url}/todos-os-produtos"
         self.headless = headless
         
@@ -79,6 +67,13 @@ class CompleteNutritionalScraper:
         
         self.driver = None
         
+        # Gravadores incrementais abertos durante a coleta (ver open_writers)
+        self.writers = []
+        
+        # Arquivos CSV/XLSX/NDJSON com timestamp mantidos em dados/ (o histórico completo
+        # fica em dados/historico/); None = manter todos (remoção só quando pedida)
+        self.keep_snapshots = keep_snapshots
+        
     def detect_browser_path(self):
         """Detecta automaticamente qual navegador está disponível no sistema"""
         system = platform.system().lower()
@@ -116,6 +111,10 @@ class CompleteNutritionalScraper:
 
     def setup_driver(self):
         """Configura o WebDriver Chrome com compatibilidade multiplataforma"""
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
+        
         chrome_options = Options()
         chrome_options.add_argument('--no-sandbox')
         chrome_options.add_argument('--disable-dev-shm-usage')
@@ -137,12 +136,14 @@ class CompleteNutritionalScraper:
             
             # Segunda tentativa: WebDriver Manager
             if WEBDRIVER_MANAGER_AVAILABLE:
+                from webdriver_manager.chrome import ChromeDriverManager
                 service = Service(ChromeDriverManager().install())
                 self.driver = webdriver.Chrome(service=service, options=chrome_options)
                 logging.info("✅ WebDriver configurado com WebDriver Manager")
                 return True
             
             # Terceira tentativa: ChromeDriver padrão
+            logging.warning("⚠️ webdriver-manager não encontrado. Usando ChromeDriver padrão.")
             self.driver = webdriver.Chrome(options=chrome_options)
             logging.info("✅ WebDriver configurado com ChromeDriver padrão")
             return True
@@ -156,6 +157,9 @@ class CompleteNutritionalScraper:
         Carrega todos os produtos clicando no botão 'Ver mais produtos'
         Faz até 8 cliques com 5 segundos de espera entre cada clique
         """
+        from selenium.common.exceptions import ElementClickInterceptedException, NoSuchElementException
+        from selenium.webdriver.common.by import By
+        
         if not self.driver:
             self.setup_driver()
         
@@ -336,23 +340,13 @@ class CompleteNutritionalScraper:
                     logging.error(f"Falhou após {max_retries} tentativas para {url}")
                     return None
     
-    def extract_nutritional_data(self, soup: BeautifulSoup, product_url: str) -> Dict[str, str]:
+    def extract_nutritional_data(self, soup: BeautifulSoup, product_url: str) -> Dict[str, Optional[str]]:
         """
         Extrai dados nutricionais de uma página de produto
         """
-        # Inicializar dados com valores padrão
-        nutritional_data = {
-            'URL': product_url,
-            'PORÇÃO (g)': '0',
-            'CALORIAS (kcal)': '0',
-            'CARBOIDRATOS (g)': '0',
-            'PROTEÍNAS (g)': '0',
-            'GORDURAS_TOTAIS (g)': '0',
-            'GORDURAS_SATURADAS (g)': '0',
-            'FIBRAS (g)': '0',
-            'AÇÚCARES (g)': '0',
-            'SÓDIO (mg)': '0'
-        }
+        # Campos não encontrados ficam None (um "0 g" da tabela é um zero de verdade)
+        nutritional_data = {field: None for field in self.nutritional_fields}
+        nutritional_data['URL'] = product_url
         
         # Procurar tabela nutricional
         nutrition_selectors = [
@@ -396,7 +390,7 @@ class CompleteNutritionalScraper:
         
         return nutritional_data
     
-    def _parse_nutrition_table(self, container: BeautifulSoup, data: Dict[str, str]):
+    def _parse_nutrition_table(self, container: BeautifulSoup, data: Dict[str, Optional[str]]):
         """
         Faz parsing da tabela nutricional
         """
@@ -491,16 +485,18 @@ class CompleteNutritionalScraper:
                 if product_soup:
                     nutritional_data = self.extract_nutritional_data(product_soup, url)
                     all_nutritional_data.append(nutritional_data)
+                    self._write_row(nutritional_data)
                     
                     # Log do progresso
-                    non_zero_fields = sum(1 for field in self.nutritional_fields[1:] if nutritional_data[field] != '0')
+                    non_zero_fields = sum(1 for field in self.nutritional_fields[1:] if nutritional_data[field] is not None)
                     logging.info(f"📊 Produto {i} - {non_zero_fields}/{len(self.nutritional_fields)-1} campos nutricionais encontrados")
                 else:
                     logging.error(f"❌ Não foi possível carregar produto {i}: {url}")
                     # Adicionar entrada vazia para manter consistência
-                    empty_data = {field: '0' for field in self.nutritional_fields}
+                    empty_data = {field: None for field in self.nutritional_fields}
                     empty_data['URL'] = url
                     all_nutritional_data.append(empty_data)
+                    self._write_row(empty_data)
             
             return all_nutritional_data
             
@@ -510,7 +506,34 @@ class CompleteNutritionalScraper:
                 self.driver.quit()
                 logging.info("🔒 WebDriver fechado")
     
-    def save_data(self, data: List[Dict[str, str]], base_filename: str = 'produtos_nutricional_completo'):
+    def open_writers(self, base_filename: str = 'produtos_nutricional_completo') -> str:
+        """
+        Abre os gravadores incrementais (CSV e NDJSON) em dados/csv/ e retorna o timestamp usado
+        """
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        csv_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'dados', 'csv')
+        self.writers = [
+            CSVStreamWriter(os.path.join(csv_dir, f"{base_filename}_{timestamp}.csv"), self.nutritional_fields),
+            NDJSONStreamWriter(os.path.join(csv_dir, f"{base_filename}_{timestamp}.ndjson"), self.nutritional_fields)
+        ]
+        return timestamp
+    
+    def _write_row(self, row: Dict[str, str]):
+        """Envia uma linha para os gravadores incrementais abertos"""
+        for writer in self.writers:
+            writer.write_row(row)
+    
+    def close_writers(self, publish: bool = True):
+        """Finaliza (publica) ou apenas fecha os gravadores incrementais"""
+        for writer in self.writers:
+            if publish:
+                writer.finalize()
+            else:
+                writer.close()
+        self.writers = []
+    
+    def save_data(self, data: List[Dict[str, str]], base_filename: str = 'produtos_nutricional_completo',
+                  timestamp: Optional[str] = None, write_csv: bool = True):
         """
         Salva dados em CSV e Excel usando pandas
         """
@@ -525,30 +548,62 @@ class CompleteNutritionalScraper:
             # Garantir que as colunas estejam na ordem correta
             df = df[self.nutritional_fields]
             
-            # Converter campos numéricos para float (exceto URL)
+            # Converter campos numéricos para float (exceto URL); não encontrado fica NaN, e não 0
             numeric_fields = [field for field in self.nutritional_fields if field != 'URL']
             for field in numeric_fields:
-                df[field] = pd.to_numeric(df[field], errors='coerce').fillna(0)
+                df[field] = pd.to_numeric(df[field], errors='coerce')
             
             # Adicionar timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
             csv_filename = f"{base_filename}_{timestamp}.csv"
             excel_filename = f"{base_filename}_{timestamp}.xlsx"
             
             # Salvar CSV
-            self._save_to_csv(df, csv_filename)
+            if write_csv:
+                self._save_to_csv(df, csv_filename)
             
             # Salvar Excel
             self._save_to_excel(df, excel_filename)
             
+            # Gravar no banco SQLite (upsert por URL + observações da execução), a partir
+            # do mesmo DataFrame que vai para o histórico
+            store = NutritionStore()
+            try:
+                store.save_run(timestamp, iter_records(df))
+            finally:
+                store.close()
+            
+            # Histórico particionado por mês e limpeza dos arquivos antigos com timestamp
+            self._save_to_history(df, base_filename, timestamp)
+            
             # Estatísticas
-            products_with_nutrition = len(df[df[numeric_fields].sum(axis=1) > 0])
+            products_with_nutrition = int(with_nutrition(df).sum())
             logging.info(f"📊 Total de produtos: {len(df)}")
             logging.info(f"📈 Produtos com dados nutricionais: {products_with_nutrition}/{len(df)}")
             
         except Exception as e:
             logging.error(f"Erro ao processar dados: {e}")
     
+    def _save_to_history(self, df: pd.DataFrame, base_filename: str, timestamp: str):
+        """
+        Adiciona a execução ao histórico em Parquet e, só depois disso, remove os
+        arquivos com timestamp além dos keep_snapshots mais recentes
+        """
+        if not PYARROW_AVAILABLE:
+            logging.warning("⚠️ pyarrow não encontrado. Histórico em Parquet desativado.")
+            return
+        
+        from historico import HistoryStore, prune_snapshots
+        
+        store = HistoryStore()
+        store.append_run(df, timestamp)
+        store.compact()
+        
+        if self.keep_snapshots:
+            dados_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'dados')
+            for subdir, extension in (('csv', 'csv'), ('csv', 'ndjson'), ('excel', 'xlsx')):
+                prune_snapshots(os.path.join(dados_dir, subdir, f"{base_filename}_*.{extension}"), self.keep_snapshots)
+    
     def _save_to_csv(self, df: pd.DataFrame, filename: str):
         """
         Salva DataFrame em CSV na pasta dados/csv/
@@ -576,30 +631,8 @@ class CompleteNutritionalScraper:
             os.makedirs(excel_dir, exist_ok=True)
             filepath = os.path.join(excel_dir, filename)
             
-            # Salvar Excel com formatação
-            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Dados Nutricionais', index=False)
-                
-                # Obter worksheet para formatação
-                worksheet = writer.sheets['Dados Nutricionais']
-                
-                # Ajustar largura das colunas
-                for column in worksheet.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    adjusted_width = min(max_length + 2, 50)
-                    worksheet.column_dimensions[column_letter].width = adjusted_width
-                
-                # Formatação do cabeçalho
-                for cell in worksheet[1]:
-                    cell.font = cell.font.copy(bold=True)
-                    cell.fill = cell.fill.copy(start_color="CCCCCC")
+            # Salvar Excel com formatação (escrita em memória constante)
+            export_excel(df, filepath, sheet_name='Dados Nutricionais', header_style=True)
             
             logging.info(f"📊 Excel salvo em: {filepath}")
             
@@ -612,10 +645,17 @@ class CompleteNutritionalScraper:
         """
         logging.info("=== 🚀 Iniciando Scraper Completo da Integralmedica ===")
         
-        nutritional_data = self.scrape_all_products()
+        # CSV/NDJSON são gravados à medida que cada produto é processado
+        timestamp = self.open_writers()
+        try:
+            nutritional_data = self.scrape_all_products()
+        except BaseException:
+            self.close_writers(publish=False)
+            raise
         
         if nutritional_data:
-            self.save_data(nutritional_data)
+            self.close_writers()
+            self.save_data(nutritional_data, timestamp=timestamp, write_csv=False)
             
             print(f"\n✅ Scraping concluído com sucesso!")
             print(f"📦 {len(nutritional_data)} produtos processados")
@@ -624,11 +664,14 @@ class CompleteNutritionalScraper:
             print(f"   📊 Excel: dados/excel/")
             
             # Estatísticas
-            products_with_data = sum(1 for product in nutritional_data if any(product[field] != '0' for field in self.nutritional_fields[1:]))
+            products_with_data = sum(1 for product in nutritional_data if any(product[field] is not None for field in self.nutritional_fields[1:]))
             print(f"📈 {products_with_data} produtos com dados nutricionais")
             
             return nutritional_data
         else:
+            for writer in self.writers:
+                writer.discard()
+            self.writers = []
             print("\n❌ Nenhum dado foi coletado. Verifique os logs para mais detalhes.")
             return []
 
@@ -636,6 +679,14 @@ def main():
     """
     Função principal
     """
+    parser = argparse.ArgumentParser(description="Scraper completo da Integral Médica")
+    parser.add_argument('--manter-snapshots', type=int, metavar='N',
+                        help="Remove os CSV/NDJSON/XLSX com timestamp além dos N mais recentes "
+                             "(padrão: manter todos; o histórico fica em dados/historico/)")
+    args = parser.parse_args()
+    
+    setup_logging('scraper_completo')
+    
     # Configurações
     headless = True  # Mude para False se quiser ver o navegador funcionando
     
@@ -644,7 +695,7 @@ def main():
     print("⏱️  5 segundos de espera entre cliques")
     print("🤖 Modo headless:", "Sim" if headless else "Não")
     
-    scraper = CompleteNutritionalScraper(headless=headless)
+    scraper = CompleteNutritionalScraper(headless=headless, keep_snapshots=args.manter_snapshots)
     results = scraper.run()
     
     if results:
@@ -652,7 +703,7 @@ def main():
         for i, product in enumerate(results[:3]):
             print(f"\n{i+1}. {product['URL']}")
             for field in scraper.nutritional_fields[1:]:
-                if product[field] != '0':
+                if product[field] is not None:
                     print(f"   {field}: {product[field]}")
 
 if __name__ == "__main__":
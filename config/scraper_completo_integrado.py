@@ -4,62 +4,136 @@ Script integrado para coletar URLs e dados nutricionais da Integral Médica
 Combina coleta de URLs + extração de dados nutricionais + salvamento em CSV/XLSX
 """
 
+import argparse
 import requests
-from bs4 import BeautifulSoup, Tag
 import re
 import json
-import pandas as pd
 import time
 import logging
 from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, ElementClickInterceptedException
 from urllib.parse import urljoin
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+import importlib.util
 import os
 import platform
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
-# Importar webdriver-manager
-try:
-    from webdriver_manager.chrome import ChromeDriverManager
-    WEBDRIVER_MANAGER_AVAILABLE = True
-except ImportError:
-    WEBDRIVER_MANAGER_AVAILABLE = False
-    logging.warning("⚠️ webdriver-manager não encontrado. Usando ChromeDriver padrão.")
+from inventario_urls import URLInventory, DEFAULT_TTL
+from banco_dados import NutritionStore
+from modelos import (FONTE_ERRO, FONTE_FALLBACK, FONTE_SEM_TABELA, FONTE_TABELA, ProductNutrition, iter_records,
+                     to_dataframe, with_nutrition)
+from gravadores import CSVStreamWriter, NDJSONStreamWriter, ParquetStreamWriter, PYARROW_AVAILABLE
+from instrumentacao import (STAGE_DISCOVERY, STAGE_FETCH, STAGE_PARSE, STAGE_PRODUCT, STAGE_SAVE,
+                            STAGE_SELENIUM_WAIT, instrumentation)
+from log_config import SAMPLED, log_event, setup_logging
+from memoria import MemoryBudget, MemoryTracker
+import metricas
+from progresso import ProgressReporter
+from perfilador import profiled
 
-# Configuração do logging
+if TYPE_CHECKING:
+    import pandas as pd
+    from bs4 import BeautifulSoup
+
+# Selenium e webdriver-manager só são importados quando o navegador é usado (setup_driver);
+# pandas, BeautifulSoup, a tabela nutricional e as saídas (validação, delta, Excel) só nas
+# etapas que os usam: importar o módulo (ex.: main.py --help, descoberta) não paga esses imports
+WEBDRIVER_MANAGER_AVAILABLE = importlib.util.find_spec('webdriver_manager') is not None
+
+# Pastas de dados (o logging é configurado pelo ponto de entrada: log_config.setup_logging)
 dados_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'dados')
-logs_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs')
 os.makedirs(dados_dir, exist_ok=True)
-os.makedirs(logs_dir, exist_ok=True)
 os.makedirs(os.path.join(dados_dir, 'csv'), exist_ok=True)
 os.makedirs(os.path.join(dados_dir, 'excel'), exist_ok=True)
 
-log_file = os.path.join(logs_dir, 'scraper_integrado.log')
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler()
-    ]
-)
+class RequestPacer:
+    """
+    Intervalo mínimo entre o início das requisições, compartilhado entre as threads
+    """
+    
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+    
+    def wait(self):
+        """Aguarda a vez da próxima requisição (a primeira não espera)"""
+        if self.interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        if start > now:
+            time.sleep(start - now)
 
 class IntegratedScraper:
     """
     Scraper integrado: coleta URLs + dados nutricionais
     """
     
-    def __init__(self, headless: bool = True):
-        self.base_url = "https://www.integralmedica.com.br"
+    # Backends disponíveis para a descoberta de URLs ('http-api': API de busca do VTEX em vez da listagem)
+    DISCOVERY_BACKENDS = ('selenium', 'cdp', 'http', 'http-api')
+    
+    def __init__(self, headless: bool = True, discovery_backend: str = 'selenium',
+                 categories: Optional[List[str]] = None, inventory_ttl: float = DEFAULT_TTL,
+                 export_xlsx: bool = True, requeue_invalid: bool = False,
+                 base_url: Optional[str] = None, max_workers: int = 1, request_delay: float = 2.0,
+                 memory_budget_mb: Optional[float] = None, track_memory: bool = False,
+                 history_retention_months: Optional[int] = None):
+        if discovery_backend not in self.DISCOVERY_BACKENDS:
+            raise ValueError(f"Backend de descoberta inválido: {discovery_backend} "
+                             f"(opções: {', '.join(self.DISCOVERY_BACKENDS)})")
+        if discovery_backend == 'http-api' and categories:
+            raise ValueError("A API de busca já percorre o catálogo inteiro: categorias não se aplicam ao backend http-api")
+        
+        # URL base da loja (SCRAPER_BASE_URL ou base_url apontam para outra loja, ex.: loja_local.py)
+        self.base_url = (base_url or os.environ.get('SCRAPER_BASE_URL') or "https://www.integralmedica.com.br").rstrip('/')
         self.products_url = f"{self.base_url}/todos-os-produtos"
         self.headless = headless
+        self.discovery_backend = discovery_backend
+        self.max_clicks = 10
+        self.batch_size = 20  # produtos por micro-lote de normalização de unidades
+        self.history_retention_months = history_retention_months  # meses mantidos no histórico (None = todos)
         self.driver = None
         
+        # Categorias para descoberta paralela, somadas a /todos-os-produtos (None = só ela)
+        self.categories = categories
+        
+        # Estatísticas da última descoberta (páginas/cliques e se o limite cortou resultados)
+        self.discovery_stats = {}
+        
+        # Inventário de URLs: reaproveita a última descoberta se for mais nova que o TTL (segundos)
+        self.inventory = URLInventory()
+        self.inventory_ttl = inventory_ttl
+        self._refresh_thread = None
+        
+        # Identificador da execução (histórico no banco SQLite)
+        self.run_id = None
+        
+        # Exportação XLSX é opcional (pode ser feita depois com exportar_excel.py)
+        self.export_xlsx = export_xlsx
+        self.requeue_invalid = requeue_invalid
+        
+        # Concorrência da extração e intervalo mínimo (segundos) entre requisições
+        self.max_workers = max(1, max_workers)
+        self.pacer = RequestPacer(request_delay)
+        
+        # Arquivo de métricas do Prometheus (textfile collector), regravado a cada metrics_interval segundos
+        self.metrics_textfile = metricas.default_textfile()
+        self.metrics_interval = 15.0
+        
+        # Memória: orçamento de RSS em MB (contrapressão na extração) e relatório de picos por etapa
+        self.memory_budget = MemoryBudget(memory_budget_mb) if memory_budget_mb else None
+        self.track_memory = track_memory
+        
+        # Progresso da extração (barra no terminal ou linhas periódicas no log)
+        self.show_progress = True
+        self.progress = None
+        
         # Configurar requests session para coleta de dados
         self.session = requests.Session()
         self.session.headers.update({
@@ -70,6 +144,9 @@ class IntegratedScraper:
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1'
         })
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(10, self.max_workers))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         
         # Campos que queremos extrair
         self.target_fields = [
@@ -123,6 +200,10 @@ class IntegratedScraper:
 
     def setup_driver(self):
         """Configura o WebDriver Chrome com compatibilidade multiplataforma"""
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
+        
         chrome_options = Options()
         chrome_options.add_argument('--no-sandbox')
         chrome_options.add_argument('--disable-dev-shm-usage')
@@ -144,12 +225,14 @@ class IntegratedScraper:
             
             # Segunda tentativa: WebDriver Manager
             if WEBDRIVER_MANAGER_AVAILABLE:
+                from webdriver_manager.chrome import ChromeDriverManager
                 service = Service(ChromeDriverManager().install())
                 self.driver = webdriver.Chrome(service=service, options=chrome_options)
                 logging.info("✅ WebDriver configurado com WebDriver Manager")
                 return True
             
             # Terceira tentativa: ChromeDriver padrão
+            logging.warning("⚠️ webdriver-manager não encontrado. Usando ChromeDriver padrão.")
             self.driver = webdriver.Chrome(options=chrome_options)
             logging.info("✅ WebDriver configurado com ChromeDriver padrão")
             return True
@@ -160,8 +243,17 @@ class IntegratedScraper:
     
 
     
+    def selenium_wait(self, seconds: float, action: str):
+        """Espera fixa do Selenium, contabilizada por ação (carregamento, rolagem, clique)"""
+        with instrumentation.stage(STAGE_SELENIUM_WAIT):
+            time.sleep(seconds)
+        metricas.SELENIUM_WAIT.inc(seconds, action=action)
+    
     def find_and_click_button(self) -> bool:
         """Procura e clica no botão 'Mostrar mais' usando as estratégias que funcionam"""
+        from selenium.common.exceptions import ElementClickInterceptedException
+        from selenium.webdriver.common.by import By
+        
         # Estratégias baseadas no coletar_urls.py que funciona
         selectors = [
             # Botão com classes específicas do VTEX (as que funcionam)
@@ -212,7 +304,7 @@ class IntegratedScraper:
                         
                         # Scroll até o botão
                         self.driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", element)
-                        time.sleep(2)
+                        self.selenium_wait(2, 'clique')
                         
                         try:
                             # Tentar clicar normalmente
@@ -245,7 +337,7 @@ class IntegratedScraper:
             self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
             
             # Aguardar carregamento
-            time.sleep(2)
+            self.selenium_wait(2, 'rolagem')
             
             # Verificar se a página cresceu
             new_height = self.driver.execute_script("return document.body.scrollHeight")
@@ -256,7 +348,129 @@ class IntegratedScraper:
         logging.info("✅ Página rolada até o final")
 
     def collect_urls(self) -> List[str]:
+        """Coleta todas as URLs dos produtos usando o backend configurado"""
+        if self.categories:
+            return self.collect_urls_by_category()
+        if self.discovery_backend == 'cdp':
+            return self.collect_urls_cdp()
+        if self.discovery_backend in ('http', 'http-api'):
+            return self.collect_urls_http()
+        return self.collect_urls_selenium()
+    
+    def get_urls(self) -> List[str]:
+        """
+        Retorna as URLs dos produtos usando o inventário quando possível:
+        - inventário dentro do TTL: reaproveita sem abrir navegador
+        - inventário vencido: reaproveita e atualiza em segundo plano
+        - sem inventário: executa a descoberta agora
+        """
+        inventory = self.inventory.load()
+        
+        if self.inventory.is_fresh(inventory, self.inventory_ttl):
+            logging.info(f"🗃️ Usando inventário de URLs ({inventory['fonte']}, "
+                         f"{self.inventory.age(inventory) / 3600:.1f}h): {len(inventory['urls'])} URLs")
+            return inventory['urls']
+        
+        if inventory and inventory.get('urls') and self.inventory_ttl > 0:
+            logging.info(f"🗃️ Inventário vencido ({self.inventory.age(inventory) / 3600:.1f}h) - "
+                         "reaproveitando e atualizando em segundo plano")
+            # Scraper próprio (sessão, driver e discovery_stats separados da extração em andamento)
+            refresher = self.clone_for_listing(self.products_url)
+            refresher.categories = self.categories
+            refresher.inventory = self.inventory
+            self._refresh_thread = threading.Thread(target=refresher.refresh_inventory, daemon=True)
+            self._refresh_thread.start()
+            return inventory['urls']
+        
+        return self.refresh_inventory()
+    
+    def refresh_inventory(self) -> List[str]:
+        """Executa a descoberta e grava o resultado no inventário"""
+        urls = self.collect_urls()
+        if self.discovery_stats.get('paginas_com_erro'):
+            # Não guarda uma listagem truncada por erro como inventário válido
+            logging.warning("⚠️ Descoberta com páginas com erro - inventário de URLs não atualizado")
+        elif urls:
+            self.inventory.save(urls, source=self.discovery_backend)
+        return urls
+    
+    def wait_for_inventory_refresh(self):
+        """Aguarda a atualização do inventário em segundo plano, se houver"""
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            logging.info("⏳ Aguardando atualização do inventário de URLs...")
+            self._refresh_thread.join()
+        self._refresh_thread = None
+    
+    def collect_urls_by_category(self) -> List[str]:
+        """Coleta as URLs em paralelo nas páginas de categoria da loja"""
+        from descoberta_categorias import ALL_PRODUCTS, CategoryDiscovery
+        
+        discovery = CategoryDiscovery(self.base_url, self.clone_for_listing, self.categories)
+        urls = discovery.collect_urls()
+        discovery.save_coverage_report()
+        
+        self.discovery_stats = {
+            'backend': self.discovery_backend,
+            'categorias': len(self.categories),
+            'categorias_com_erro': [row['categoria'] for row in discovery.coverage if row['paginas_com_erro']],
+            # Só a falha da listagem completa deixa a união incompleta (ver refresh_inventory)
+            'paginas_com_erro': [row['paginas_com_erro'] for row in discovery.coverage
+                                 if row['categoria'] == ALL_PRODUCTS and row['paginas_com_erro']],
+            'limite_atingido': any(row['limite_atingido'] for row in discovery.coverage)
+        }
+        return urls
+    
+    def clone_for_listing(self, listing_url: str) -> 'IntegratedScraper':
+        """Cria um scraper com a mesma configuração apontando para outra listagem"""
+        clone = IntegratedScraper(headless=self.headless, discovery_backend=self.discovery_backend,
+                                  base_url=self.base_url)
+        clone.products_url = listing_url
+        clone.max_clicks = self.max_clicks
+        return clone
+    
+    def collect_urls_http(self) -> List[str]:
+        """Coleta as URLs paginando a listagem (ou a API de busca, em http-api) via HTTP, sem navegador"""
+        from descoberta_http import HTTPListingCollector
+        
+        collector = HTTPListingCollector(
+            self.products_url,
+            self.session,
+            self.extract_product_urls,
+            self.filter_product_urls,
+            mode='api' if self.discovery_backend == 'http-api' else 'listing'
+        )
+        urls = collector.collect_urls()
+        self.discovery_stats = {
+            'backend': self.discovery_backend,
+            'paginas': collector.pages_fetched,
+            'paginas_com_erro': collector.failed_pages,
+            'limite_atingido': collector.limit_reached
+        }
+        return urls
+    
+    def collect_urls_cdp(self) -> List[str]:
+        """Coleta as URLs falando CDP direto com o Chromium (sem chromedriver)"""
+        from descoberta_cdp import CDPURLCollector
+        
+        collector = CDPURLCollector(
+            self.products_url,
+            self.filter_product_urls,
+            headless=self.headless,
+            max_clicks=self.max_clicks,
+            browser_path=self.detect_browser_path()
+        )
+        urls = collector.collect_urls()
+        self.discovery_stats = {
+            'backend': 'cdp',
+            'paginas': collector.clicks_realizados + 1,
+            'limite_atingido': collector.limit_reached
+        }
+        return urls
+    
+    def collect_urls_selenium(self) -> List[str]:
         """Coleta todas as URLs dos produtos usando o método que funciona"""
+        from bs4 import BeautifulSoup
+        
         logging.info("🔍 Iniciando coleta de URLs...")
         
         if not self.setup_driver():
@@ -269,20 +483,21 @@ class IntegratedScraper:
             
             # Aguardar carregamento inicial
             logging.info("⏳ Aguardando carregamento inicial da página...")
-            time.sleep(3)
+            self.selenium_wait(3, 'carregamento')
             
             # Ajustar zoom para 75% (DEPOIS do carregamento inicial)
             logging.info("🔍 Ajustando zoom para 75%...")
             self.driver.execute_script("document.body.style.zoom='75%'")
-            time.sleep(2)
+            self.selenium_wait(2, 'carregamento')
             
             # Coletar URLs iniciais
             initial_urls = self.extract_product_urls(BeautifulSoup(self.driver.page_source, 'html.parser'))
             logging.info(f"📦 URLs iniciais coletadas: {len(initial_urls)}")
             
             # Configurações para cliques (seguindo o padrão que funciona)
-            max_clicks = 10
+            max_clicks = self.max_clicks
             clicks_realizados = 0
+            limite_atingido = False
             
             logging.info(f"🔄 Iniciando processo de carregamento: máximo {max_clicks} cliques")
             
@@ -307,7 +522,7 @@ class IntegratedScraper:
                 
                 # Aguardar carregamento (tempo que funciona)
                 logging.info("⏳ Aguardando carregamento de novos produtos...")
-                time.sleep(5)
+                self.selenium_wait(5, 'clique')
                 
                 # Verificar se novas URLs foram carregadas
                 current_urls = self.extract_product_urls(BeautifulSoup(self.driver.page_source, 'html.parser'))
@@ -318,11 +533,15 @@ class IntegratedScraper:
                     break
                 
                 initial_urls = current_urls
+            else:
+                # Todos os cliques foram usados e ainda havia produtos novos
+                limite_atingido = max_clicks > 0
+                logging.warning(f"⚠️ Limite de {max_clicks} cliques atingido - a listagem pode estar incompleta")
             
             # Scroll final para garantir que chegamos no fim
             logging.info("📜 Scroll final para garantir carregamento completo...")
             self.scroll_to_bottom()
-            time.sleep(3)
+            self.selenium_wait(3, 'rolagem')
             
             # Extrair URLs finais
             logging.info("🔗 Extraindo URLs finais dos produtos...")
@@ -333,6 +552,11 @@ class IntegratedScraper:
             logging.info(f"📊 Cliques realizados: {clicks_realizados}")
             logging.info(f"🔗 Total de URLs coletadas: {len(urls)}")
             
+            self.discovery_stats = {
+                'backend': 'selenium',
+                'paginas': clicks_realizados + 1,
+                'limite_atingido': limite_atingido
+            }
             return urls
             
         except Exception as e:
@@ -342,15 +566,17 @@ class IntegratedScraper:
             if self.driver:
                 self.driver.quit()
     
-    def extract_product_urls(self, soup: BeautifulSoup) -> List[str]:
+    def extract_product_urls(self, soup: 'BeautifulSoup') -> List[str]:
         """Extrai URLs dos produtos da página"""
-        product_urls = []
-        
         # Procurar por todos os links
         links = soup.find_all('a', href=True)
+        return self.filter_product_urls([link.get('href') for link in links])
+    
+    def filter_product_urls(self, hrefs: List[str]) -> List[str]:
+        """Filtra uma lista de links, mantendo apenas URLs de produtos (terminadas em /p)"""
+        product_urls = []
         
-        for link in links:
-            href = link.get('href')
+        for href in hrefs:
             if href:
                 # Construir URL completa
                 full_url = urljoin(self.base_url, href)
@@ -362,17 +588,36 @@ class IntegratedScraper:
         
         return product_urls
     
-    def get_page_content(self, url: str) -> Optional[BeautifulSoup]:
-        """Obtém conteúdo da página"""
+    def fetch_page(self, url: str) -> Optional[bytes]:
+        """Baixa a página (bytes) ou None em caso de erro"""
+        response = None
+        start = time.perf_counter()
         try:
-            response = self.session.get(url, timeout=15)
-            response.raise_for_status()
-            return BeautifulSoup(response.content, 'html.parser')
+            with instrumentation.stage(STAGE_FETCH):
+                response = self.session.get(url, timeout=15)
+                response.raise_for_status()
+                if self.progress is not None:
+                    self.progress.add_bytes(len(response.content))
+                return response.content
         except requests.RequestException as e:
             logging.error(f"❌ Erro ao acessar {url}: {e}")
             return None
+        finally:
+            seconds = time.perf_counter() - start
+            metricas.record_http(response, seconds)
+            log_event('http', url=url, stage=STAGE_FETCH, duration_ms=round(seconds * 1000, 2),
+                      status=response.status_code if response is not None else 'erro')
+    
+    def get_page_content(self, url: str) -> Optional['BeautifulSoup']:
+        """Obtém conteúdo da página"""
+        from bs4 import BeautifulSoup
+        
+        content = self.fetch_page(url)
+        if content is None:
+            return None
+        return BeautifulSoup(content, 'html.parser')
     
-    def extract_product_name(self, soup: BeautifulSoup) -> str:
+    def extract_product_name(self, soup: 'BeautifulSoup') -> str:
         """Extrai o nome do produto"""
         name_selectors = ['h1', 'h2']
         
@@ -393,181 +638,444 @@ class IntegratedScraper:
         
         return "Produto não identificado"
     
-    def extract_nutritional_data(self, soup: BeautifulSoup) -> Dict[str, str]:
-        """Extrai dados nutricionais da tabela"""
+    def extract_nutrition_table(self, soup: 'BeautifulSoup', url: str = '') -> List[Dict]:
+        """Extrai a tabela nutricional inteira em formato longo (todas as linhas e colunas)"""
+        from bs4 import Tag
+        from tabela_nutricional import parse_table_long
+        
         # Procurar por tabela nutricional
         table = soup.find('table')
         if table and isinstance(table, Tag):
-            return self.parse_html_table(table)
-        return {}
-    
-    def parse_html_table(self, table: Tag) -> Dict[str, str]:
-        """Faz parsing de uma tabela HTML"""
-        data = {}
-        
-        # Mapeamento de termos para nossos campos
-        field_mapping = {
-            'porção': 'PORÇÃO (g)',
-            'valor energético': 'CALORIAS (kcal)',
-            'calorias': 'CALORIAS (kcal)',
-            'carboidratos': 'CARBOIDRATOS (g)',
-            'proteínas': 'PROTEÍNAS (g)',
-            'gorduras totais': 'GORDURAS_TOTAIS (g)',
-            'gorduras saturadas': 'GORDURAS_SATURADAS (g)',
-            'fibras alimentares': 'FIBRAS (g)',
-            'fibras': 'FIBRAS (g)',
-            'açúcares totais': 'AÇÚCARES (g)',
-            'sódio': 'SÓDIO (mg)'
-        }
+            return parse_table_long(table, url)
+        return []
+    
+    def extract_nutritional_data(self, soup: 'BeautifulSoup') -> Dict[str, Tuple[float, Optional[str]]]:
+        """Extrai dados nutricionais da tabela"""
+        return self.nutrition_from_table(self.extract_nutrition_table(soup))
+    
+    def nutrition_from_table(self, table_rows: List[Dict]) -> Dict[str, Tuple[float, Optional[str]]]:
+        """Campos alvo da coluna da porção (escolhida pelo cabeçalho), anotada em POSICAO_USADA"""
+        from tabela_nutricional import choose_position, pick_fields
         
-        # Procurar por linhas da tabela
-        rows = table.find_all('tr')
+        position = choose_position(table_rows)
+        for row in table_rows:
+            row['POSICAO_USADA'] = position
+        return pick_fields(table_rows, position)
+    
+    def extract_product(self, url: str) -> Tuple[ProductNutrition, List[Dict]]:
+        """
+        Extrai um produto em uma única passada pela página: o registro (visão larga,
+        derivada da tabela) e a tabela nutricional completa em formato longo
+        """
+        from bs4 import BeautifulSoup
         
-        for row in rows:
-            cells = row.find_all(['td', 'th'])
-            if len(cells) >= 2:
-                label = cells[0].get_text(strip=True).lower()
-                value = cells[1].get_text(strip=True)
-                
-                for search_term, field_name in field_mapping.items():
-                    if search_term in label:
-                        number = self.extract_number(value)
-                        if number:
-                            data[field_name] = number
-                            break
-        
-        return data
-    
-    def extract_number(self, text: str) -> Optional[str]:
-        """Extrai número de um texto"""
-        match = re.search(r'(\d+(?:[,\.]\d+)?)', text)
-        if match:
-            return match.group(1).replace(',', '.')
-        return None
+        with instrumentation.stage(STAGE_PRODUCT):
+            # Obter conteúdo da página
+            content = self.fetch_page(url)
+            if content is None:
+                return ProductNutrition(url, 'Erro ao carregar página', fonte=FONTE_ERRO), []
+            
+            with instrumentation.stage(STAGE_PARSE), metricas.PARSE_DURATION.time(extractor='tabela'):
+                soup = BeautifulSoup(content, 'html.parser')
+                try:
+                    # Extrair nome do produto
+                    product_name = self.extract_product_name(soup)
+                    
+                    # Extrair a tabela completa e derivar os campos alvo da coluna da porção
+                    table_rows = self.extract_nutrition_table(soup, url)
+                    nutrition_data = self.nutrition_from_table(table_rows)
+                    fonte = FONTE_TABELA if nutrition_data else FONTE_SEM_TABELA
+                    
+                    return ProductNutrition.from_fields(url, product_name, nutrition_data, fonte=fonte), table_rows
+                finally:
+                    # Desfaz a árvore (nós com referências cruzadas): a memória volta sem esperar o gc
+                    soup.decompose()
+    
+    def iter_products(self, urls: List[str]):
+        """
+        Extrai os produtos com até max_workers requisições simultâneas (respeitando o
+        intervalo do pacer) e entrega (url, (registro, linhas da tabela)) na ordem das URLs
+        """
+        def task(url: str) -> Tuple[ProductNutrition, List[Dict]]:
+            self.pacer.wait()
+            start = time.perf_counter()
+            if self.progress is not None:
+                self.progress.started()
+            try:
+                product_data, table_rows = self.extract_product(url)
+            except Exception:
+                if self.progress is not None:
+                    self.progress.finished(error=True)
+                raise
+            if self.progress is not None:
+                self.progress.finished(error=product_data.fonte == FONTE_ERRO)
+            log_event('produto', url=url, stage=STAGE_PRODUCT,
+                      duration_ms=round((time.perf_counter() - start) * 1000, 2),
+                      status=product_data.fonte, campos=product_data.found_fields)
+            return product_data, table_rows
+        
+        if self.max_workers == 1:
+            for url in urls:
+                yield url, task(url)
+            return
+        
+        # Janela limitada de tarefas em andamento: memória constante mesmo com milhares de URLs
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            try:
+                for url in urls:
+                    # Contrapressão: acima do orçamento de memória, esvazia a janela antes de novas requisições
+                    if pending and self.over_memory_budget():
+                        while pending:
+                            done_url, future = pending.popleft()
+                            yield done_url, future.result()
+                    pending.append((url, executor.submit(task, url)))
+                    if len(pending) >= self.max_workers * 2:
+                        done_url, future = pending.popleft()
+                        yield done_url, future.result()
+                while pending:
+                    done_url, future = pending.popleft()
+                    yield done_url, future.result()
+            finally:
+                for _, future in pending:
+                    future.cancel()
+    
+    def over_memory_budget(self) -> bool:
+        """True quando há orçamento de memória e o RSS passou dele"""
+        if self.memory_budget is None or not self.memory_budget.exceeded():
+            return False
+        metricas.MEMORY_OVER_BUDGET.inc()
+        return True
+    
+    def open_writers(self) -> List:
+        """Abre os gravadores incrementais (CSV e NDJSON) em dados/csv/"""
+        csv_dir = os.path.join(dados_dir, 'csv')
+        writers = [
+            CSVStreamWriter(os.path.join(csv_dir, 'dados.csv'), self.target_fields),
+            NDJSONStreamWriter(os.path.join(csv_dir, 'dados.ndjson'), self.target_fields)
+        ]
+        
+        # Parquet tipado (float32 anulável, nome com dicionário, timestamp da coleta)
+        if PYARROW_AVAILABLE:
+            parquet_dir = os.path.join(dados_dir, 'parquet')
+            writers.append(ParquetStreamWriter(os.path.join(parquet_dir, 'dados.parquet'), self.target_fields))
+        else:
+            logging.warning("⚠️ pyarrow não encontrado. Saída Parquet desativada.")
+        
+        return writers
+    
+    def open_long_writer(self) -> CSVStreamWriter:
+        """Gravador da tabela nutricional completa em formato longo (dados/csv/dados_longo.csv)"""
+        from tabela_nutricional import LONG_COLUMNS
+        
+        return CSVStreamWriter(os.path.join(dados_dir, 'csv', 'dados_longo.csv'), LONG_COLUMNS, buffer_size=500)
+    
+    def write_batch(self, batch: List[Tuple[ProductNutrition, List[Dict]]], writers: List,
+                    long_writer: CSVStreamWriter, requeue: bool = True):
+        """
+        Normaliza as unidades do micro-lote de uma vez, valida (reextraindo os suspeitos
+        se requeue_invalid estiver ativo) e envia os registros e as linhas da tabela longa
+        aos gravadores (já com as substituições)
+        """
+        from unidades import normalize_records
+        
+        records = [record for record, _ in batch]
+        tables = [table_rows for _, table_rows in batch]
+        normalize_records(records)
+        positions = [table_rows[0]['POSICAO_USADA'] if table_rows else 1 for table_rows in tables]
+        if requeue and self.requeue_invalid and records:
+            self.requeue_invalid_records(records, tables, positions)
+        with instrumentation.stage(STAGE_SAVE):
+            for record, table_rows, position in zip(records, tables, positions):
+                for writer in writers:
+                    writer.write_row(record)
+                for row in table_rows:
+                    row['POSICAO_USADA'] = position
+                    long_writer.write_row(row)
+        batch.clear()
     
-    def extract_product_data(self, url: str) -> Dict[str, str]:
-        """Extrai todos os dados de um produto"""
-        # Inicializar dados
-        product_data = {field: '0' if field not in ['URL', 'NOME_PRODUTO'] else '' for field in self.target_fields}
-        product_data['URL'] = url
+    def requeue_invalid_records(self, records: List[ProductNutrition], tables: List[List[Dict]],
+                                positions: List[int]):
+        """
+        Reextrai os registros que falharam na validação a partir da tabela já baixada,
+        substituindo-os no lote e anotando a coluna usada (positions)
+        """
+        from validacao import check
         
-        # Obter conteúdo da página
-        soup = self.get_page_content(url)
-        if not soup:
-            product_data['NOME_PRODUTO'] = 'Erro ao carregar página'
-            return product_data
+        invalid = check(to_dataframe(records, self.target_fields)).any(axis=1).to_numpy()
+        for i in invalid.nonzero()[0]:
+            logging.info(f"🔁 Dados suspeitos, tentando extração alternativa: {records[i].url}")
+            fallback = self.extract_product_fallback(records[i].url, tables[i])
+            if fallback is not None:
+                fallback[0].nome = records[i].nome
+                records[i], positions[i] = fallback
+    
+    def extract_product_fallback(self, url: str, table_rows: List[Dict]) -> Optional[Tuple[ProductNutrition, int]]:
+        """
+        Extração alternativa: tenta as demais colunas candidatas da tabela (nunca as de
+        100 g ou %VD indicadas no cabeçalho) e devolve o primeiro registro que passa na
+        validação, com a coluna usada. Só reprocessa as linhas já extraídas: a página não
+        é baixada de novo
+        """
+        from tabela_nutricional import candidate_positions, pick_fields
+        from unidades import normalize_records
+        from validacao import check
         
-        # Extrair nome do produto
-        product_name = self.extract_product_name(soup)
-        product_data['NOME_PRODUTO'] = product_name
+        used = table_rows[0]['POSICAO_USADA'] if table_rows else 1
+        with metricas.PARSE_DURATION.time(extractor='fallback'):
+            for position in candidate_positions(table_rows):
+                if position == used:
+                    continue
+                candidate = ProductNutrition.from_fields(url, '', pick_fields(table_rows, position),
+                                                         fonte=FONTE_FALLBACK)
+                if not candidate.has_nutrition:
+                    continue
+                normalize_records([candidate])
+                if not check(to_dataframe([candidate], self.target_fields)).any(axis=1).iloc[0]:
+                    logging.info(f"   ✅ Coluna {position} da tabela passou na validação")
+                    return candidate, position
         
-        # Extrair dados nutricionais
-        nutrition_data = self.extract_nutritional_data(soup)
+        logging.warning(f"   ⚠️ Nenhuma extração alternativa válida para {url}")
+        return None
+    
+    def compute_delta(self, df: 'pd.DataFrame') -> Optional['pd.DataFrame']:
+        """
+        Compara o resultado atual com o dados.csv anterior e salva o delta
+        Retorna None quando não há snapshot anterior
+        """
+        import pandas as pd
+        from diff_execucoes import diff_snapshots, save_delta, summarize
         
-        # Atualizar dados com os valores encontrados
-        for field, value in nutrition_data.items():
-            if field in product_data:
-                product_data[field] = value
+        previous_file = os.path.join(dados_dir, 'csv', 'dados.csv')
+        if not os.path.exists(previous_file):
+            return None
+        
+        try:
+            previous = pd.read_csv(previous_file, encoding='utf-8')
+        except Exception as e:
+            logging.warning(f"⚠️ Não foi possível ler o snapshot anterior ({e}) - delta ignorado")
+            return None
+        
+        delta = diff_snapshots(previous, df, key='URL', fields=self.target_fields[1:])
+        if not delta.empty:
+            delta_file = save_delta(delta, self.run_id or datetime.now().strftime("%Y%m%d_%H%M%S"))
+            logging.info(f"🔀 Mudanças desde a última execução: {summarize(delta)}")
+            logging.info(f"💾 Delta salvo em: {delta_file}")
+        return delta
+    
+    def load_written(self, writers: List) -> 'pd.DataFrame':
+        """
+        Dataset da execução lido do CSV incremental (.part) já gravado: os registros
+        não ficam acumulados em memória durante a coleta
+        """
+        import pandas as pd
         
-        return product_data
+        csv_writer = next(writer for writer in writers if isinstance(writer, CSVStreamWriter))
+        csv_writer.flush()
+        # Só o vazio é ausente (um nome "NA" continua sendo texto)
+        df = pd.read_csv(csv_writer.tmp_path, encoding='utf-8', dtype={'URL': str, 'NOME_PRODUTO': str},
+                         keep_default_na=False, na_values=[''])
+        df['NOME_PRODUTO'] = df['NOME_PRODUTO'].fillna('')
+        numeric_fields = self.target_fields[2:]
+        df[numeric_fields] = df[numeric_fields].astype('float64')
+        return df
     
-    def save_data(self, data: List[Dict[str, str]]):
-        """Salva dados em CSV e XLSX"""
-        if not data:
+    def save_data(self, df: 'pd.DataFrame', writers: Optional[List] = None):
+        """
+        Valida e salva o dataset da execução (DataFrame com target_fields) em CSV, XLSX,
+        banco e histórico. Com writers, o CSV já foi gravado incrementalmente e só é
+        publicado (finalize) se houver mudanças em relação à execução anterior
+        """
+        from exportar_excel import export_excel
+        from unidades import add_per_100g
+        from validacao import save_report, summarize as summarize_validation, validate
+        
+        if df.empty:
             logging.error("❌ Nenhum dado para salvar")
+            for writer in writers or []:
+                writer.discard()
             return
         
-        # Criar DataFrame
-        df = pd.DataFrame(data)
+        numeric_fields = self.target_fields[2:]
         
-        # Garantir ordem das colunas
-        df = df[self.target_fields]
+        # Validação de plausibilidade (Atwater, porção, gorduras) sobre a tabela inteira
+        invalid = validate(df)
+        if not invalid.empty:
+            report_file = save_report(invalid, self.run_id or datetime.now().strftime("%Y%m%d_%H%M%S"))
+            logging.warning(f"⚠️ {len(invalid)} produtos com dados suspeitos: {summarize_validation(df)}")
+            logging.warning(f"   Relatório: {report_file}")
         
-        # Converter campos numéricos
-        numeric_fields = [field for field in self.target_fields if field not in ['URL', 'NOME_PRODUTO']]
-        for field in numeric_fields:
-            df[field] = pd.to_numeric(df[field], errors='coerce').fillna(0)
+        # Comparar com a execução anterior: sem mudanças, nada é regravado
+        delta = self.compute_delta(df)
+        changed = delta is None or not delta.empty
         
-        # Salvar CSV
-        csv_file = os.path.join(dados_dir, 'csv', 'dados.csv')
-        df.to_csv(csv_file, index=False, encoding='utf-8')
-        logging.info(f"💾 CSV salvo em: {csv_file}")
+        if not changed:
+            logging.info("✅ Nenhuma mudança desde a última execução - CSV/XLSX mantidos")
+            for writer in writers or []:
+                writer.discard()
+        elif writers:
+            for writer in writers:
+                writer.finalize()
+        else:
+            csv_file = os.path.join(dados_dir, 'csv', 'dados.csv')
+            df.to_csv(csv_file, index=False, encoding='utf-8')
+            logging.info(f"💾 CSV salvo em: {csv_file}")
         
-        # Salvar XLSX
-        xlsx_file = os.path.join(dados_dir, 'excel', 'dados.xlsx')
-        with pd.ExcelWriter(xlsx_file, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Dados Nutricionais')
-            
-            # Formatação básica
-            worksheet = writer.sheets['Dados Nutricionais']
-            
-            # Ajustar largura das colunas
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                worksheet.column_dimensions[column_letter].width = adjusted_width
-        
-        logging.info(f"📊 XLSX salvo em: {xlsx_file}")
+        # Salvar XLSX (etapa opcional, com escrita em memória constante)
+        if self.export_xlsx and changed:
+            xlsx_file = os.path.join(dados_dir, 'excel', 'dados.xlsx')
+            export_excel(add_per_100g(df, numeric_fields), xlsx_file)
+            logging.info(f"📊 XLSX salvo em: {xlsx_file}")
+        
+        # Gravar no banco SQLite (upsert por URL + observações da execução)
+        self.save_to_database(df)
+        
+        # Histórico de longo prazo particionado por mês
+        self.save_to_history(df)
         
         # Estatísticas
         total_products = len(df)
-        products_with_data = len(df[df[numeric_fields].sum(axis=1) > 0])
+        products_with_data = int(with_nutrition(df).sum())
         
         logging.info(f"📈 Total de produtos: {total_products}")
         logging.info(f"📊 Produtos com dados nutricionais: {products_with_data}")
         logging.info(f"🎯 Taxa de sucesso: {(products_with_data/total_products)*100:.1f}%")
     
-    def run(self):
-        """Executa o scraper completo"""
+    def save_to_database(self, df: 'pd.DataFrame'):
+        """Grava a execução no banco SQLite em uma única transação"""
+        run_id = self.run_id or datetime.now().strftime("%Y%m%d_%H%M%S")
+        store = NutritionStore()
+        try:
+            store.save_run(run_id, iter_records(df))
+        except Exception as e:
+            logging.error(f"❌ Erro ao gravar no banco: {e}")
+        finally:
+            store.close()
+    
+    def save_to_history(self, df: 'pd.DataFrame'):
+        """Adiciona a execução ao histórico em Parquet, compacta meses fechados e aplica a retenção"""
+        if not PYARROW_AVAILABLE:
+            logging.warning("⚠️ pyarrow não encontrado. Histórico em Parquet desativado.")
+            return
+        
+        from historico import HistoryStore
+        
+        store = HistoryStore()
+        try:
+            store.append_run(df, self.run_id or datetime.now().strftime("%Y%m%d_%H%M%S"))
+            store.compact()
+            if self.history_retention_months:
+                store.apply_retention(self.history_retention_months)
+        except Exception as e:
+            logging.error(f"❌ Erro ao gravar o histórico: {e}")
+    
+    def run(self) -> Optional['pd.DataFrame']:
+        """
+        Executa o scraper completo, exportando as métricas durante e ao final da execução
+        Retorna o dataset gravado (DataFrame com target_fields) ou None sem URLs
+        """
+        exporter = metricas.TextfileExporter(self.metrics_textfile, self.metrics_interval).start()
+        tracker = MemoryTracker().start() if self.track_memory else None
+        metricas.RUN_IN_PROGRESS.set(1)
+        start = time.time()
+        try:
+            dataset = self._run()
+            if dataset is not None:
+                metricas.RUN_PRODUCTS.set(len(dataset))
+                metricas.RUN_LAST_SUCCESS.set(time.time())
+            return dataset
+        finally:
+            metricas.RUN_DURATION.set(time.time() - start)
+            metricas.RUN_IN_PROGRESS.set(0)
+            exporter.stop()
+            if tracker is not None:
+                tracker.stop()
+                tracker.save_report(self.run_id)
+    
+    def _run(self):
+        """Etapas da execução: descoberta, extração e gravação"""
+        self.run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
         logging.info("🚀 Iniciando Scraper Integrado da Integral Médica")
         logging.info("=" * 60)
         
-        # Passo 1: Coletar URLs
-        urls = self.collect_urls()
+        # Passo 1: Coletar URLs (ou reaproveitar o inventário)
+        with instrumentation.stage(STAGE_DISCOVERY):
+            urls = self.get_urls()
         if not urls:
             logging.error("❌ Nenhuma URL coletada. Abortando.")
             return
         
         logging.info(f"📋 {len(urls)} URLs coletadas. Iniciando extração de dados...")
         
-        # Passo 2: Extrair dados de cada produto
-        all_data = []
+        # Passo 2: Extrair dados de cada produto, gravando CSV/NDJSON à medida que avança
+        # (nada é acumulado além do micro-lote: o final é lido de volta do CSV gravado)
+        batch = []
+        writers = self.open_writers()
+        long_writer = self.open_long_writer()
+        if self.show_progress:
+            self.progress = ProgressReporter(len(urls)).start()
         
-        for i, url in enumerate(urls, 1):
-            logging.info(f"📦 Processando produto {i}/{len(urls)}: {url}")
-            
-            product_data = self.extract_product_data(url)
-            all_data.append(product_data)
-            
-            # Log do progresso
-            nutrition_fields = [f for f in self.target_fields if f not in ['URL', 'NOME_PRODUTO']]
-            found_fields = sum(1 for field in nutrition_fields if product_data[field] != '0')
-            
-            logging.info(f"   📊 {product_data['NOME_PRODUTO']}")
-            logging.info(f"   📈 Dados nutricionais coletados: {found_fields}/{len(nutrition_fields)}")
-            
-            # Delay entre requisições para ser respeitoso
-            if i < len(urls):
-                time.sleep(2)
+        try:
+            # Intervalo entre requisições (pacer) para ser respeitoso
+            for i, (url, (product_data, table_rows)) in enumerate(self.iter_products(urls), 1):
+                batch.append((product_data, table_rows))
+                metricas.PRODUCTS.inc(fonte=product_data.fonte)
+                metricas.FIELDS_FOUND.observe(product_data.found_fields)
+                # Acima do orçamento de memória o lote é gravado sem esperar completar
+                if len(batch) >= self.batch_size or i == len(urls) or self.over_memory_budget():
+                    self.write_batch(batch, writers, long_writer)
+                
+                # Log do progresso (uma linha por produto, amostrada com --log-amostra)
+                logging.info(f"📦 Produto {i}/{len(urls)}: {product_data.nome} "
+                             f"({product_data.found_fields}/{len(self.target_fields) - 2} campos) {url}", extra=SAMPLED)
+        except BaseException:
+            # Mantém os arquivos .part com o que já foi coletado, sem substituir os finais
+            # (sem reextração: uma interrupção não dispara novas tentativas)
+            self.write_batch(batch, writers, long_writer, requeue=False)
+            for writer in writers + [long_writer]:
+                writer.close()
+            raise
+        finally:
+            if self.progress is not None:
+                self.progress.stop()
+                self.progress = None
         
         # Passo 3: Salvar dados
         logging.info("💾 Salvando dados...")
-        self.save_data(all_data)
+        with instrumentation.stage(STAGE_SAVE):
+            long_writer.finalize()
+            dataset = self.load_written(writers)
+            self.save_data(dataset, writers=writers)
+        
+        self.wait_for_inventory_refresh()
         
         logging.info("✅ Scraper integrado concluído com sucesso!")
         logging.info("=" * 60)
         
-        return all_data
+        return dataset
 
 def main():
     """Função principal"""
+    parser = argparse.ArgumentParser(description="Scraper integrado - Integral Médica")
+    parser.add_argument('--profile', nargs='?', const='todas', metavar='ETAPAS',
+                        help="Perfil por amostragem das etapas (separadas por vírgula, padrão: todas) em logs/")
+    parser.add_argument('--profile-intervalo', type=float, default=5.0, metavar='MS',
+                        help="Intervalo entre amostras do perfil em ms")
+    parser.add_argument('--memoria', action='store_true',
+                        help="Relatório de picos de memória por etapa (tracemalloc, bem mais lento)")
+    parser.add_argument('--memoria-limite', type=float, metavar='MB',
+                        help="Orçamento de RSS: acima dele a extração segura novas requisições")
+    parser.add_argument('--log-json', action='store_true',
+                        help="Também grava logs/scraper_integrado.jsonl com eventos estruturados")
+    parser.add_argument('--log-amostra', type=int, default=1, metavar='N',
+                        help="Registra 1 de cada N linhas por produto")
+    args = parser.parse_args()
+    setup_logging('scraper_integrado', json_logs=args.log_json, sample_every=args.log_amostra)
+    try:
+        profile = profiled(args.profile, args.profile_intervalo)
+    except ValueError as e:
+        parser.error(str(e))
+
     print("🚀 SCRAPER INTEGRADO - INTEGRAL MÉDICA")
     print("=" * 60)
     print("📋 Este script irá:")
@@ -589,10 +1097,12 @@ def main():
     print("\n🚀 Iniciando scraper...")
     
     # Criar e executar scraper
-    scraper = IntegratedScraper(headless=headless)
-    results = scraper.run()
+    scraper = IntegratedScraper(headless=headless, memory_budget_mb=args.memoria_limite,
+                                track_memory=args.memoria)
+    with profile:
+        results = scraper.run()
     
-    if results:
+    if results is not None and not results.empty:
         print(f"\n✅ Sucesso! {len(results)} produtos processados")
         print(f"📁 Arquivos salvos:")
         print(f"   📄 CSV: dados/csv/dados.csv")
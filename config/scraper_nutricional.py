@@ -13,24 +13,18 @@ import re
 from urllib.parse import urljoin, urlparse
 from typing import List, Dict, Any, Optional
 import logging
+import os
 
-# Configuração do logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('scraper_nutricional.log'),
-        logging.StreamHandler()
-    ]
-)
+from log_config import setup_logging
 
 class NutritionalScraper:
     """
     Scraper específico para dados nutricionais da Integralmedica
     """
     
-    def __init__(self):
-        self.base_url = "https://www.integralmedica.com.br"
+    def __init__(self, base_url: Optional[str] = None):
+        # URL base da loja (SCRAPER_BASE_URL ou base_url apontam para outra loja, ex.: loja_local.py)
+        self.base_url = (base_url or os.environ.get('SCRAPER_BASE_URL') or "https://www.integralmedica.com.br").rstrip('/')
         self.products_url = f"{self.base_url}/todos-os-produtos"
         self.session = requests.Session()
         
@@ -363,6 +357,7 @@ def main():
     """
     Função principal
     """
+    setup_logging('scraper_nutricional')
     scraper = NutritionalScraper()
     results = scraper.run()
     
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Extração da tabela nutricional completa em formato longo
+Cada célula de cada linha vira um registro (URL, rótulo, chave normalizada, coluna,
+valor, unidade e o texto original), incluindo aminoácidos, vitaminas, minerais e %VD.
+A visão larga (target_fields) é derivada desses registros, então novos nutrientes
+podem ser obtidos a partir do arquivo salvo, sem baixar as páginas de novo
+"""
+
+import re
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+from bs4 import Tag
+
+from unidades import canonical_unit, normalize_frame, parse_quantities
+
+# POSICAO_USADA: coluna de valores usada na visão larga daquele produto (a da porção pelo
+# cabeçalho, ou a que a extração alternativa escolheu); vazia em arquivos antigos = 1
+LONG_COLUMNS = ['URL', 'LINHA', 'ROTULO', 'CHAVE', 'POSICAO', 'COLUNA', 'VALOR', 'UNIDADE', 'TEXTO', 'POSICAO_USADA']
+
+# Termos (chave normalizada) -> campo da visão larga; o primeiro termo encontrado vale
+FIELD_TERMS = {
+    'porcao': 'PORÇÃO (g)',
+    'valor_energetico': 'CALORIAS (kcal)',
+    'calorias': 'CALORIAS (kcal)',
+    'carboidratos': 'CARBOIDRATOS (g)',
+    'proteinas': 'PROTEÍNAS (g)',
+    'gorduras_totais': 'GORDURAS_TOTAIS (g)',
+    'gorduras_saturadas': 'GORDURAS_SATURADAS (g)',
+    'fibras_alimentares': 'FIBRAS (g)',
+    'fibras': 'FIBRAS (g)',
+    'acucares_totais': 'AÇÚCARES (g)',
+    'sodio': 'SÓDIO (mg)',
+}
+
+
+def normalize_key(label: str) -> str:
+    """'Valor energético' -> 'valor_energetico' (sem acentos, minúsculo, com _)"""
+    text = unicodedata.normalize('NFKD', label).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', '_', text.lower()).strip('_')
+
+
+def field_for_key(key: str) -> Optional[str]:
+    """Campo da visão larga correspondente à chave (ou None se não for um deles)"""
+    for term, field in FIELD_TERMS.items():
+        if term in key:
+            return field
+    return None
+
+
+def parse_table_long(table: Tag, url: str = '') -> List[Dict]:
+    """
+    Percorre todas as linhas e colunas da tabela em uma única passada
+    POSICAO 0 = quantidade no próprio rótulo ("Porção de 30 g"), 1.. = colunas de valores
+    """
+    rows = table.find_all('tr')
+    header_cells = rows[0].find_all(['td', 'th']) if rows else []
+    has_header = bool(header_cells) and all(cell.name == 'th' for cell in header_cells)
+    headers = [cell.get_text(strip=True) for cell in header_cells] if has_header else []
+
+    records = []
+    for line, row in enumerate(rows):
+        cells = row.find_all(['td', 'th'])
+        if not cells:
+            continue
+
+        label = cells[0].get_text(strip=True)
+        key = normalize_key(label)
+        base = {'URL': url, 'LINHA': line, 'ROTULO': label, 'CHAVE': key}
+
+        found = False
+        if not (has_header and line == 0):
+            for position, cell in enumerate(cells[1:], 1):
+                text = cell.get_text(strip=True)
+                column = headers[position] if position < len(headers) and headers[position] else f"coluna_{position}"
+                quantities = parse_quantities(text, include_percent=True) or [(None, None)]
+                for value, unit in quantities:
+                    records.append({**base, 'POSICAO': position, 'COLUNA': column,
+                                    'VALOR': value, 'UNIDADE': unit, 'TEXTO': text})
+                    found = found or value is not None
+
+        # Quantidade no rótulo só quando a linha não tem valores nas colunas
+        if not found:
+            for value, unit in parse_quantities(label):
+                records.append({**base, 'POSICAO': 0, 'COLUNA': '', 'VALOR': value,
+                                'UNIDADE': unit, 'TEXTO': label})
+
+    return records
+
+
+def _eligible(row: Dict, position: int = 1) -> Optional[str]:
+    """Campo da visão larga que o registro pode preencher (rótulo ou a coluna de valores escolhida)"""
+    if row['POSICAO'] not in (0, position) or row['VALOR'] is None or row['UNIDADE'] == '%':
+        return None
+    return field_for_key(row['CHAVE'])
+
+
+def pick_fields(records: List[Dict], position: int = 1) -> Dict[str, Tuple[float, Optional[str]]]:
+    """
+    Visão larga de um produto: para cada campo, a primeira linha da tabela com valor
+    na coluna position (1 = primeira coluna de valores), preferindo (dentro da linha)
+    a unidade do campo ("514 kJ / 122 kcal" -> kcal)
+    """
+    picked = {}
+    for row in records:
+        field = _eligible(row, position)
+        if field is None:
+            continue
+        current = picked.get(field)
+        if current is None:
+            picked[field] = row
+        elif (current['LINHA'] == row['LINHA'] and current['UNIDADE'] != canonical_unit(field)
+              and row['UNIDADE'] == canonical_unit(field)):
+            picked[field] = row
+    return {field: (row['VALOR'], row['UNIDADE']) for field, row in picked.items()}
+
+
+def value_positions(records: List[Dict]) -> List[int]:
+    """Colunas de valores presentes na tabela (1, 2, ...)"""
+    return sorted({row['POSICAO'] for row in records if row['POSICAO'] > 0})
+
+
+def _per_100(header: str) -> bool:
+    """Cabeçalho de coluna por 100 g / 100 ml ("100 g", "Por 100 ml")"""
+    return any(value == 100 and unit in ('g', 'ml') for value, unit in parse_quantities(header))
+
+
+def _daily_value(header: str) -> bool:
+    """Cabeçalho da coluna de %VD ("%VD(*)", "VD*")"""
+    return '%' in header or 'vd' in normalize_key(header).split('_')
+
+
+def candidate_positions(records: List[Dict]) -> List[int]:
+    """
+    Colunas de valores que podem ser a porção, da mais provável para a menos provável
+    Com cabeçalho, descarta as colunas por 100 g e de %VD e põe na frente a que traz a
+    quantidade da porção ("Porção de 30 g | 100 g | 30 g | %VD" -> [3]); sem cabeçalho
+    não há como distinguir e todas ficam, na ordem da tabela
+    """
+    positions = value_positions(records)
+    headers = {row['POSICAO']: row['COLUNA'] for row in records
+               if row['POSICAO'] > 0 and row['COLUNA'] and not row['COLUNA'].startswith('coluna_')}
+    if not headers:
+        return positions
+
+    portion = next((row['VALOR'] for row in records if row['POSICAO'] == 0 and row['VALOR'] is not None
+                    and field_for_key(row['CHAVE']) == 'PORÇÃO (g)'), None)
+    candidates = [position for position in positions
+                  if position not in headers or not (_per_100(headers[position]) or _daily_value(headers[position]))]
+
+    def shows_portion(position: int) -> bool:
+        return portion is not None and position in headers and any(
+            value == portion for value, _ in parse_quantities(headers[position]))
+
+    return sorted(candidates, key=lambda position: not shows_portion(position))
+
+
+def choose_position(records: List[Dict]) -> int:
+    """Coluna de valores da visão larga: a primeira candidata (1 sem cabeçalho ou sem candidatas)"""
+    return next(iter(candidate_positions(records)), 1)
+
+
+def pivot_wide(long_df: pd.DataFrame, fields: List[str], position: int = 1) -> pd.DataFrame:
+    """
+    Visão larga de vários produtos a partir do formato longo, com a mesma regra de
+    pick_fields, via ordenação + pivot e unidades normalizadas em lote. A coluna de
+    valores de cada produto é a POSICAO_USADA gravada na coleta (ou position)
+    """
+    urls = pd.Index(long_df['URL'].unique(), name='URL')
+    if 'POSICAO_USADA' in long_df.columns:
+        chosen = long_df['POSICAO_USADA'].fillna(position)
+    else:
+        chosen = position
+    df = long_df[((long_df['POSICAO'] == 0) | (long_df['POSICAO'] == chosen)) & long_df['VALOR'].notna() &
+                 (long_df['UNIDADE'] != '%')].copy()
+
+    keys = df['CHAVE'].astype(str).unique()
+    df['CAMPO'] = df['CHAVE'].map({key: field_for_key(key) for key in keys})
+    df = df[df['CAMPO'].isin(fields)]
+    df['_outra_unidade'] = df['UNIDADE'] != df['CAMPO'].map(canonical_unit)
+    df = (df.sort_values(['URL', 'CAMPO', 'LINHA', '_outra_unidade'], kind='stable')
+            .drop_duplicates(['URL', 'CAMPO']))
+
+    values = df.pivot(index='URL', columns='CAMPO', values='VALOR').reindex(index=urls, columns=fields)
+    units = df.pivot(index='URL', columns='CAMPO', values='UNIDADE').reindex(index=urls, columns=fields)
+    return normalize_frame(values, units.astype(object).where(units.notna(), None)).reset_index()
+
+
+def load_wide(path: str, fields: List[str]) -> pd.DataFrame:
+    """Reconstrói a visão larga a partir de um CSV em formato longo já salvo"""
+    long_df = pd.read_csv(path, encoding='utf-8', dtype={'UNIDADE': object, 'COLUNA': object})
+    return pivot_wide(long_df, fields)
@@ -4,6 +4,7 @@ Script de teste para analisar a estrutura da página da Integralmedica
 antes de fazer o scraping completo.
 """
 
+import os
 import requests
 from bs4 import BeautifulSoup
 import json
@@ -13,7 +14,8 @@ def analyze_page_structure():
     """
     Analisa a estrutura da página de produtos da Integralmedica
     """
-    url = "https://www.integralmedica.com.br/todos-os-produtos"
+    base_url = (os.environ.get('SCRAPER_BASE_URL') or "https://www.integralmedica.com.br").rstrip('/')
+    url = f"{base_url}/todos-os-produtos"
     
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
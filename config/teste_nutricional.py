@@ -2,8 +2,11 @@
 """
 Script de teste para coleta de dados nutricionais de produtos individuais
 URL de teste: https://www.integralmedica.com.br/whey-protein-concentrado-pouch-900g/p
+(ou a URL passada como argumento; SCRAPER_BASE_URL troca a loja, ex.: loja_local.py)
 """
 
+import os
+import sys
 import requests
 from bs4 import BeautifulSoup, Tag
 import re
@@ -326,8 +329,9 @@ def main():
     """
     Função principal para teste
     """
-    # URL de teste
-    test_url = "https://www.integralmedica.com.br/whey-protein-concentrado-pouch-900g/p"
+    # URL de teste (argumento da linha de comando ou o produto padrão na loja configurada)
+    base_url = (os.environ.get('SCRAPER_BASE_URL') or "https://www.integralmedica.com.br").rstrip('/')
+    test_url = sys.argv[1] if len(sys.argv) > 1 else f"{base_url}/whey-protein-concentrado-pouch-900g/p"
     
     print("🚀 TESTE DE COLETA DE DADOS NUTRICIONAIS")
     print("="*80)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Unidades dos valores nutricionais
+- Extração: captura o número (formato brasileiro: 1.234,5) e a unidade de cada célula
+- Normalização: converte colunas inteiras para a unidade canônica de cada campo
+  (g, mg, kcal) com NumPy/pandas e calcula os valores por 100 g a partir da porção
+"""
+
+import logging
+import re
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Número (com separador de milhar/decimal) seguido opcionalmente de uma unidade
+QUANTITY_PATTERN = re.compile(
+    r'(?<![\w.,])(\d+(?:[.,]\d+)*)\s*(kcal|kj|mcg|µg|μg|mg|kg|g|%)?(?![a-zà-ú\d])',
+    re.IGNORECASE
+)
+
+# Grafias equivalentes -> unidade padronizada
+UNIT_ALIASES = {'µg': 'mcg', 'μg': 'mcg'}
+
+# Fator para converter cada unidade para a unidade canônica do campo
+UNIT_FACTORS = {
+    'g': {'kg': 1000.0, 'g': 1.0, 'mg': 1e-3, 'mcg': 1e-6},
+    'mg': {'g': 1000.0, 'mg': 1.0, 'mcg': 1e-3},
+    'kcal': {'kcal': 1.0, 'kj': 1 / 4.184},
+}
+
+
+def canonical_unit(field: str) -> Optional[str]:
+    """Unidade canônica a partir do rótulo da coluna: 'SÓDIO (mg)' -> 'mg'"""
+    match = re.search(r'\((\w+)\)\s*$', field)
+    return match.group(1).lower() if match else None
+
+
+def parse_number(token: str) -> Optional[float]:
+    """
+    Converte um número em formato brasileiro ou internacional
+    '1.234' -> 1234, '0,5' -> 0.5, '1.234,5' -> 1234.5, '5.1' -> 5.1
+    """
+    if ',' in token and '.' in token:
+        # O último separador é o decimal
+        if token.rfind(',') > token.rfind('.'):
+            token = token.replace('.', '').replace(',', '.')
+        else:
+            token = token.replace(',', '')
+    elif ',' in token:
+        token = token.replace(',', '.') if token.count(',') == 1 else token.replace(',', '')
+    elif re.fullmatch(r'\d{1,3}(?:\.\d{3})+', token):
+        # Só pontos em grupos de 3 dígitos: separador de milhar
+        token = token.replace('.', '')
+    try:
+        return float(token)
+    except ValueError:
+        return None
+
+
+def parse_quantities(text: str, include_percent: bool = False) -> List[Tuple[float, Optional[str]]]:
+    """Todos os pares (valor, unidade) da célula; percentuais (%VD) só com include_percent"""
+    quantities = []
+    for number, unit in QUANTITY_PATTERN.findall(text or ''):
+        unit = unit.lower() or None
+        if unit == '%' and not include_percent:
+            continue
+        value = parse_number(number)
+        if value is not None:
+            quantities.append((value, UNIT_ALIASES.get(unit, unit)))
+    return quantities
+
+
+def extract_quantity(text: str, preferred_unit: Optional[str] = None) -> Optional[Tuple[float, Optional[str]]]:
+    """
+    Valor e unidade de uma célula. Com várias quantidades ('514 kJ / 122 kcal'),
+    usa a que já está na unidade preferida; senão, a primeira
+    """
+    quantities = parse_quantities(text)
+    if not quantities:
+        return None
+    for value, unit in quantities:
+        if unit == preferred_unit:
+            return value, unit
+    return quantities[0]
+
+
+def conversion_factors(units: pd.Series, canonical: str) -> np.ndarray:
+    """
+    Fator de conversão por linha: unidade ausente = já está na unidade canônica;
+    unidade incompatível (ex.: 'g' em calorias) = NaN
+    """
+    factors = units.map(UNIT_FACTORS.get(canonical, {canonical: 1.0})).astype('float64')
+    factors[units.isna()] = 1.0
+    return factors.to_numpy()
+
+
+def normalize_frame(values: pd.DataFrame, units: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converte cada coluna de valores para a unidade canônica do campo de uma só vez
+    values/units: mesmas colunas (rótulos dos campos) e mesmas linhas
+    """
+    normalized = pd.DataFrame(index=values.index)
+    for field in values.columns:
+        column = values[field].astype('float64').to_numpy()
+        canonical = canonical_unit(field)
+        if canonical is None:
+            normalized[field] = column
+            continue
+
+        factors = conversion_factors(units[field], canonical)
+        incompatible = ~np.isnan(column) & np.isnan(factors)
+        if incompatible.any():
+            logging.warning(f"⚠️ {int(incompatible.sum())} valores de {field} com unidade incompatível descartados")
+        # Arredonda para não carregar ruído de ponto flutuante da conversão (0.30000000000000004)
+        normalized[field] = np.round(column * factors, 4)
+    return normalized
+
+
+def normalize_records(records: List) -> List:
+    """
+    Normaliza um micro-lote de ProductNutrition no lugar: monta as colunas de
+    valores e unidades do lote, converte tudo de uma vez e devolve os registros
+    """
+    from modelos import NUTRIENT_ATTRS
+
+    pending = [record for record in records if record.unidades]
+    if not pending:
+        return records
+
+    attrs = list(NUTRIENT_ATTRS.values())
+    values = pd.DataFrame(
+        {field: [getattr(record, attr) for record in pending] for field, attr in NUTRIENT_ATTRS.items()},
+        dtype='float64'
+    )
+    units = pd.DataFrame(
+        {field: [record.unidades.get(attr) for record in pending] for field, attr in NUTRIENT_ATTRS.items()},
+        dtype=object
+    )
+    normalized = normalize_frame(values, units).astype(object).where(lambda df: df.notna(), None)
+
+    for record, row in zip(pending, normalized.itertuples(index=False, name=None)):
+        for attr, value in zip(attrs, row):
+            setattr(record, attr, value)
+        record.unidades = None
+    return records
+
+
+def per_100g_label(field: str) -> str:
+    """'PROTEÍNAS (g)' -> 'PROTEÍNAS (g/100g)'"""
+    return re.sub(r'\)\s*$', '/100g)', field)
+
+
+def add_per_100g(df: pd.DataFrame, fields: List[str], portion_field: str = 'PORÇÃO (g)') -> pd.DataFrame:
+    """Acrescenta as colunas por 100 g (valor / porção * 100); sem porção, ficam vazias"""
+    portion = df[portion_field].astype('float64')
+    scale = 100.0 / portion.where(portion > 0)
+    per_100g = {per_100g_label(field): (df[field].astype('float64') * scale).round(2)
+                for field in fields if field != portion_field}
+    return pd.concat([df, pd.DataFrame(per_100g, index=df.index)], axis=1)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Validação de plausibilidade dos dados nutricionais
+Regras aplicadas à tabela inteira como operações vetorizadas (NumPy/pandas):
+- ENERGIA_ATWATER: calorias fora da estimativa 4·proteínas + 4·carboidratos + 9·gorduras
+- COMPONENTE_MAIOR_QUE_PORCAO: algum componente (em g) maior que a porção
+- SATURADA_MAIOR_QUE_TOTAL: gorduras saturadas maiores que as gorduras totais
+
+Uso:
+    python config/validacao.py [dados/csv/dados.csv]
+"""
+
+import os
+import sys
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from log_config import setup_logging
+
+dados_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'dados')
+
+REASON_ATWATER = 'ENERGIA_ATWATER'
+REASON_PORTION = 'COMPONENTE_MAIOR_QUE_PORCAO'
+REASON_SATURATED = 'SATURADA_MAIOR_QUE_TOTAL'
+
+# Tolerância da estimativa de Atwater: relativa e absoluta (para porções pequenas)
+ATWATER_TOLERANCE = 0.2
+ATWATER_MIN_KCAL = 15.0
+
+# Componentes comparados com a porção, com o fator para gramas
+PORTION_COMPONENTS = {
+    'CARBOIDRATOS (g)': 1.0,
+    'PROTEÍNAS (g)': 1.0,
+    'GORDURAS_TOTAIS (g)': 1.0,
+    'GORDURAS_SATURADAS (g)': 1.0,
+    'FIBRAS (g)': 1.0,
+    'AÇÚCARES (g)': 1.0,
+    'SÓDIO (mg)': 1e-3,
+}
+
+
+def _column(df: pd.DataFrame, field: str) -> np.ndarray:
+    if field not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[field], errors='coerce').to_numpy(dtype='float64')
+
+
+def check(df: pd.DataFrame, tolerance: float = ATWATER_TOLERANCE,
+          min_kcal: float = ATWATER_MIN_KCAL) -> pd.DataFrame:
+    """
+    Uma coluna booleana por motivo (True = regra violada). Campos ausentes não
+    violam nenhuma regra: só se compara o que foi extraído
+    """
+    kcal = _column(df, 'CALORIAS (kcal)')
+    protein = _column(df, 'PROTEÍNAS (g)')
+    carbs = _column(df, 'CARBOIDRATOS (g)')
+    fat = _column(df, 'GORDURAS_TOTAIS (g)')
+    saturated = _column(df, 'GORDURAS_SATURADAS (g)')
+    portion = _column(df, 'PORÇÃO (g)')
+
+    # Energia x Atwater (só com calorias e os três macronutrientes presentes)
+    estimate = 4 * protein + 4 * carbs + 9 * fat
+    with np.errstate(invalid='ignore'):
+        allowed = np.maximum(tolerance * estimate, min_kcal)
+        atwater = np.abs(kcal - estimate) > allowed
+
+        # Componentes x porção (com 1% de folga para arredondamentos do rótulo)
+        components = np.column_stack([_column(df, field) * factor for field, factor in PORTION_COMPONENTS.items()])
+        above_portion = (components > portion[:, None] * 1.01).any(axis=1)
+
+        above_total = saturated > fat * 1.01
+
+    # Comparações com NaN já resultam em False
+    return pd.DataFrame({
+        REASON_ATWATER: atwater,
+        REASON_PORTION: above_portion,
+        REASON_SATURATED: above_total,
+    }, index=df.index)
+
+
+def reason_codes(flags: pd.DataFrame) -> pd.Series:
+    """Motivos de cada linha separados por ';' (vazio = linha válida)"""
+    codes = pd.Series('', index=flags.index)
+    for reason in flags.columns:
+        codes = codes.where(~flags[reason], codes + np.where(codes == '', '', ';') + reason)
+    return codes
+
+
+def validate(df: pd.DataFrame, **kwargs) -> pd.DataFrame:
+    """Retorna as linhas inválidas (URL + colunas originais) com a coluna MOTIVOS"""
+    flags = check(df, **kwargs)
+    invalid = flags.any(axis=1)
+    report = df.loc[invalid].copy()
+    report.insert(1, 'MOTIVOS', reason_codes(flags.loc[invalid]))
+    return report
+
+
+def summarize(df: pd.DataFrame, **kwargs) -> Dict[str, int]:
+    """Quantidade de linhas por motivo"""
+    return {reason: int(count) for reason, count in check(df, **kwargs).sum().items() if count}
+
+
+def save_report(report: pd.DataFrame, run_id: str) -> str:
+    """Salva as linhas inválidas em dados/validacao/validacao_<run_id>.csv"""
+    report_dir = os.path.join(dados_dir, 'validacao')
+    os.makedirs(report_dir, exist_ok=True)
+    filepath = os.path.join(report_dir, f"validacao_{run_id}.csv")
+    report.to_csv(filepath, index=False, encoding='utf-8')
+    return filepath
+
+
+if __name__ == "__main__":
+    setup_logging('validacao')
+    source = sys.argv[1] if len(sys.argv) > 1 else os.path.join(dados_dir, 'csv', 'dados.csv')
+    data = pd.read_csv(source, encoding='utf-8')
+    result = validate(data)
+    print(f"🔎 {len(result)}/{len(data)} linhas suspeitas: {summarize(data) or 'nenhuma'}")
+    if len(result):
+        print(result[['URL', 'MOTIVOS']].to_string(index=False))
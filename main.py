@@ -7,7 +7,17 @@ Este é o script principal para coletar dados nutricionais de todos os produtos
 da Integral Médica. Simplesmente execute este arquivo para começar!
 
 Como usar:
-    python main.py
+    python main.py                                  (menu interativo)
+    python main.py --profile descoberta,parse   (perfil de CPU por etapa em logs/)
+    python main.py --memoria --memoria-limite 512   (picos de memória e orçamento de RSS)
+    python main.py --log-json --log-amostra 10      (logs/*.jsonl e 1 de cada 10 linhas por produto)
+
+Modo não interativo (cron, containers), uma etapa por subcomando:
+    python main.py discover --backend http --saida urls.txt
+    python main.py crawl --backend http --workers 4 --intervalo 0.5 --sem-xlsx
+    python main.py reparse
+    python main.py export
+    python main.py test-url https://www.integralmedica.com.br/<produto>/p
 
 Os dados serão salvos em:
     - dados/csv/produtos_nutricional_completo.csv
@@ -18,14 +28,21 @@ Campos coletados:
       GORDURAS_SATURADAS, FIBRAS, AÇÚCARES, SÓDIO
 """
 
+import argparse
+import importlib.util
+import json
 import sys
 import os
 import time
 from datetime import datetime
 
 # Adicionar pasta config ao path para importar scripts
+# (importados só dentro de cada comando: --help e execuções HTTP não carregam selenium/openpyxl)
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'config'))
 
+# Módulo -> pacote do pip
+DEPENDENCIAS = {'requests': 'requests', 'selenium': 'selenium', 'bs4': 'beautifulsoup4', 'pandas': 'pandas'}
+
 def print_header():
     """Imprime cabeçalho do programa"""
     print("=" * 60)
@@ -59,24 +76,10 @@ def print_footer(total_produtos, produtos_com_dados, tempo_execucao):
     print("🎉 Processo finalizado!")
     print("=" * 60)
 
-def verificar_dependencias():
-    """Verifica se as dependências estão instaladas"""
-    dependencias_faltando = []
-    
-    try:
-        import requests
-    except ImportError:
-        dependencias_faltando.append("requests")
-    
-    try:
-        import selenium
-    except ImportError:
-        dependencias_faltando.append("selenium")
-    
-    try:
-        from bs4 import BeautifulSoup
-    except ImportError:
-        dependencias_faltando.append("beautifulsoup4")
+def verificar_dependencias(modulos=('requests', 'selenium', 'bs4')):
+    """Verifica se as dependências estão instaladas (sem importá-las)"""
+    dependencias_faltando = [DEPENDENCIAS.get(modulo, modulo) for modulo in modulos
+                             if importlib.util.find_spec(modulo) is None]
     
     if dependencias_faltando:
         print("❌ ERRO: Dependências não instaladas!")
@@ -86,10 +89,231 @@ def verificar_dependencias():
     
     return True
 
-def main():
+def padrao(valor, subcomando: bool):
+    """
+    Nas cópias das opções dentro de um subcomando o padrão é SUPPRESS: assim o valor
+    dado antes do subcomando (ex.: main.py --log-json crawl) não é sobrescrito
+    """
+    return argparse.SUPPRESS if subcomando else valor
+
+def adicionar_opcoes_execucao(parser, subcomando: bool = False):
+    """Perfil, memória e logging (menu interativo e crawl)"""
+    parser.add_argument('--profile', nargs='?', const='todas', metavar='ETAPAS', default=padrao(None, subcomando),
+                        help="Perfil por amostragem das etapas (descoberta, espera_selenium, download, "
+                             "parse, gravacao, produto; separadas por vírgula, padrão: todas) em logs/")
+    parser.add_argument('--profile-intervalo', type=float, default=padrao(5.0, subcomando), metavar='MS',
+                        help="Intervalo entre amostras do perfil em ms (padrão: 5)")
+    parser.add_argument('--memoria', action='store_true', default=padrao(False, subcomando),
+                        help="Relatório de picos de memória por etapa em dados/memoria/ (tracemalloc, bem mais lento)")
+    parser.add_argument('--memoria-limite', type=float, metavar='MB', default=padrao(None, subcomando),
+                        help="Orçamento de RSS em MB: acima dele a extração segura novas requisições")
+
+def adicionar_opcoes_log(parser, subcomando: bool = False):
+    parser.add_argument('--log-json', action='store_true', default=padrao(False, subcomando),
+                        help="Também grava o log em JSON (logs/*.jsonl) com eventos estruturados por requisição e produto")
+    parser.add_argument('--log-amostra', type=int, default=padrao(1, subcomando), metavar='N',
+                        help="Registra 1 de cada N linhas por produto (padrão: todas)")
+
+def adicionar_opcoes_descoberta(parser):
+    """Backend e origem da descoberta de URLs (discover e crawl)"""
+    parser.add_argument('--backend', choices=('selenium', 'cdp', 'http', 'http-api'), default='selenium',
+                        help="Backend da descoberta de URLs (padrão: selenium; http-api usa a API de busca do VTEX)")
+    parser.add_argument('--categorias', nargs='?', const='padrao', metavar='LISTA',
+                        help="Descoberta paralela por categoria (separadas por vírgula; sem valor: categorias padrão)")
+    parser.add_argument('--ttl', type=float, metavar='SEGUNDOS',
+                        help="Idade máxima do inventário de URLs reaproveitado (0 = sempre descobrir de novo)")
+    parser.add_argument('--base-url', help="URL base da loja (ex.: loja local de testes)")
+    parser.add_argument('--visual', action='store_true', help="Mostra o navegador (padrão: headless)")
+
+def parse_args(argv=None):
+    """Opções de linha de comando (sem subcomando = menu interativo)"""
+    parser = argparse.ArgumentParser(description="Scraper Integral Médica")
+    adicionar_opcoes_execucao(parser)
+    adicionar_opcoes_log(parser)
+    subparsers = parser.add_subparsers(dest='comando', metavar='COMANDO')
+
+    discover = subparsers.add_parser('discover', help="Descobre as URLs dos produtos (atualiza o inventário)")
+    adicionar_opcoes_descoberta(discover)
+    discover.add_argument('--saida', metavar='ARQUIVO', help="Também grava as URLs (uma por linha)")
+    adicionar_opcoes_log(discover, subcomando=True)
+
+    crawl = subparsers.add_parser('crawl', help="Descoberta + extração + gravação (coleta completa)")
+    adicionar_opcoes_descoberta(crawl)
+    crawl.add_argument('--workers', type=int, default=1, help="Requisições simultâneas na extração (padrão: 1)")
+    crawl.add_argument('--intervalo', type=float, default=2.0, metavar='SEGUNDOS',
+                       help="Intervalo mínimo entre requisições (padrão: 2)")
+    crawl.add_argument('--sem-xlsx', action='store_true', help="Não gera o XLSX (use o comando export depois)")
+    crawl.add_argument('--reextrair-suspeitos', action='store_true',
+                       help="Reextrai os produtos que falham na validação")
+    crawl.add_argument('--sem-progresso', action='store_true', help="Desliga a barra/linhas de progresso")
+    crawl.add_argument('--historico-meses', type=int, metavar='N',
+                       help="Mantém no histórico só os N meses de calendário mais recentes (padrão: todos)")
+    adicionar_opcoes_execucao(crawl, subcomando=True)
+    adicionar_opcoes_log(crawl, subcomando=True)
+
+    reparse = subparsers.add_parser('reparse', help="Reconstrói a visão larga a partir do dados_longo.csv (sem rede)")
+    reparse.add_argument('--longo', default=os.path.join('dados', 'csv', 'dados_longo.csv'))
+    reparse.add_argument('--saida', default=os.path.join('dados', 'csv', 'dados_reparse.csv'))
+    reparse.add_argument('--xlsx', metavar='ARQUIVO', help="Também exporta o resultado em XLSX")
+    adicionar_opcoes_log(reparse, subcomando=True)
+
+    export = subparsers.add_parser('export', help="Gera o XLSX a partir do dataset salvo (Parquet ou CSV)")
+    export.add_argument('--origem', help="Padrão: dados/parquet/dados.parquet (ou dados/csv/dados.csv)")
+    export.add_argument('--destino', help="Padrão: dados/excel/dados.xlsx")
+    adicionar_opcoes_log(export, subcomando=True)
+
+    test_url = subparsers.add_parser('test-url', help="Extrai um produto e mostra os campos encontrados")
+    test_url.add_argument('url')
+    test_url.add_argument('--json', action='store_true', help="Saída em JSON")
+    adicionar_opcoes_log(test_url, subcomando=True)
+
+    args = parser.parse_args(argv)
+
+    if getattr(args, 'backend', None) == 'http-api' and args.categorias:
+        parser.error("--categorias não se aplica ao backend http-api (a API já percorre o catálogo inteiro)")
+
+    if getattr(args, 'profile', None) is not None:
+        from perfilador import parse_stages
+        try:
+            parse_stages(args.profile)
+        except ValueError as e:
+            parser.error(str(e))
+    return args
+
+def criar_scraper(args, **options):
+    """IntegratedScraper com as opções de descoberta da linha de comando"""
+    from scraper_completo_integrado import IntegratedScraper
+    
+    categorias = None
+    if args.categorias == 'padrao':
+        from descoberta_categorias import DEFAULT_CATEGORIES
+        categorias = DEFAULT_CATEGORIES
+    elif args.categorias:
+        categorias = [categoria.strip() for categoria in args.categorias.split(',') if categoria.strip()]
+    if args.ttl is not None:
+        options['inventory_ttl'] = args.ttl
+    return IntegratedScraper(headless=not args.visual, discovery_backend=args.backend,
+                             categories=categorias, base_url=args.base_url, **options)
+
+def comando_discover(args) -> int:
+    """Descobre as URLs (ou reaproveita o inventário dentro do TTL)"""
+    scraper = criar_scraper(args)
+    urls = scraper.get_urls()
+    scraper.wait_for_inventory_refresh()
+    if not urls:
+        print("❌ Nenhuma URL coletada")
+        return 1
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(urls) + '\n')
+    print(f"✅ {len(urls)} URLs" + (f" salvas em {args.saida}" if args.saida else ""))
+    return 0
+
+def comando_crawl(args) -> int:
+    """Coleta completa sem perguntas"""
+    from perfilador import profiled
+    
+    scraper = criar_scraper(args, max_workers=args.workers, request_delay=args.intervalo,
+                            export_xlsx=not args.sem_xlsx, requeue_invalid=args.reextrair_suspeitos,
+                            memory_budget_mb=args.memoria_limite, track_memory=args.memoria,
+                            history_retention_months=args.historico_meses)
+    scraper.show_progress = not args.sem_progresso
+    inicio = time.time()
+    with profiled(args.profile, args.profile_intervalo):
+        dados = scraper.run()
+    if dados is None or dados.empty:
+        print("❌ Nenhum dado foi coletado (veja logs/scraper_integrado.log)")
+        return 1
+    from modelos import with_nutrition
+    com_dados = int(with_nutrition(dados).sum())
+    print(f"✅ {len(dados)} produtos ({com_dados} com dados nutricionais) em {time.time() - inicio:.1f}s")
+    return 0
+
+def comando_reparse(args) -> int:
+    """Visão larga a partir da tabela longa já salva, com os nomes do dados.csv atual"""
+    if not os.path.exists(args.longo):
+        print(f"❌ Arquivo não encontrado: {args.longo}")
+        return 1
+    import pandas as pd
+    from modelos import NUTRIENT_ATTRS
+    from tabela_nutricional import load_wide
+    
+    df = load_wide(args.longo, list(NUTRIENT_ATTRS))
+    dados_csv = os.path.join(os.path.dirname(args.longo), 'dados.csv')
+    if os.path.exists(dados_csv):
+        nomes = pd.read_csv(dados_csv, encoding='utf-8', usecols=['URL', 'NOME_PRODUTO'])
+        df = df.merge(nomes.drop_duplicates('URL'), on='URL', how='left')
+        df.insert(1, 'NOME_PRODUTO', df.pop('NOME_PRODUTO'))
+    
+    os.makedirs(os.path.dirname(args.saida) or '.', exist_ok=True)
+    df.to_csv(args.saida, index=False, encoding='utf-8')
+    print(f"✅ {len(df)} produtos reconstruídos em {args.saida}")
+    if args.xlsx:
+        from exportar_excel import export_excel
+        export_excel(df, args.xlsx)
+        print(f"📊 XLSX: {args.xlsx}")
+    return 0
+
+def comando_export(args) -> int:
+    from exportar_excel import export_dataset
+    
+    print(f"📊 XLSX salvo em: {export_dataset(args.origem, args.destino)}")
+    return 0
+
+def comando_test_url(args) -> int:
+    """Extrai um produto com o mesmo extrator da coleta completa"""
+    from modelos import FONTE_ERRO
+    from scraper_completo_integrado import IntegratedScraper
+    from unidades import normalize_records
+    
+    scraper = IntegratedScraper(discovery_backend='http')
+    produto, linhas = scraper.extract_product(args.url)
+    normalize_records([produto])
+    if args.json:
+        print(json.dumps(dict(produto.to_dict(), FONTE=produto.fonte, LINHAS_TABELA=len(linhas)),
+                         ensure_ascii=False, indent=2, default=str))
+    else:
+        print(f"📦 {produto.nome} ({produto.fonte}, {len(linhas)} linhas na tabela)")
+        for field, value in produto.nutrients().items():
+            print(f"   {field}: {'-' if value is None else f'{value:g}'}")
+    return 1 if produto.fonte == FONTE_ERRO else 0
+
+# Subcomando -> (função, arquivo de log, módulos necessários)
+COMANDOS = {
+    'discover': (comando_discover, 'coleta_urls', ('requests', 'bs4')),
+    'crawl': (comando_crawl, 'scraper_integrado', ('requests', 'bs4', 'pandas')),
+    'reparse': (comando_reparse, 'reparse', ('pandas',)),
+    'export': (comando_export, 'exportar', ('pandas',)),
+    'test-url': (comando_test_url, 'teste_url', ('requests', 'bs4', 'pandas')),
+}
+
+def executar_comando(args) -> int:
+    from log_config import setup_logging
+    
+    funcao, log_nome, modulos = COMANDOS[args.comando]
+    if getattr(args, 'backend', 'http') == 'selenium':
+        modulos = modulos + ('selenium',)
+    if not verificar_dependencias(modulos):
+        return 1
+    setup_logging(log_nome, json_logs=args.log_json, sample_every=args.log_amostra)
+    try:
+        return funcao(args)
+    except KeyboardInterrupt:
+        print("\n⚠️  Operação interrompida pelo usuário.")
+        return 130
+
+def main(argv=None):
     """Função principal"""
+    args = parse_args(argv)
+    if args.comando:
+        sys.exit(executar_comando(args))
+    
     print_header()
     
+    # Logging configurado uma vez aqui (arquivo de log de acordo com a opção escolhida)
+    from log_config import setup_logging
+    log_options = dict(json_logs=args.log_json, sample_every=args.log_amostra)
+    
     # Verificar dependências
     if not verificar_dependencias():
         print("💡 Você pode executar o teste rápido com: python config/teste.py")
@@ -108,10 +332,13 @@ def main():
         opcao = input().strip()
         
         if opcao == "1":
+            setup_logging('coleta_urls', **log_options)
             executar_coleta_urls()
             break
         elif opcao == "2":
-            executar_coleta_completa()
+            setup_logging('scraper_integrado', **log_options)
+            executar_coleta_completa(args.profile, args.profile_intervalo,
+                                     memory_budget_mb=args.memoria_limite, track_memory=args.memoria)
             break
         elif opcao == "3":
             executar_teste_produto()
@@ -184,8 +411,12 @@ def executar_coleta_urls():
         print(f"\n❌ Erro inesperado: {e}")
         sys.exit(1)
 
-def executar_coleta_completa():
-    """Executa a coleta completa de dados nutricionais usando o script integrado"""
+def executar_coleta_completa(profile=None, profile_interval_ms=5.0, memory_budget_mb=None, track_memory=False):
+    """
+    Executa a coleta completa de dados nutricionais usando o script integrado
+    profile: etapas do perfil por amostragem (None = desligado)
+    memory_budget_mb / track_memory: orçamento de RSS e relatório de memória
+    """
     print("\n📊 COLETA COMPLETA DE DADOS NUTRICIONAIS")
     print("=" * 50)
     print("📋 Esta opção irá:")
@@ -224,33 +455,37 @@ def executar_coleta_completa():
     try:
         # Importar e executar scraper integrado
         from scraper_completo_integrado import IntegratedScraper
+        from perfilador import profiled
         
         # Criar scraper
-        scraper = IntegratedScraper(headless=headless)
+        scraper = IntegratedScraper(headless=headless, memory_budget_mb=memory_budget_mb,
+                                    track_memory=track_memory)
         
-        # Executar coleta
-        dados = scraper.run()
+        # Executar coleta (com o perfil das etapas, se pedido no --profile)
+        with profiled(profile, profile_interval_ms):
+            dados = scraper.run()
         
         # Calcular estatísticas
         fim = time.time()
         tempo_execucao = fim - inicio
         
-        if dados:
+        if dados is not None and not dados.empty:
+            from modelos import iter_records, with_nutrition
+            
             total_produtos = len(dados)
-            produtos_com_dados = sum(1 for produto in dados 
-                                   if any(produto[field] != '0' for field in scraper.target_fields[2:]))
+            produtos_com_dados = int(with_nutrition(dados).sum())
             
             print_footer(total_produtos, produtos_com_dados, tempo_execucao)
             
             # Mostrar exemplo de dados
             print("\n📋 EXEMPLO DOS DADOS COLETADOS:")
             print("-" * 40)
-            for i, produto in enumerate(dados[:3]):
-                print(f"\n{i+1}. {produto['NOME_PRODUTO']}")
-                print(f"   URL: {produto['URL']}")
-                for field in scraper.target_fields[2:]:
-                    if produto[field] != '0':
-                        print(f"   {field}: {produto[field]}")
+            for i, produto in enumerate(iter_records(dados.head(3))):
+                print(f"\n{i+1}. {produto.nome}")
+                print(f"   URL: {produto.url}")
+                for field, value in produto.nutrients().items():
+                    if value is not None:
+                        print(f"   {field}: {value:g}")
             
             if len(dados) > 3:
                 print(f"\n... e mais {len(dados) - 3} produtos!")